@@ -0,0 +1,64 @@
+"""
+Benchmark newsletter delivery through Resend's batch endpoint against one request per
+email, against the local Resend stub with a fixed per-request latency standing in for
+the provider's response time.
+
+Usage:
+    python backend/benchmarks/email_delivery_benchmark.py [--emails 1000] [--latency 0.05] [--html-kb 40]
+"""
+import os
+import sys
+import argparse
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+
+import resend
+
+from src.services.email_delivery import RESEND_BATCH_LIMIT, BatchEmailDelivery
+from src.services.resend_stub import ResendStub
+
+
+def emails(count: int, html_kb: int):
+    html = '<p>' + 'x' * (html_kb * 1024) + '</p>'
+    return [{'from': 'alerts@dealsight.co', 'to': [f'buyer{i}@example.com'], 'subject': 'Your SaaS Alert',
+             'html': html} for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--emails', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.05, help='stub seconds per request')
+    parser.add_argument('--html-kb', type=int, default=40, help='rendered newsletter size')
+    parser.add_argument('--batch-size', type=int, default=RESEND_BATCH_LIMIT)
+    args = parser.parse_args()
+
+    with ResendStub(latency=args.latency) as stub:
+        resend.api_url = stub.url
+        params = emails(args.emails, args.html_kb)
+
+        start = time.perf_counter()
+        for email in params:
+            resend.Emails.send(email)
+        single_time = time.perf_counter() - start
+        single_requests = stub.requests
+
+        delivery = BatchEmailDelivery(args.batch_size)
+        start = time.perf_counter()
+        results = []
+        for email in params:
+            results.extend(delivery.add(email))
+        results.extend(delivery.flush())
+        batch_time = time.perf_counter() - start
+
+    assert all(result.sent for result in results)
+    print(f"{'one request per email':<24} {single_time:8.2f} s  {args.emails / single_time:8.1f} emails/s  "
+          f"({single_requests:,} requests)")
+    print(f"{'batch endpoint':<24} {batch_time:8.2f} s  {args.emails / batch_time:8.1f} emails/s  "
+          f"({delivery.requests:,} requests)")
+    print(f"{'speedup':<24} {single_time / batch_time:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
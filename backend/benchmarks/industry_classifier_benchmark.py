@@ -0,0 +1,115 @@
+"""
+Benchmark the shared IndustryClassifier against the per-scraper `any(term in text ...)`
+chains it replaced.
+
+Usage:
+    python backend/benchmarks/industry_classifier_benchmark.py [--titles 20000] [--repeat 5]
+"""
+import os
+import sys
+import random
+import argparse
+import timeit
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(project_root)
+
+from backend.src.services.industry_classifier import IndustryClassifier
+
+WORDS = [
+    'profitable', 'established', 'growing', 'turnkey', 'niche', 'b2b', 'dtc', 'premium', 'recurring',
+    'saas', 'software', 'app', 'shopify', 'amazon', 'fba', 'blog', 'youtube', 'newsletter', 'agency',
+    'consulting', 'manufacturing', 'wholesale', 'distribution', 'education', 'medical', 'solar',
+    'marketing', 'seo', 'business', 'company', 'brand', 'store', 'platform', 'portfolio', 'website',
+    'pet', 'fitness', 'home', 'garden', 'kitchen', 'outdoor', 'beauty', 'travel', 'finance', 'legal'
+]
+
+
+def legacy_normalize_industry(industry: str) -> str:
+    """NewsletterService.normalize_industry before the shared classifier"""
+    industry = industry.lower().strip()
+    if any(term in industry for term in ['saas', 'software', 'tech', 'app', 'plugin', 'extension', 'mobile']):
+        return 'Software/SaaS'
+    elif any(term in industry for term in ['ecommerce', 'e-commerce', 'amazon', 'shopify', 'fba', 'retail', 'commerce']):
+        return 'Ecommerce'
+    elif any(term in industry for term in ['content', 'blog', 'media', 'digital', 'youtube', 'social media', 'newsletter', 'advertising', 'entertainment']):
+        return 'Content/Media'
+    elif any(term in industry for term in ['service', 'consulting', 'agency', 'services']):
+        return 'Service'
+    elif any(term in industry for term in ['manufacturing', 'factory', 'production']):
+        return 'Manufacturing'
+    elif any(term in industry for term in ['distribution', 'wholesale']):
+        return 'Wholesale/Distribution'
+    elif any(term in industry for term in ['education', 'learning', 'teaching', 'edtech']):
+        return 'Education'
+    elif any(term in industry for term in ['health', 'healthcare', 'medical']):
+        return 'Healthcare Services'
+    elif any(term in industry for term in ['marketing', 'seo', 'ppc', 'advertising']):
+        return 'Marketing'
+    elif any(term in industry for term in ['renewable', 'energy', 'solar', 'wind']):
+        return 'Renewable Energy'
+    else:
+        return 'Other'
+
+
+def legacy_scraper_industry(title: str) -> str:
+    """The chain copied into most scrapers' _extract_industry"""
+    title = title.lower()
+    if any(term in title for term in ['saas', 'software', 'tech', 'app']):
+        return 'Software/SaaS'
+    elif any(term in title for term in ['ecommerce', 'e-commerce', 'amazon', 'shopify']):
+        return 'Ecommerce'
+    elif any(term in title for term in ['manufacturing', 'factory', 'production']):
+        return 'Manufacturing'
+    elif any(term in title for term in ['service', 'consulting', 'agency']):
+        return 'Service'
+    else:
+        return 'Other'
+
+
+def make_titles(count: int, unique: int, seed: int = 7):
+    rng = random.Random(seed)
+    pool = [' '.join(rng.choice(WORDS).title() for _ in range(rng.randint(4, 10))) for _ in range(unique)]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--titles', type=int, default=20000)
+    parser.add_argument('--unique', type=int, default=5000, help='distinct titles in the sample')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    titles = make_titles(args.titles, args.unique)
+    print(f"📊 Classifying {len(titles):,} titles ({args.unique:,} distinct), best of {args.repeat} runs\n")
+
+    def run_uncached():
+        classifier = IndustryClassifier(cache_size=0)
+        return [classifier.classify(title) for title in titles]
+
+    def run_cached():
+        classifier = IndustryClassifier()
+        return classifier.classify_many(titles)
+
+    cases = [
+        ('legacy normalize_industry chain', lambda: [legacy_normalize_industry(t) for t in titles]),
+        ('legacy scraper chain', lambda: [legacy_scraper_industry(t) for t in titles]),
+        ('IndustryClassifier (no cache)', run_uncached),
+        ('IndustryClassifier (memoized)', run_cached),
+    ]
+
+    for name, func in cases:
+        best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print(f"{name:<34} {best * 1000:9.1f} ms  ({best / len(titles) * 1e6:6.2f} µs/title)")
+
+    legacy = [legacy_normalize_industry(t) for t in titles]
+    shared = run_cached()
+    agreement = sum(a == b for a, b in zip(legacy, shared)) / len(titles)
+    print(f"\n✅ Agreement with legacy normalize_industry: {agreement:.1%}")
+    print("   (differences come from the unified taxonomy: the generic Service category comes last,")
+    print("    and terms match whole words, so 'Apparel' is no longer an 'app')")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark keyword evaluation for many alerts: each alert's KeywordQuery.score on every
+listing, against one KeywordScanner pass per listing followed by set operations per
+alert. Listings and alerts are synthetic, with the text shape of the matching benchmark.
+
+Usage:
+    python backend/benchmarks/keyword_scanner_benchmark.py [--listings 1000] [--alerts 1000]
+"""
+import os
+import sys
+import random
+import argparse
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+sys.path.append(os.path.dirname(backend_dir))
+
+from newsletter_matching_benchmark import WORDS
+
+
+def keywords(rng: random.Random, count: int):
+    return list(dict.fromkeys(' '.join(rng.sample(WORDS, rng.randint(1, 2))) for _ in range(count)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--listings', type=int, default=1000)
+    parser.add_argument('--alerts', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    from src.database.keyword_query import KeywordQuery
+    from src.services.keyword_scanner import KeywordScanner
+
+    rng = random.Random(args.seed)
+    listings = [{
+        'title': ' '.join(rng.choice(WORDS) for _ in range(6)).title(),
+        'description': ' '.join(rng.choice(WORDS) for _ in range(120)),
+        'location': 'United States'
+    } for _ in range(args.listings)]
+    queries = [KeywordQuery.from_alert({
+        'search_keywords': keywords(rng, rng.randint(1, 3)),
+        'search_match_type': rng.choice(['any', 'all', 'exact']),
+        'search_in': rng.choice([['title'], ['title', 'description']]),
+        'exclude_keywords': keywords(rng, rng.randint(0, 2))
+    }) for _ in range(args.alerts)]
+    pairs = args.listings * args.alerts
+    print(f"📊 {args.listings:,} listings x {args.alerts:,} alerts")
+
+    start = time.perf_counter()
+    looped = [[query.score(listing) for query in queries] for listing in listings]
+    loop_time = time.perf_counter() - start
+    print(f"{'KeywordQuery.score per alert':<32} {loop_time:8.2f} s  ({loop_time / pairs * 1e6:.2f} µs per pair)")
+
+    start = time.perf_counter()
+    scanner = KeywordScanner()
+    compiled = [scanner.compile(query) for query in queries]
+    scanner.scan({})
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scanned = []
+    for listing in listings:
+        hits = scanner.scan(listing)
+        scanned.append([scanner.score(query, hits) for query in compiled])
+    scan_time = time.perf_counter() - start
+    print(f"{'automaton build':<32} {build_time * 1000:8.1f} ms  ({len(scanner):,} distinct phrases)")
+    print(f"{'single scan + set operations':<32} {scan_time:8.2f} s  ({scan_time / pairs * 1e6:.2f} µs per pair)")
+    print(f"{'speedup':<32} {loop_time / (build_time + scan_time):8.1f}x")
+
+    print(f"\n✅ Scores agree: {looped == scanned}")
+
+
+if __name__ == '__main__':
+    main()
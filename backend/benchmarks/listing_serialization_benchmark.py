@@ -0,0 +1,109 @@
+"""
+Benchmark the old listing pipeline (json.dumps the nested fields into the scraper dict,
+json.loads them again downstream) against the Listing record, which keeps them as
+Python objects and serializes once in `to_row()`.
+
+Usage:
+    python backend/benchmarks/listing_serialization_benchmark.py [--listings 5000] [--repeat 5]
+"""
+import os
+import sys
+import json
+import argparse
+import timeit
+import tracemalloc
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(project_root)
+
+from backend.src.database.listing_record import Listing, orjson
+
+
+def scraped_listing(i: int) -> dict:
+    listing_data = {
+        'title': f'Profitable Ecommerce Brand #{i}',
+        'listing_url': f'https://example.com/listing/{i}',
+        'description': 'Established brand with recurring customers. ' * 8,
+        'business_type': 'Ecommerce'
+    }
+    listing_details = {
+        'description_text': 'Full description of the business and its operations. ' * 30,
+        'highlights': [f'Highlight {n} for listing {i}' for n in range(6)]
+    }
+    return {
+        'title': listing_data['title'],
+        'listing_url': listing_data['listing_url'],
+        'source_platform': 'Flippa',
+        'asking_price': 1000000 + i,
+        'revenue': 2000000 + i,
+        'ebitda': 400000 + i,
+        'industry': 'Ecommerce',
+        'location': 'United States',
+        'description': listing_data['description'],
+        'full_description': listing_details['description_text'],
+        'business_highlights': listing_details['highlights'],
+        'financial_details': {'revenue_multiple': 0.5, 'annual_revenue': 2000000 + i, 'annual_profit': 400000 + i},
+        'business_details': {'location': 'United States', 'employees': '4', 'business_age': 6},
+        'raw_data': {'listing_data': listing_data, 'listing_details': listing_details},
+        'status': 'active'
+    }
+
+
+NESTED = ('business_highlights', 'financial_details', 'business_details', 'raw_data')
+
+
+def legacy_pipeline(sources):
+    """Scraper json.dumps, store_listing copies the strings, a consumer json.loads them back"""
+    rows = []
+    for source in sources:
+        listing = dict(source)
+        for key in NESTED:
+            listing[key] = json.dumps(listing[key])
+        row = {key: listing.get(key) for key in listing if key != 'full_description'}
+        row['description'] = listing['full_description']
+        json.loads(row['financial_details'])
+        rows.append(row)
+    return rows
+
+
+def record_pipeline(sources):
+    rows = []
+    for source in sources:
+        listing = Listing.from_dict(source)
+        listing.financial_details.get('annual_profit')
+        rows.append(listing.to_row())
+    return rows
+
+
+def peak_memory(func, sources) -> int:
+    tracemalloc.start()
+    func(sources)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--listings', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    sources = [scraped_listing(i) for i in range(args.listings)]
+    print(f"📊 Building rows for {len(sources):,} listings, best of {args.repeat} runs "
+          f"(orjson {'enabled' if orjson else 'not installed'})\n")
+
+    for name, func in [('dict + json.dumps/json.loads', legacy_pipeline), ('Listing record', record_pipeline)]:
+        best = min(timeit.repeat(lambda: func(sources), number=1, repeat=args.repeat))
+        peak = peak_memory(func, sources)
+        print(f"{name:<30} {best * 1000:8.1f} ms  ({best / len(sources) * 1e6:6.1f} µs/listing)  "
+              f"peak {peak / 1024 / 1024:6.1f} MiB")
+
+    single = Listing.from_dict(sources[0])
+    legacy = dict(sources[0])
+    print(f"\nPer-object size: Listing {sys.getsizeof(single)} bytes vs dict {sys.getsizeof(legacy)} bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark alert matching and newsletter scheduling against the embedded SQLite backend,
+seeded with synthetic data at production-like volumes, so database work is measured
+without network latency.
+
+Usage:
+    python backend/benchmarks/newsletter_matching_benchmark.py [--listings 50000] [--alerts 2000]
+"""
+import io
+import os
+import sys
+import random
+import argparse
+import tempfile
+import time
+import uuid
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta, UTC
+
+# The services import their dependencies as `src.` from the backend directory
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+sys.path.append(os.path.dirname(backend_dir))
+
+INDUSTRIES = ['Software/SaaS', 'Technology', 'Ecommerce', 'Content/Media', 'Service', 'Manufacturing',
+              'Wholesale/Distribution', 'Education', 'Healthcare Services', 'Marketing', 'Other']
+PLATFORMS = ['Flippa', 'BizBuySell', 'QuietLight', 'EmpireFlippers', 'Acquire', 'BusinessExits']
+WORDS = ['profitable', 'saas', 'subscription', 'amazon', 'fba', 'agency', 'recurring', 'b2b', 'content',
+         'newsletter', 'manufacturing', 'pet', 'fitness', 'home', 'kitchen', 'outdoor', 'beauty', 'travel']
+ALERT_INDUSTRIES = ['SaaS', 'E-commerce', 'Content', 'Services', 'Manufacturing', 'Education']
+FREQUENCIES = ['daily', 'weekly', 'monthly']
+
+
+def seed(db, listing_count: int, alert_count: int, rng: random.Random, days: int = 180):
+    from src.database.keyword_query import term_frequencies
+
+    now = datetime.now(UTC)
+    listings = []
+    for i in range(listing_count):
+        created = now - timedelta(days=rng.random() * days)
+        revenue = rng.randint(50_000, 10_000_000)
+        listings.append({
+            'id': str(uuid.uuid4()),
+            'title': ' '.join(rng.choice(WORDS) for _ in range(6)).title(),
+            'listing_url': f'https://example.com/listing/{i}',
+            'source_platform': rng.choice(PLATFORMS),
+            'asking_price': int(rng.random() ** 3 * 20_000_000),
+            'revenue': revenue,
+            'ebitda': int(revenue * rng.uniform(0.05, 0.4)),
+            'industry': rng.choice(INDUSTRIES),
+            'location': 'United States',
+            'description': ' '.join(rng.choice(WORDS) for _ in range(120)),
+            'status': 'active',
+            'created_at': created.isoformat(),
+            'first_seen_at': created.isoformat(),
+            'last_seen_at': created.isoformat()
+        })
+        # As store_listing records them at ingest
+        listings[-1]['term_frequencies'] = term_frequencies(listings[-1])
+    db.insert_many('listings', listings)
+
+    users = [{'id': str(uuid.uuid4()), 'email': f'user{i}@example.com', 'created_at': now.isoformat()}
+             for i in range(max(1, alert_count // 2))]
+    db.insert_many('users', users)
+
+    alerts = []
+    for i in range(alert_count):
+        min_price = rng.choice([None, 100_000, 500_000, 1_000_000])
+        alerts.append({
+            'id': str(uuid.uuid4()),
+            'user_id': rng.choice(users)['id'],
+            'name': f'Alert {i}',
+            'industries': rng.sample(ALERT_INDUSTRIES, rng.randint(0, 3)),
+            'min_price': min_price,
+            'max_price': min_price * 10 if min_price else None,
+            'newsletter_frequency': rng.choice(FREQUENCIES),
+            'last_notification_sent': (now - timedelta(days=rng.randint(1, 40))).isoformat(),
+            'search_keywords': rng.sample(WORDS, rng.randint(0, 3)),
+            'search_match_type': rng.choice(['any', 'all']),
+            'search_in': ['title', 'description'],
+            'exclude_keywords': [],
+            'created_at': now.isoformat()
+        })
+    db.insert_many('alerts', alerts)
+    return alerts
+
+
+def timed(label: str, func, count: int):
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed * 1000:9.1f} ms  ({elapsed / count * 1000:7.2f} ms each)")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--listings', type=int, default=50000)
+    parser.add_argument('--alerts', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='deal-aggregator-bench-')
+    os.environ['STORAGE_BACKEND'] = 'sqlite'
+    os.environ['SQLITE_PATH'] = os.path.join(workdir, 'bench.db')
+    os.environ.setdefault('RESEND_API_KEY', 'bench')
+
+    from src.database.storage import get_storage_backend
+    from src.services.newsletter_service import NewsletterService
+    from src.services.scheduler_service import SchedulerService
+
+    with redirect_stdout(io.StringIO()):
+        db = get_storage_backend()
+    print(f"📊 Seeding {args.listings:,} listings and {args.alerts:,} alerts into {os.environ['SQLITE_PATH']}")
+    alerts = seed(db, args.listings, args.alerts, random.Random(args.seed))
+    db.refresh_newsletter_candidates()
+
+    with redirect_stdout(io.StringIO()):
+        newsletter_service = NewsletterService()
+        scheduler = SchedulerService()
+
+    results = timed('get_matching_listings (all alerts)',
+                    lambda: [newsletter_service.get_matching_listings(alert) for alert in alerts], len(alerts))
+    timed('schedule_newsletters', scheduler.schedule_newsletters, len(alerts))
+
+    matched = sum(1 for r in results if r['exact_matches'] or r['other_matches'])
+    print(f"\n✅ {matched:,} of {len(alerts):,} alerts had matching listings")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,9 +4,14 @@ from backend.src.services.listing_details_scraper import ListingDetailsScraper
 from config.search_queries import get_queries_from_db
 import json
 from datetime import datetime, timedelta
-from backend.src.database.supabase_db import SupabaseClient
+from backend.src.database.storage import get_storage_backend
+from backend.src.services.alert_index import AlertRouter
 import threading
 import signal
+import os
+
+# Listings not seen in this many successful runs of their platform are marked inactive
+STALE_AFTER_RUNS = int(os.getenv('STALE_AFTER_RUNS', '3'))
 
 # Global flag for scraper status
 _scraper_running = False
@@ -121,12 +126,13 @@ def run_scrapers():
         
         # Initialize database client
         print("🔌 Initializing database connection...")
-        db = SupabaseClient()
+        db = get_storage_backend()
         
         def scraper_task():
             # Get listings from all sources
             print("\n🔄 Starting scraper run...")
             print("📊 Fetching listings from all platforms")
+            run_started_at = db.start_scraper_run()
             try:
                 all_listings = get_all_listings()
             except Exception as e:
@@ -134,8 +140,17 @@ def run_scrapers():
                 print(f"📜 Traceback:\n{traceback.format_exc()}")
                 all_listings = {}  # Continue with empty listings rather than failing
             
+            # Route each new listing to the alerts it matches as it is stored
+            router = None
+            try:
+                router = AlertRouter(db)
+                router.subscribe()
+            except Exception as e:
+                print(f"❌ Error building alert index, newsletters will query for matches: {e}")
+            
             total_processed = 0
             total_errors = 0
+            failed_sources = set()
             
             # Store listings in database
             for platform, listings in all_listings.items():
@@ -154,6 +169,7 @@ def run_scrapers():
                             print(f"❌ Error storing listing: {str(e)[:500]}")  # Truncate long error messages
                             platform_errors += 1
                             total_errors += 1
+                            failed_sources.add(listing.get('source_platform') or platform)
                             continue
                     
                     print(f"\n📊 Platform Summary - {platform}:")
@@ -164,6 +180,37 @@ def run_scrapers():
                     print(f"📜 Traceback:\n{traceback.format_exc()}")
                     continue
             
+            # Re-seen listings, including known URLs the scrapers skipped, only had
+            # last_seen_at buffered; write it in bulk and record a run per platform.
+            # Only clean runs count towards staleness; a partial run would sweep
+            # listings that simply failed to store
+            try:
+                for source, seen in db.finish_scraper_run(run_started_at, failed_sources).items():
+                    print(f"👀 {source}: saw {seen} listings")
+            except Exception as e:
+                print(f"❌ Error recording scraper runs: {e}")
+            
+            if router:
+                try:
+                    router.flush()
+                    print(f"🎯 Routed {router.routed} alert matches")
+                except Exception as e:
+                    print(f"❌ Error saving alert matches: {e}")
+            
+            try:
+                swept = db.sweep_stale_listings(STALE_AFTER_RUNS)
+                for source, count in swept.items():
+                    print(f"🧹 Marked {count} stale {source} listings inactive")
+            except Exception as e:
+                print(f"❌ Error sweeping stale listings: {e}")
+            
+            # Newsletter matching reads the recent active listings from this snapshot
+            try:
+                db.refresh_newsletter_candidates()
+                print("🔄 Refreshed newsletter candidates")
+            except Exception as e:
+                print(f"❌ Error refreshing newsletter candidates: {e}")
+            
             print("\n📈 Overall Scraper Summary:")
             print(f"✅ Total listings processed: {total_processed}")
             print(f"❌ Total errors: {total_errors}")
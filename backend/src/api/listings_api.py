@@ -6,7 +6,8 @@ from time import sleep
 from config.config import SCRAPER_API_KEY
 from backend.src.services.listing_page_scraper import ListingPageScraper
 from backend.src.scrapers.business_exits.scraper import BusinessExitsScraper
-from backend.src.database.supabase_db import SupabaseClient
+from backend.src.database.storage import get_storage_backend
+from backend.src.database.listing_record import Listing
 from backend.src.scrapers.bizbuysell.scraper import BizBuySellScraper
 from backend.src.scrapers.quietlight.scraper import QuietLightScraper
 from backend.src.scrapers.empire_flippers.scraper import EmpireFlippersScraper
@@ -16,6 +17,7 @@ from backend.src.scrapers.transworld.scraper import TransWorldScraper
 from backend.src.scrapers.sunbelt.scraper import SunbeltScraper
 from backend.src.scrapers.viking_mergers.scraper import VikingMergersScraper
 from backend.src.scrapers.acquire.scraper import AcquireScraper
+from backend.src.services.industry_classifier import classify_industry
 
 def get_all_listings(limit: int = None, queries: Dict[str, Dict[str, str]] = None) -> Dict[str, List[Dict]]:
     """
@@ -290,17 +292,7 @@ def extract_industry(title: str) -> str:
     """
     Extract industry from listing title
     """
-    # Add logic to identify industry from title
-    # This is a simple example - you might want to make this more sophisticated
-    title = title.lower()
-    if 'saas' in title or 'software' in title:
-        return 'Software'
-    elif 'ecommerce' in title or 'e-commerce' in title:
-        return 'E-commerce'
-    elif 'tech' in title or 'technology' in title:
-        return 'Technology'
-    else:
-        return 'Other'
+    return classify_industry(title)
 
 def matches_buyer_criteria(listing: Dict, criteria: Dict) -> bool:
     """
@@ -343,7 +335,7 @@ class ListingDetailsScraper:
             'premium': 'true',
             'country_code': 'us'
         }
-        self.supabase = SupabaseClient()
+        self.supabase = get_storage_backend()
         self.page_scraper = ListingPageScraper()
 
     def enrich_listings(self, listings: List[Dict]) -> List[Dict]:
@@ -365,7 +357,7 @@ class ListingDetailsScraper:
                     })
                 
                 # Prepare for storage
-                enriched_listing = {
+                enriched_listing = Listing.from_dict({
                     'title': listing['title'],
                     'listing_url': listing['listing_url'],
                     'source_platform': listing.get('source_platform', ''),
@@ -375,12 +367,12 @@ class ListingDetailsScraper:
                     'industry': listing.get('industry', ''),
                     'location': listing.get('business_info', {}).get('location', 'United States'),
                     'description': listing.get('full_description', ''),
-                    'business_highlights': json.dumps(listing.get('key_highlights', {})),
-                    'financial_details': json.dumps(listing.get('financial_info', {})),
-                    'business_details': json.dumps(listing.get('business_info', {})),
-                    'raw_data': json.dumps(listing),
+                    'business_highlights': listing.get('key_highlights', {}),
+                    'financial_details': listing.get('financial_info', {}),
+                    'business_details': listing.get('business_info', {}),
+                    'raw_data': listing,
                     'status': 'active'
-                }
+                })
                 
                 enriched_listings.append(enriched_listing)
                 
@@ -0,0 +1,132 @@
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Alert search_in fields and the tsvector weight each one is indexed under in
+# listings.search_vector (title ranks highest)
+FIELD_WEIGHTS = {'title': 'A', 'description': 'B', 'location': 'C'}
+
+# The matching newsletter_candidates text columns in the SQLite FTS5 index
+FTS5_COLUMNS = {'title': 'search_title', 'description': 'search_description', 'location': 'search_location'}
+
+WORD = re.compile(r'\w+')
+
+
+def term_frequencies(texts: Dict[str, Optional[str]]) -> Dict[str, Dict[str, int]]:
+    """Each text field's lowercase word counts, as stored for BM25 ranking"""
+    return {f: dict(Counter(WORD.findall((texts.get(f) or '').lower()))) for f in FIELD_WEIGHTS}
+
+
+def _phrases(keywords: Sequence[str]) -> List[List[str]]:
+    """Each keyword as its list of lowercase words; empty and repeated keywords are dropped"""
+    phrases = []
+    for keyword in keywords or []:
+        words = WORD.findall(str(keyword).lower())
+        if words and words not in phrases:
+            phrases.append(words)
+    return phrases
+
+
+def _phrase_in(words: List[str], tokens: List[str]) -> bool:
+    """Whether tokens contain the words consecutively, the last one as a prefix of its token"""
+    span = len(words)
+    for start in range(len(tokens) - span + 1):
+        if tokens[start:start + span - 1] == words[:-1] and tokens[start + span - 1].startswith(words[-1]):
+            return True
+    return False
+
+
+@dataclass(slots=True)
+class KeywordQuery:
+    """
+    An alert's keyword search (search_keywords, search_match_type, search_in and
+    exclude_keywords), compiled to a Postgres tsquery or an SQLite FTS5 expression.
+
+    Keywords match as word prefixes, so 'saas' still matches 'SaaSy'. A keyword of
+    several words matches as a phrase whose last word is a prefix, as in FTS5.
+    match_type 'any' needs one keyword, 'all' needs every keyword, and 'exact' needs
+    all the keywords as one consecutive phrase.
+    """
+    phrases: List[List[str]]
+    match_type: str = 'any'
+    fields: Tuple[str, ...] = ('title', 'description')
+    exclude: List[List[str]] = field(default_factory=list)
+
+    @classmethod
+    def from_alert(cls, alert: Dict) -> Optional['KeywordQuery']:
+        """The alert's keyword query, or None when it has no searchable keywords"""
+        phrases = _phrases(alert.get('search_keywords'))
+        if not phrases:
+            return None
+        fields = tuple(f for f in FIELD_WEIGHTS if f in (alert.get('search_in') or ['title', 'description']))
+        return cls(
+            phrases=phrases,
+            match_type=alert.get('search_match_type') or 'any',
+            fields=fields or ('title', 'description'),
+            exclude=_phrases(alert.get('exclude_keywords'))
+        )
+
+    def _grouped(self) -> List[List[str]]:
+        if self.match_type == 'exact':
+            return [[word for phrase in self.phrases for word in phrase]]
+        return self.phrases
+
+    # In-process evaluation, for matching one listing at a time
+
+    def score(self, texts: Dict[str, Optional[str]]) -> Optional[int]:
+        """
+        Evaluate the query against a listing's text by field ('title', 'description',
+        'location'), with the same prefix and phrase semantics as the tsquery (but no
+        stemming). Returns None when an exclusion matches, 0 when the query does not
+        match, and otherwise a score where title hits count double.
+        """
+        tokens = {f: WORD.findall((texts.get(f) or '').lower()) for f in self.fields}
+        if any(_phrase_in(words, field_tokens) for words in self.exclude for field_tokens in tokens.values()):
+            return None
+
+        groups = self._grouped()
+        score, hits = 0, 0
+        for words in groups:
+            hit = False
+            for f, field_tokens in tokens.items():
+                if _phrase_in(words, field_tokens):
+                    hit = True
+                    score += 2 if f == 'title' else 1
+            hits += hit
+        if hits == 0 or (self.match_type != 'any' and hits < len(groups)):
+            return 0
+        return score
+
+    # Postgres
+
+    def _tsquery_phrase(self, words: List[str]) -> str:
+        weights = ''.join(FIELD_WEIGHTS[f] for f in self.fields)
+        terms = [f"{word}:{weights}" for word in words[:-1]] + [f"{words[-1]}:*{weights}"]
+        return ' <-> '.join(terms)
+
+    def to_tsquery(self) -> str:
+        """The tsquery text (for to_tsquery) a listing must match"""
+        joiner = ' | ' if self.match_type == 'any' else ' & '
+        return joiner.join(f"({self._tsquery_phrase(words)})" for words in self._grouped())
+
+    def exclude_tsquery(self) -> Optional[str]:
+        """The tsquery text of the exclusions, or None when there are none"""
+        if not self.exclude:
+            return None
+        return ' | '.join(f"({self._tsquery_phrase(words)})" for words in self.exclude)
+
+    # SQLite FTS5
+
+    def _fts5(self, groups: List[List[str]], joiner: str) -> str:
+        columns = ' '.join(FTS5_COLUMNS[f] for f in self.fields)
+        terms = f" {joiner} ".join(f'"{" ".join(words)}"*' for words in groups)
+        return f"{{{columns}}} : ({terms})"
+
+    def to_fts5(self) -> str:
+        """The FTS5 MATCH expression a listing must match"""
+        return self._fts5(self._grouped(), 'OR' if self.match_type == 'any' else 'AND')
+
+    def exclude_fts5(self) -> Optional[str]:
+        """The FTS5 MATCH expression of the exclusions, or None when there are none"""
+        return self._fts5(self.exclude, 'OR') if self.exclude else None
@@ -0,0 +1,153 @@
+import os
+import math
+import struct
+import hashlib
+from typing import Iterable, List, Optional
+
+DEFAULT_FILTER_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    '.cache', 'known_listing_urls.bloom'
+)
+DEFAULT_CAPACITY = 200_000
+DEFAULT_ERROR_RATE = 0.001
+
+_MAGIC = b'BLM1'
+_HEADER = struct.Struct('<4sQIQH')  # magic, bit count, hash count, item count, watermark length
+
+
+class BloomFilter:
+    """
+    Fixed-size probabilistic set: `in` is never wrong for added items and wrong for
+    others with probability about error_rate while len(self) <= capacity.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, error_rate: float = DEFAULT_ERROR_RATE):
+        self.capacity = capacity
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # Double hashing (Kirsch-Mitzenmacher) from one 128-bit digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, item: str) -> bool:
+        """Add an item; returns True if it was (probably) not present before"""
+        added = False
+        for position in self._positions(item):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not self.bits[byte] & mask:
+                self.bits[byte] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def is_full(self) -> bool:
+        return self.count > self.capacity
+
+    def to_bytes(self, watermark: str = '') -> bytes:
+        encoded = watermark.encode()
+        return _HEADER.pack(_MAGIC, self.num_bits, self.num_hashes, self.count, len(encoded)) + encoded + bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        """Returns (filter, watermark)"""
+        magic, num_bits, num_hashes, count, watermark_length = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("Not a Bloom filter file")
+        offset = _HEADER.size
+        watermark = data[offset:offset + watermark_length].decode()
+        bits = bytearray(data[offset + watermark_length:])
+        if len(bits) != (num_bits + 7) // 8:
+            raise ValueError("Truncated Bloom filter file")
+
+        bloom = cls.__new__(cls)
+        bloom.num_bits, bloom.num_hashes, bloom.count, bloom.bits = num_bits, num_hashes, count, bits
+        bloom.capacity = max(1, round(num_bits * math.log(2) / num_hashes))
+        return bloom, watermark
+
+
+class KnownListingUrls:
+    """
+    Local Bloom filter of every listing_url in the database, persisted to disk.
+
+    On first use the filter is loaded and brought up to date by streaming only the
+    listings created since the last sync (the watermark), so each run is an
+    incremental refresh. URLs not in the filter are definitely new and never need a
+    database round trip; only "maybe present" URLs are checked against the database.
+    """
+
+    def __init__(self, db, path: Optional[str] = None,
+                 capacity: int = DEFAULT_CAPACITY, error_rate: float = DEFAULT_ERROR_RATE):
+        self.db = db
+        self.path = path or os.getenv('KNOWN_URLS_FILTER_PATH', DEFAULT_FILTER_PATH)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bloom: Optional[BloomFilter] = None
+        self.watermark = ''
+
+    def _load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                self.bloom, self.watermark = BloomFilter.from_bytes(f.read())
+            print(f"Loaded known-URL filter with {len(self.bloom):,} URLs (synced to {self.watermark or 'start'})")
+        except FileNotFoundError:
+            self._reset(self.capacity)
+        except (ValueError, struct.error) as e:
+            print(f"Rebuilding unreadable known-URL filter: {e}")
+            self._reset(self.capacity)
+
+    def _reset(self, capacity: int):
+        self.bloom = BloomFilter(capacity, self.error_rate)
+        self.watermark = ''
+
+    def refresh(self):
+        """Add listings created since the last sync and persist the filter"""
+        if self.bloom is None:
+            self._load()
+
+        filters = [('gte', 'created_at', self.watermark)] if self.watermark else []
+        added = 0
+        for row in self.db.stream_rows('listings', self.db.LISTING_DEDUP_COLUMNS + ',created_at', filters=filters):
+            self.bloom.add(row['listing_url'])
+            self.watermark = row['created_at']
+            added += 1
+
+        if self.bloom.is_full:
+            # Too many URLs for the configured error rate: rebuild at twice the size
+            print(f"Known-URL filter over capacity ({len(self.bloom):,} URLs), rebuilding")
+            self._reset(self.bloom.capacity * 2)
+            self.refresh()
+            return
+
+        print(f"Known-URL filter refreshed: {added:,} rows synced, {len(self.bloom):,} URLs known")
+        self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(self.bloom.to_bytes(self.watermark))
+        os.replace(tmp_path, self.path)
+
+    def add(self, url: str):
+        if self.bloom is not None:
+            self.bloom.add(url)
+
+    def maybe_known(self, urls: Iterable[str]) -> List[str]:
+        """The URLs that might already be stored; everything else is definitely new"""
+        if self.bloom is None:
+            self.refresh()
+        return [url for url in urls if url in self.bloom]
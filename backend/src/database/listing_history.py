@@ -0,0 +1,59 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+SNAPSHOT_TABLE = 'listing_snapshots'
+
+# Metrics whose changes are recorded in listing_snapshots and published as events
+TRACKED_METRICS = ('asking_price', 'revenue', 'ebitda')
+
+SNAPSHOT_COLUMNS = (
+    'id,listing_id,source_platform,observed_at,asking_price,revenue,ebitda,'
+    'previous_asking_price,previous_revenue,previous_ebitda,price_change'
+)
+
+
+@dataclass(slots=True)
+class ListingChange:
+    """A change to a listing's tracked metrics, as published to subscribers"""
+    listing_id: str
+    listing_url: str
+    source_platform: str
+    observed_at: str
+    changes: Dict[str, Tuple[Any, Any]]
+
+    @property
+    def price_change(self) -> Optional[int]:
+        old, new = self.changes.get('asking_price', (None, None))
+        if old is None or new is None:
+            return None
+        return new - old
+
+    @property
+    def price_dropped(self) -> bool:
+        return (self.price_change or 0) < 0
+
+
+def metric_changes(changes: Dict[str, Any], stored_row: Dict[str, Any]) -> Dict[str, Tuple[Any, Any]]:
+    """(old, new) for each tracked metric among a listing's changed columns"""
+    return {
+        metric: (stored_row.get(metric), changes[metric])
+        for metric in TRACKED_METRICS
+        if metric in changes
+    }
+
+
+def snapshot_row(change: ListingChange, current_row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The compact listing_snapshots row for a change: every tracked metric's new value, plus
+    the previous value of each. price_change is derived by the database.
+    """
+    row = {
+        'listing_id': change.listing_id,
+        'source_platform': change.source_platform,
+        'observed_at': change.observed_at
+    }
+    for metric in TRACKED_METRICS:
+        old, new = change.changes.get(metric, (current_row.get(metric), current_row.get(metric)))
+        row[metric] = new
+        row[f'previous_{metric}'] = old
+    return row
@@ -0,0 +1,189 @@
+import json
+import hashlib
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
+
+from .keyword_query import term_frequencies
+
+Highlights = Union[Dict[str, Any], List[Any]]
+FinancialDetails = Dict[str, Any]
+BusinessDetails = Dict[str, Any]
+RawData = Dict[str, Any]
+
+# Nested fields that live as JSON text in the listings table
+JSON_FIELDS = ('business_highlights', 'financial_details', 'business_details', 'raw_data')
+
+# Columns derived from the listing text, written as JSON objects into jsonb columns
+DERIVED_JSON_COLUMNS = ('term_frequencies',)
+
+# Bookkeeping columns that do not count as a change to the listing itself
+UNTRACKED_COLUMNS = frozenset({'id', 'first_seen_at', 'last_seen_at', 'created_at', 'raw_data'})
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Listing):
+        return value.to_dict()
+    return str(value)
+
+
+def dumps(value: Any) -> str:
+    """Serialize to JSON text with orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default).decode()
+    return json.dumps(value, default=_default)
+
+
+def fingerprint(row: Dict[str, Any]) -> str:
+    """Stable hash of a listing row's content, used to skip writes when nothing changed"""
+    content = {key: value for key, value in row.items() if key not in UNTRACKED_COLUMNS}
+    if orjson is not None:
+        text = orjson.dumps(content, option=orjson.OPT_SORT_KEYS, default=str)
+    else:
+        text = json.dumps(content, sort_keys=True, default=str).encode()
+    return hashlib.sha256(text).hexdigest()
+
+
+def changed_columns(new_row: Dict[str, Any], stored_row: Dict[str, Any]) -> Dict[str, Any]:
+    """The columns of new_row whose values differ from the stored row"""
+    changes = {}
+    for column, value in new_row.items():
+        if column in UNTRACKED_COLUMNS or column == 'content_hash':
+            continue
+        stored = stored_row.get(column)
+        if column in JSON_FIELDS + DERIVED_JSON_COLUMNS and isinstance(value, str) and not isinstance(stored, str):
+            # jsonb columns come back parsed
+            if _loads_if_text(value, None) == stored:
+                continue
+        elif value == stored:
+            continue
+        changes[column] = value
+    return changes
+
+
+def _loads_if_text(value: Any, default: Any) -> Any:
+    """Accept nested fields that were already serialized by older code paths"""
+    if value is None:
+        return default
+    if isinstance(value, (str, bytes)):
+        try:
+            return orjson.loads(value) if orjson is not None else json.loads(value)
+        except ValueError:
+            return default
+    return value
+
+
+@dataclass(slots=True)
+class Listing:
+    """
+    A scraped listing as it moves through the pipeline. Nested details stay as
+    Python objects until `to_row()` serializes them once for the database.
+    Supports dict-style access so existing `listing.get('title')` callers keep working.
+    """
+    title: str = ''
+    listing_url: str = ''
+    source_platform: str = ''
+    asking_price: int = 0
+    revenue: int = 0
+    ebitda: int = 0
+    industry: str = ''
+    location: str = 'United States'
+    description: str = ''
+    full_description: str = ''
+    business_highlights: Highlights = field(default_factory=dict)
+    financial_details: FinancialDetails = field(default_factory=dict)
+    business_details: BusinessDetails = field(default_factory=dict)
+    raw_data: RawData = field(default_factory=dict)
+    status: str = 'active'
+    id: Optional[str] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Listing':
+        """Build a Listing from a scraper dict; unknown keys are kept in `extra`"""
+        if isinstance(data, Listing):
+            return data
+        known = {}
+        extra = {}
+        for key, value in data.items():
+            if key in _FIELD_NAMES:
+                known[key] = value
+            else:
+                extra[key] = value
+        for key in JSON_FIELDS:
+            if key in known:
+                known[key] = _loads_if_text(known[key], {})
+        for key in ('asking_price', 'revenue', 'ebitda'):
+            if known.get(key) is None:
+                known[key] = 0
+        listing = cls(**known)
+        listing.extra = extra
+        return listing
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict with nested fields as Python objects (for logging and raw_data)"""
+        data = {name: getattr(self, name) for name in _FIELD_NAMES if name != 'extra'}
+        if data['id'] is None:
+            del data['id']
+        data.update(self.extra)
+        return data
+
+    def to_row(self, include_raw_data: bool = True) -> Dict[str, Any]:
+        """Columns for the listings table, serializing the nested fields exactly once"""
+        row = {
+            'title': self.title,
+            'listing_url': self.listing_url,
+            'source_platform': self.source_platform,
+            'asking_price': self.asking_price or 0,
+            'revenue': self.revenue or 0,
+            'ebitda': self.ebitda or 0,
+            'industry': self.industry,
+            'location': self.location or 'United States',
+            'description': self.full_description or self.description,
+            'business_highlights': dumps(self.business_highlights),
+            'financial_details': dumps(self.financial_details),
+            'business_details': dumps(self.business_details),
+            'status': self.status or 'active'
+        }
+        # Word counts per text field, precomputed here so rankers never rescan the text.
+        # Left as a dict: JSON text sent to a jsonb column is stored as a JSON string
+        row['term_frequencies'] = term_frequencies(row)
+        if include_raw_data:
+            row['raw_data'] = dumps(self.raw_data)
+        return row
+
+    # Mapping-style access for code that still treats listings as dicts
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _FIELD_NAMES:
+            return getattr(self, key)
+        return self.extra[key]
+
+    def __setitem__(self, key: str, value: Any):
+        if key in _FIELD_NAMES:
+            setattr(self, key, value)
+        else:
+            self.extra[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        return key in _FIELD_NAMES or key in self.extra
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+    def keys(self) -> List[str]:
+        return list(self.to_dict().keys())
+
+
+_FIELD_NAMES = frozenset(f.name for f in fields(Listing))
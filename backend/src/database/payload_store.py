@@ -0,0 +1,107 @@
+import hashlib
+import zlib
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from postgrest.types import ReturnMethod
+
+from .listing_record import dumps
+
+try:
+    import orjson as _json
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    import json as _json
+
+PAYLOAD_TABLE = 'listing_payloads'
+
+# Encodings understood by decode_payload. 'identity' rows come from the SQL backfill
+# of existing listings.raw_data, which cannot compress inside Postgres.
+ZLIB = 'zlib'
+IDENTITY = 'identity'
+
+COMPRESSION_LEVEL = 6
+
+
+def payload_hash(raw_data: Any) -> Optional[str]:
+    """The key a payload is stored under, without compressing it"""
+    if not raw_data:
+        return None
+    return hashlib.sha256(dumps(raw_data).encode()).hexdigest()
+
+
+def encode_payload(raw_data: Any) -> Tuple[str, bytes, int]:
+    """Serialize and compress a payload; returns (sha256 of the JSON text, compressed bytes, raw size)"""
+    text = dumps(raw_data).encode()
+    return hashlib.sha256(text).hexdigest(), zlib.compress(text, COMPRESSION_LEVEL), len(text)
+
+
+def decode_payload(data: bytes, encoding: str = ZLIB) -> Any:
+    if encoding == ZLIB:
+        data = zlib.decompress(data)
+    elif encoding != IDENTITY:
+        raise ValueError(f"Unknown payload encoding: {encoding}")
+    return _json.loads(data)
+
+
+def _to_bytea(data: bytes) -> str:
+    """PostgREST takes bytea values as hex literals"""
+    return '\\x' + data.hex()
+
+
+def _from_bytea(value: str) -> bytes:
+    if value.startswith('\\x'):
+        return bytes.fromhex(value[2:])
+    return value.encode()
+
+
+class PayloadStore:
+    """
+    Content-addressed store for bulky listing payloads (raw HTML, AgentQL dumps).
+    Payloads live compressed in `listing_payloads` keyed by the hash of their JSON
+    text; `listings.raw_data_hash` points at them, so listing queries never carry
+    the blobs and identical payloads are stored once.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def put(self, raw_data: Any) -> Optional[str]:
+        """Store a payload if it is not already present and return its hash"""
+        if not raw_data:
+            return None
+        payload_hash, compressed, raw_size = encode_payload(raw_data)
+        self.client.table(PAYLOAD_TABLE).upsert({
+            'hash': payload_hash,
+            'encoding': ZLIB,
+            'payload': _to_bytea(compressed),
+            'raw_bytes': raw_size,
+            'stored_bytes': len(compressed)
+        }, ignore_duplicates=True, returning=ReturnMethod.minimal).execute()
+        return payload_hash
+
+    def get(self, payload_hash: str) -> Optional[Any]:
+        """Load and decompress one payload, or None if the hash is unknown"""
+        if not payload_hash:
+            return None
+        result = self.client.table(PAYLOAD_TABLE)\
+            .select('encoding,payload')\
+            .eq('hash', payload_hash)\
+            .limit(1)\
+            .execute()
+        if not result.data:
+            return None
+        row = result.data[0]
+        return decode_payload(_from_bytea(row['payload']), row['encoding'])
+
+    def get_many(self, payload_hashes: Iterable[str]) -> Dict[str, Any]:
+        """Load several payloads in one round trip, keyed by hash"""
+        hashes = sorted({h for h in payload_hashes if h})
+        if not hashes:
+            return {}
+        result = self.client.table(PAYLOAD_TABLE)\
+            .select('hash,encoding,payload')\
+            .in_('hash', hashes)\
+            .execute()
+        return {
+            row['hash']: decode_payload(_from_bytea(row['payload']), row['encoding'])
+            for row in result.data or []
+        }
@@ -0,0 +1,701 @@
+import os
+import re
+import json
+import uuid
+import sqlite3
+import threading
+from datetime import datetime, timedelta, UTC
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+from .listing_record import DERIVED_JSON_COLUMNS, Listing, fingerprint, changed_columns
+from .payload_store import encode_payload, decode_payload, payload_hash, ZLIB
+from .listing_history import SNAPSHOT_TABLE
+from .keyword_query import KeywordQuery
+from .storage import StorageBackend, Filter, KEYSET_FILTERS, ListingCursor
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    email TEXT,
+    created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS alerts (
+    id TEXT PRIMARY KEY,
+    user_id TEXT REFERENCES users(id) ON DELETE CASCADE,
+    name TEXT,
+    industries TEXT,
+    min_price INTEGER,
+    max_price INTEGER,
+    min_business_age INTEGER,
+    max_business_age INTEGER,
+    min_employees INTEGER,
+    max_employees INTEGER,
+    min_annual_revenue INTEGER,
+    max_annual_revenue INTEGER,
+    min_ebitda INTEGER,
+    max_ebitda INTEGER,
+    min_profit_margin REAL,
+    max_profit_margin REAL,
+    min_selling_multiple REAL,
+    max_selling_multiple REAL,
+    preferred_business_models TEXT,
+    newsletter_frequency TEXT DEFAULT 'daily',
+    last_notification_sent TEXT,
+    listing_cursor_created_at TEXT,
+    listing_cursor_id TEXT,
+    search_keywords TEXT,
+    search_match_type TEXT DEFAULT 'any',
+    search_in TEXT,
+    exclude_keywords TEXT,
+    created_at TEXT,
+    updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_user_id ON alerts(user_id);
+-- Compiled alert criteria are cached by updated_at, so it changes with any criterion
+CREATE TRIGGER IF NOT EXISTS alerts_set_updated_at
+AFTER UPDATE OF name, industries, min_price, max_price, min_business_age, max_business_age,
+    min_employees, max_employees, min_annual_revenue, max_annual_revenue, min_ebitda, max_ebitda,
+    min_profit_margin, max_profit_margin, min_selling_multiple, max_selling_multiple,
+    preferred_business_models, newsletter_frequency, search_keywords, search_match_type,
+    search_in, exclude_keywords ON alerts
+BEGIN
+    UPDATE alerts SET updated_at = strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now') WHERE id = NEW.id;
+END;
+
+CREATE TABLE IF NOT EXISTS listing_payloads (
+    hash TEXT PRIMARY KEY,
+    encoding TEXT NOT NULL DEFAULT 'zlib',
+    payload BLOB NOT NULL,
+    raw_bytes INTEGER,
+    stored_bytes INTEGER,
+    created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS listings (
+    id TEXT PRIMARY KEY,
+    title TEXT,
+    listing_url TEXT NOT NULL,
+    source_platform TEXT,
+    asking_price INTEGER,
+    revenue INTEGER,
+    ebitda INTEGER,
+    industry TEXT,
+    location TEXT,
+    description TEXT,
+    business_highlights TEXT,
+    financial_details TEXT,
+    business_details TEXT,
+    raw_data TEXT,
+    raw_data_hash TEXT REFERENCES listing_payloads(hash),
+    content_hash TEXT,
+    term_frequencies TEXT,
+    status TEXT DEFAULT 'active',
+    business_age INTEGER,
+    number_of_employees INTEGER,
+    business_model TEXT,
+    profit_margin REAL GENERATED ALWAYS AS (
+        CASE WHEN revenue > 0 THEN ebitda * 100.0 / revenue END
+    ) VIRTUAL,
+    selling_multiple REAL GENERATED ALWAYS AS (
+        CASE WHEN ebitda > 0 THEN asking_price * 1.0 / ebitda END
+    ) VIRTUAL,
+    first_seen_at TEXT,
+    last_seen_at TEXT,
+    created_at TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_listings_listing_url ON listings(listing_url);
+CREATE INDEX IF NOT EXISTS idx_listings_active_created_at ON listings(created_at) WHERE status IN ('active', 'pending');
+CREATE INDEX IF NOT EXISTS idx_listings_active_industry_created_at
+    ON listings(industry, created_at) WHERE status IN ('active', 'pending');
+CREATE INDEX IF NOT EXISTS idx_listings_active_platform_last_seen
+    ON listings(source_platform, last_seen_at) WHERE status IN ('active', 'pending');
+
+CREATE TABLE IF NOT EXISTS listing_snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    listing_id TEXT NOT NULL REFERENCES listings(id) ON DELETE CASCADE,
+    source_platform TEXT,
+    observed_at TEXT NOT NULL,
+    asking_price INTEGER,
+    revenue INTEGER,
+    ebitda INTEGER,
+    previous_asking_price INTEGER,
+    previous_revenue INTEGER,
+    previous_ebitda INTEGER,
+    price_change INTEGER GENERATED ALWAYS AS (asking_price - previous_asking_price) VIRTUAL
+);
+CREATE INDEX IF NOT EXISTS idx_listing_snapshots_listing ON listing_snapshots(listing_id, observed_at);
+CREATE INDEX IF NOT EXISTS idx_listing_snapshots_price_drops
+    ON listing_snapshots(observed_at) WHERE price_change < 0;
+
+-- Stand-in for the newsletter_candidates materialized view, rebuilt by
+-- refresh_newsletter_candidates
+CREATE TABLE IF NOT EXISTS newsletter_candidates (
+    id TEXT PRIMARY KEY,
+    title TEXT,
+    listing_url TEXT,
+    source_platform TEXT,
+    asking_price INTEGER,
+    revenue INTEGER,
+    ebitda INTEGER,
+    profit_margin REAL,
+    selling_multiple REAL,
+    industry TEXT,
+    location TEXT,
+    description TEXT,
+    business_age INTEGER,
+    number_of_employees INTEGER,
+    created_at TEXT,
+    search_title TEXT,
+    search_description TEXT,
+    search_location TEXT,
+    term_frequencies TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_newsletter_candidates_created_at ON newsletter_candidates(created_at);
+CREATE INDEX IF NOT EXISTS idx_newsletter_candidates_industry_created_at
+    ON newsletter_candidates(industry, created_at);
+-- Keyword search over the candidates, standing in for the Postgres search_vector
+CREATE VIRTUAL TABLE IF NOT EXISTS newsletter_candidates_fts USING fts5(
+    search_title, search_description, search_location,
+    content='newsletter_candidates', tokenize='porter unicode61'
+);
+
+CREATE TABLE IF NOT EXISTS alert_matches (
+    alert_id TEXT NOT NULL REFERENCES alerts(id) ON DELETE CASCADE,
+    listing_id TEXT NOT NULL REFERENCES listings(id) ON DELETE CASCADE,
+    exact INTEGER NOT NULL DEFAULT 0,
+    score INTEGER NOT NULL DEFAULT 0,
+    matched_at TEXT NOT NULL,
+    sent_at TEXT,
+    PRIMARY KEY (alert_id, listing_id)
+);
+CREATE INDEX IF NOT EXISTS idx_alert_matches_pending
+    ON alert_matches(alert_id, matched_at) WHERE sent_at IS NULL;
+
+CREATE TABLE IF NOT EXISTS scraper_runs (
+    id TEXT PRIMARY KEY,
+    source_platform TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT NOT NULL,
+    listings_seen INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scraper_runs_succeeded
+    ON scraper_runs(source_platform, started_at) WHERE status = 'succeeded';
+
+CREATE TABLE IF NOT EXISTS newsletter_logs (
+    id TEXT PRIMARY KEY,
+    user_id TEXT,
+    alert_id TEXT REFERENCES alerts(id) ON DELETE CASCADE,
+    status TEXT,
+    scheduled_for TEXT,
+    sent_at TEXT,
+    error_message TEXT,
+    created_at TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_newsletter_logs_pending ON newsletter_logs(status, scheduled_for);
+CREATE INDEX IF NOT EXISTS idx_newsletter_logs_alert_id ON newsletter_logs(alert_id);
+
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id TEXT PRIMARY KEY,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    params TEXT NOT NULL,
+    context TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TEXT NOT NULL,
+    email_id TEXT,
+    error_message TEXT,
+    batch_key TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    sent_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_email_outbox_due
+    ON email_outbox(next_attempt_at, batch_key, created_at, idempotency_key) WHERE status IN ('pending', 'sending');
+"""
+
+# Array and jsonb columns kept as JSON text, decoded on read like PostgREST returns them
+JSON_COLUMNS = {
+    'alerts': ('industries', 'preferred_business_models', 'search_keywords', 'search_in', 'exclude_keywords'),
+    'listings': DERIVED_JSON_COLUMNS,
+    'newsletter_candidates': ('term_frequencies',),
+    'email_outbox': ('params', 'context'),
+}
+
+OPERATORS = {'eq': '=', 'neq': '!=', 'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<='}
+IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def _identifier(name: str) -> str:
+    if not IDENTIFIER.match(name):
+        raise ValueError(f"Invalid column name: {name}")
+    return name
+
+
+def _columns_sql(columns: str) -> str:
+    if columns.strip() == '*':
+        return '*'
+    return ', '.join(_identifier(name.strip()) for name in columns.split(','))
+
+
+def _where_sql(filters: Sequence[Filter]):
+    clauses, params = [], []
+    for method, column, value in filters:
+        column = _identifier(column)
+        if method in OPERATORS:
+            clauses.append(f"{column} {OPERATORS[method]} ?")
+            params.append(value)
+        elif method == 'in_':
+            values = list(value)
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})" if values else '0')
+            params.extend(values)
+        elif method in KEYSET_FILTERS:
+            created_at, row_id = value
+            clauses.append(f"({column}, id) {KEYSET_FILTERS[method]} (?, ?)")
+            params.extend([created_at, row_id])
+        elif method == 'is_':
+            if str(value).lower() != 'null':
+                raise ValueError(f"Unsupported is_ value: {value}")
+            clauses.append(f"{column} IS NULL")
+        else:
+            raise ValueError(f"Unsupported filter method: {method}")
+    return clauses, params
+
+
+def _now() -> str:
+    return datetime.now(UTC).isoformat()
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Embedded StorageBackend for development and local benchmarks. Mirrors the Supabase
+    tables, indexes and column semantics closely enough that NewsletterService and
+    SchedulerService run unchanged, without network round trips in the measurements.
+    """
+
+    def __init__(self, path: str = ':memory:'):
+        super().__init__(None if path == ':memory:' else os.path.abspath(path))
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        print(f"SQLite storage initialized at {path}")
+
+    # Helpers
+
+    def _rows(self, table: str, sql: str, params: Sequence[Any] = ()) -> List[Dict]:
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        json_columns = JSON_COLUMNS.get(table, ())
+        result = []
+        for row in rows:
+            item = dict(row)
+            for column in json_columns:
+                if isinstance(item.get(column), str):
+                    item[column] = json.loads(item[column])
+            result.append(item)
+        return result
+
+    def _write(self, sql: str, params: Sequence[Any] = ()):
+        with self._lock:
+            cursor = self.conn.execute(sql, params)
+            self.conn.commit()
+        return cursor
+
+    def insert_many(self, table: str, rows: List[Dict]):
+        """Bulk-insert rows (used to seed development data and benchmarks)"""
+        if not rows:
+            return
+        json_columns = JSON_COLUMNS.get(table, ())
+        columns = list(rows[0].keys())
+        placeholders = ', '.join('?' * len(columns))
+        values = [
+            [json.dumps(row.get(c)) if c in json_columns and row.get(c) is not None else row.get(c) for c in columns]
+            for row in rows
+        ]
+        with self._lock:
+            self.conn.executemany(
+                f"INSERT INTO {_identifier(table)} ({', '.join(map(_identifier, columns))}) VALUES ({placeholders})",
+                values
+            )
+            self.conn.commit()
+
+    # Generic reads
+
+    def stream_rows(self, table: str, columns: str = '*', filters: Sequence[Filter] = (),
+                    page_size: int = StorageBackend.DEFAULT_PAGE_SIZE, cursor_column: str = 'created_at',
+                    descending: bool = False) -> Iterator[Dict]:
+        """Yield every matching row lazily, paging by (cursor_column, id) like SupabaseClient"""
+        table, cursor_column = _identifier(table), _identifier(cursor_column)
+        select_columns = _columns_sql(columns)
+        if select_columns != '*':
+            names = [name.strip() for name in select_columns.split(',')]
+            select_columns = ', '.join(names + [c for c in (cursor_column, 'id') if c not in names])
+
+        clauses, params = _where_sql(filters)
+        clauses.append(f"{cursor_column} IS NOT NULL")
+        direction = 'DESC' if descending else 'ASC'
+        op = '<' if descending else '>'
+        cursor = None
+
+        while True:
+            page_clauses, page_params = list(clauses), list(params)
+            if cursor is not None:
+                page_clauses.append(f"({cursor_column}, id) {op} (?, ?)")
+                page_params.extend(cursor)
+            rows = self._rows(
+                table,
+                f"SELECT {select_columns} FROM {table} WHERE {' AND '.join(page_clauses)} "
+                f"ORDER BY {cursor_column} {direction}, id {direction} LIMIT ?",
+                page_params + [page_size]
+            )
+            yield from rows
+
+            if len(rows) < page_size:
+                return
+            cursor = (rows[-1][cursor_column], rows[-1]['id'])
+
+    # Listings
+
+    def store_listing(self, listing_data: Union[Listing, Dict]) -> str:
+        """Store a listing in the database, writing only columns that changed"""
+        listing = Listing.from_dict(listing_data)
+        storage_data = listing.to_row(include_raw_data=False)
+        storage_data['raw_data_hash'] = payload_hash(listing.raw_data)
+        storage_data['content_hash'] = fingerprint(storage_data)
+
+        existing = self._rows('listings', "SELECT id, content_hash FROM listings WHERE listing_url = ?",
+                              [listing.listing_url])
+        if existing:
+            listing_id = existing[0]['id']
+            if existing[0]['content_hash'] == storage_data['content_hash']:
+                self._mark_seen([(listing_id, listing.source_platform)])
+                print(f"Listing unchanged, marked as seen: {listing_id}")
+                return listing_id
+
+            stored = self._rows('listings', f"SELECT {_columns_sql(','.join(storage_data))} FROM listings WHERE id = ?",
+                                [listing_id])
+            changes = changed_columns(storage_data, stored[0])
+            if 'raw_data_hash' in changes:
+                self._put_payload(listing.raw_data)
+            seen_at = _now()
+            self._record_changes(listing_id, storage_data, changes, stored[0], seen_at)
+            changes['content_hash'] = storage_data['content_hash']
+            changes['last_seen_at'] = seen_at
+            assignments = ', '.join(f"{_identifier(column)} = ?" for column in changes)
+            values = [json.dumps(value) if column in DERIVED_JSON_COLUMNS else value
+                      for column, value in changes.items()]
+            self._write(f"UPDATE listings SET {assignments} WHERE id = ?", values + [listing_id])
+            self._mark_seen([(listing_id, listing.source_platform)], touch=False)
+            print(f"Updated {len(changes) - 2} changed columns of listing {listing_id}")
+            return listing_id
+
+        self._put_payload(listing.raw_data)
+        listing_id = str(uuid.uuid4())
+        storage_data.update({'id': listing_id, 'raw_data': None, 'created_at': _now(),
+                             'first_seen_at': _now(), 'last_seen_at': _now()})
+        self.insert_many('listings', [storage_data])
+        self._mark_seen([(listing_id, listing.source_platform)], touch=False)
+        print(f"Inserted new listing with ID: {listing_id}")
+        self._publish_new_listing(listing_id, storage_data)
+        return listing_id
+
+    def _touch_listings(self, listing_ids: List[str], seen_at: str):
+        for start in range(0, len(listing_ids), 500):
+            clauses, params = _where_sql([('in_', 'id', listing_ids[start:start + 500])])
+            self._write(
+                "UPDATE listings SET last_seen_at = ?, "
+                f"status = CASE WHEN status = 'inactive' THEN 'active' ELSE status END WHERE {clauses[0]}",
+                [seen_at] + params
+            )
+
+    def _insert_snapshot(self, snapshot: Dict):
+        self.insert_many(SNAPSHOT_TABLE, [snapshot])
+
+    def _put_payload(self, raw_data: Any) -> Optional[str]:
+        if not raw_data:
+            return None
+        payload_hash, compressed, raw_size = encode_payload(raw_data)
+        self._write(
+            "INSERT OR IGNORE INTO listing_payloads (hash, encoding, payload, raw_bytes, stored_bytes, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [payload_hash, ZLIB, compressed, raw_size, len(compressed), _now()]
+        )
+        return payload_hash
+
+    def get_existing_listing_urls(self, urls: List[str]) -> List[str]:
+        """Check which URLs already exist in the database"""
+        urls = list(dict.fromkeys(urls))
+        rows = []
+        # Stay below SQLite's bound-parameter limit
+        for start in range(0, len(urls), 500):
+            clauses, params = _where_sql([('in_', 'listing_url', urls[start:start + 500])])
+            rows.extend(self._rows('listings', f"SELECT id, listing_url, source_platform FROM listings WHERE {clauses[0]}", params))
+        self._mark_seen((row['id'], row['source_platform']) for row in rows)
+        return [row['listing_url'] for row in rows]
+
+    def get_listing_raw_data(self, listing_id: str) -> Optional[Dict]:
+        """Load a listing's raw scraped payload on demand"""
+        rows = self._rows(
+            'listing_payloads',
+            "SELECT p.encoding, p.payload FROM listings l JOIN listing_payloads p ON p.hash = l.raw_data_hash "
+            "WHERE l.id = ?",
+            [listing_id]
+        )
+        return decode_payload(rows[0]['payload'], rows[0]['encoding']) if rows else None
+
+    # Listing lifecycle
+
+    def record_scraper_run(self, source_platform: str, started_at: datetime, listings_seen: int,
+                           succeeded: bool = True):
+        self.insert_many('scraper_runs', [{
+            'id': str(uuid.uuid4()),
+            'source_platform': source_platform,
+            'started_at': started_at.isoformat(),
+            'finished_at': _now(),
+            'listings_seen': listings_seen,
+            'status': 'succeeded' if succeeded else 'failed'
+        }])
+
+    def sweep_stale_listings(self, missed_runs: int) -> Dict[str, int]:
+        # Same statement as the Postgres sweep_stale_listings function: the cutoff is the
+        # start of the platform's missed_runs-th most recent successful run
+        with self._lock:
+            rows = self.conn.execute(
+                "UPDATE listings SET status = 'inactive', content_hash = NULL "
+                "WHERE status IN ('active', 'pending') AND COALESCE(last_seen_at, created_at) < ("
+                "    SELECT r.started_at FROM scraper_runs r"
+                "    WHERE r.source_platform = listings.source_platform AND r.status = 'succeeded'"
+                "    ORDER BY r.started_at DESC LIMIT 1 OFFSET ?"
+                ") RETURNING source_platform",
+                [missed_runs - 1]
+            ).fetchall()
+            self.conn.commit()
+        swept = {}
+        for (platform,) in rows:
+            swept[platform] = swept.get(platform, 0) + 1
+        return swept
+
+    def refresh_newsletter_candidates(self):
+        cutoff = (datetime.now(UTC) - timedelta(days=self.CANDIDATE_WINDOW_DAYS)).isoformat()
+        with self._lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM newsletter_candidates")
+                self.conn.execute(
+                    "INSERT INTO newsletter_candidates "
+                    "SELECT id, title, listing_url, source_platform, asking_price, revenue, ebitda, profit_margin, "
+                    "selling_multiple, COALESCE(NULLIF(trim(industry), ''), 'Other'), location, description, "
+                    "business_age, number_of_employees, created_at, lower(COALESCE(title, '')), lower(COALESCE(description, '')), "
+                    "lower(COALESCE(location, '')), term_frequencies "
+                    "FROM listings WHERE status IN ('active', 'pending') AND created_at > ?",
+                    [cutoff]
+                )
+                self.conn.execute("INSERT INTO newsletter_candidates_fts(newsletter_candidates_fts) VALUES('rebuild')")
+
+    def search_candidates(self, columns: str, filters: Sequence[Filter], query: KeywordQuery,
+                          matching: bool = True, limit: Optional[int] = 10) -> List[Dict]:
+        # FTS5 stands in for the tsvector search; bm25 weights mirror the A/B/C field weights
+        matches = "SELECT rowid FROM newsletter_candidates_fts WHERE newsletter_candidates_fts MATCH ?"
+        clauses, params = _where_sql(filters)
+        exclude = query.exclude_fts5()
+        if exclude:
+            clauses.append(f"newsletter_candidates.rowid NOT IN ({matches})")
+            params.append(exclude)
+
+        if matching:
+            source = (
+                "newsletter_candidates JOIN ("
+                "    SELECT rowid AS fts_rowid, bm25(newsletter_candidates_fts, 4.0, 2.0, 1.0) AS search_rank"
+                "    FROM newsletter_candidates_fts WHERE newsletter_candidates_fts MATCH ?"
+                ") m ON m.fts_rowid = newsletter_candidates.rowid"
+            )
+            order = "m.search_rank, created_at DESC, id DESC"
+            # The join's MATCH comes before the WHERE parameters
+            params.insert(0, query.to_fts5())
+        else:
+            source = "newsletter_candidates"
+            clauses.append(f"newsletter_candidates.rowid NOT IN ({matches})")
+            order = "created_at DESC, id DESC"
+            params.append(query.to_fts5())
+        where = ' AND '.join(clauses) or '1'
+        # A negative LIMIT is no limit
+        return self._rows(
+            self.NEWSLETTER_CANDIDATES,
+            f"SELECT {_columns_sql(columns)} FROM {source} WHERE {where} ORDER BY {order} LIMIT ?",
+            params + [limit if limit is not None else -1]
+        )
+
+    # Pending alert matches
+
+    def add_alert_matches(self, matches: List[Dict]):
+        rows = [[m['alert_id'], m['listing_id'], int(bool(m.get('exact'))), m.get('score', 0), _now()]
+                for m in matches]
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO alert_matches (alert_id, listing_id, exact, score, matched_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self.conn.commit()
+
+    def get_pending_alert_matches(self, alert_id: str,
+                                  columns: str = StorageBackend.LISTING_MATCH_COLUMNS) -> List[Dict]:
+        listing_columns = ', '.join(f"l.{name.strip()}" for name in _columns_sql(columns).split(','))
+        rows = self._rows(
+            'listings',
+            f"SELECT {listing_columns}, m.exact, m.score FROM alert_matches m JOIN listings l ON l.id = m.listing_id "
+            "WHERE m.alert_id = ? AND m.sent_at IS NULL AND l.status IN ('active', 'pending') "
+            "ORDER BY m.matched_at DESC, l.id DESC",
+            [alert_id]
+        )
+        for row in rows:
+            row['exact'] = bool(row['exact'])
+        return rows
+
+    def mark_alert_matches_sent(self, alert_id: str, listing_ids: List[str]):
+        for start in range(0, len(listing_ids), 500):
+            clauses, params = _where_sql([('in_', 'listing_id', listing_ids[start:start + 500])])
+            self._write(f"UPDATE alert_matches SET sent_at = ? WHERE alert_id = ? AND {clauses[0]}",
+                        [_now(), alert_id] + params)
+
+    # Users and alerts
+
+    def get_user(self, user_id: str, columns: str = StorageBackend.USER_CONTACT_COLUMNS) -> Optional[Dict]:
+        rows = self._rows('users', f"SELECT {_columns_sql(columns)} FROM users WHERE id = ?", [user_id])
+        return rows[0] if rows else None
+
+    def get_alert(self, alert_id: str) -> Optional[Dict]:
+        rows = self._rows('alerts', "SELECT * FROM alerts WHERE id = ?", [alert_id])
+        return rows[0] if rows else None
+
+    def get_user_alerts(self, user_id: str) -> List[Dict]:
+        return self._rows('alerts', "SELECT * FROM alerts WHERE user_id = ?", [user_id])
+
+    def get_alerts_with_users(self, frequency: Optional[str] = None) -> List[Dict]:
+        sql = "SELECT a.*, u.email AS _user_email FROM alerts a JOIN users u ON u.id = a.user_id"
+        params = []
+        if frequency:
+            sql += " WHERE a.newsletter_frequency = ?"
+            params.append(frequency)
+        alerts = self._rows('alerts', sql, params)
+        for alert in alerts:
+            alert['users'] = {'id': alert['user_id'], 'email': alert.pop('_user_email')}
+        return alerts
+
+    def mark_alert_notified(self, alert_id: str, sent_at: Optional[datetime] = None,
+                            cursor: Optional[ListingCursor] = None):
+        sent_at = (sent_at or datetime.now(UTC)).isoformat()
+        if cursor is None:
+            self._write("UPDATE alerts SET last_notification_sent = ? WHERE id = ?", [sent_at, alert_id])
+            return
+        # Both CASEs see the row before the update, so the cursor moves forward as a pair
+        advance = ("listing_cursor_created_at IS NULL "
+                   "OR (listing_cursor_created_at, listing_cursor_id) < (?, ?)")
+        self._write(
+            f"UPDATE alerts SET last_notification_sent = ?, "
+            f"listing_cursor_created_at = CASE WHEN {advance} THEN ? ELSE listing_cursor_created_at END, "
+            f"listing_cursor_id = CASE WHEN {advance} THEN ? ELSE listing_cursor_id END "
+            f"WHERE id = ?",
+            [sent_at, *cursor, cursor[0], *cursor, cursor[1], alert_id]
+        )
+
+    # Newsletter logs
+
+    def create_newsletter_log(self, user_id: str, scheduled_for: datetime = None, alert_id: str = None) -> str:
+        log_id = str(uuid.uuid4())
+        self.insert_many('newsletter_logs', [{
+            'id': log_id,
+            'user_id': user_id,
+            'alert_id': alert_id,
+            'status': 'pending',
+            'scheduled_for': (scheduled_for or datetime.now(UTC)).isoformat(),
+            'created_at': _now()
+        }])
+        return log_id
+
+    def get_pending_newsletters(self) -> List[Dict]:
+        return self._rows(
+            'newsletter_logs',
+            f"SELECT {_columns_sql(self.NEWSLETTER_LOG_COLUMNS)} FROM newsletter_logs "
+            "WHERE status = 'pending' AND sent_at IS NULL AND scheduled_for <= ? ORDER BY scheduled_for",
+            [_now()]
+        )
+
+    def get_newsletter_state(self, newsletter_id: str) -> Optional[Dict]:
+        rows = self._rows('newsletter_logs', "SELECT status, sent_at FROM newsletter_logs WHERE id = ?", [newsletter_id])
+        return rows[0] if rows else None
+
+    def has_pending_newsletter(self, alert_id: str) -> bool:
+        rows = self._rows(
+            'newsletter_logs',
+            "SELECT 1 FROM newsletter_logs WHERE alert_id = ? AND status = 'pending' LIMIT 1",
+            [alert_id]
+        )
+        return bool(rows)
+
+    def update_newsletter_status(self, newsletter_id: str, status: str, error_message: str = None) -> bool:
+        update_data = {'status': status, 'updated_at': _now()}
+        if error_message:
+            update_data['error_message'] = error_message
+        if status == 'sent':
+            update_data['sent_at'] = _now()
+        assignments = ', '.join(f"{column} = ?" for column in update_data)
+        self._write(f"UPDATE newsletter_logs SET {assignments} WHERE id = ?", list(update_data.values()) + [newsletter_id])
+        return True
+
+    # Email outbox
+
+    def enqueue_emails(self, emails: List[Dict]):
+        now = _now()
+        rows = [[str(uuid.uuid4()), e['idempotency_key'], json.dumps(e['params']),
+                 json.dumps(e.get('context')), now, now, now] for e in emails]
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO email_outbox "
+                "(id, idempotency_key, params, context, next_attempt_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self.conn.commit()
+
+    def claim_outbox_emails(self, limit: int, lease: timedelta) -> List[Dict]:
+        now = datetime.now(UTC)
+        with self._lock:
+            rows = self.conn.execute(
+                "UPDATE email_outbox SET status = 'sending', attempts = attempts + 1, "
+                "next_attempt_at = ?, updated_at = ? "
+                "WHERE id IN (SELECT id FROM email_outbox WHERE status IN ('pending', 'sending') "
+                "AND next_attempt_at <= ? ORDER BY next_attempt_at, batch_key, created_at, idempotency_key LIMIT ?) "
+                "RETURNING *",
+                [(now + lease).isoformat(), now.isoformat(), now.isoformat(), limit]
+            ).fetchall()
+            self.conn.commit()
+        claimed = []
+        for row in rows:
+            item = dict(row)
+            for column in JSON_COLUMNS['email_outbox']:
+                item[column] = json.loads(item[column]) if item[column] is not None else None
+            claimed.append(item)
+        # RETURNING has no defined order
+        return sorted(claimed, key=lambda row: (row['created_at'], row['idempotency_key']))
+
+    def update_outbox_email(self, outbox_id: str, status: str, email_id: str = None,
+                            error_message: str = None, next_attempt_at: datetime = None, batch_key: str = None):
+        update_data = {'status': status, 'updated_at': _now()}
+        if email_id:
+            update_data['email_id'] = email_id
+        if error_message:
+            update_data['error_message'] = error_message
+        if next_attempt_at:
+            update_data['next_attempt_at'] = next_attempt_at.isoformat()
+        if batch_key:
+            update_data['batch_key'] = batch_key
+        if status == 'sent':
+            update_data['sent_at'] = _now()
+        assignments = ', '.join(f"{column} = ?" for column in update_data)
+        self._write(f"UPDATE email_outbox SET {assignments} WHERE id = ?", list(update_data.values()) + [outbox_id])
@@ -0,0 +1,367 @@
+import os
+import atexit
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, UTC
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .listing_record import Listing
+from .keyword_query import KeywordQuery
+from .listing_history import SNAPSHOT_TABLE, SNAPSHOT_COLUMNS, ListingChange, metric_changes, snapshot_row
+
+# (method, column, value) filters, e.g. ('gte', 'asking_price', 100000). Methods are the
+# PostgREST builder names: eq, neq, gt, gte, lt, lte, in_, is_. The keyset methods
+# compare (column, id) with a (value, id) pair instead: ('after', 'created_at', (t, id))
+# keeps rows past a listing cursor, ('until', ...) rows up to and including one.
+Filter = Tuple[str, str, Any]
+
+# Keyset filter methods and their row comparison operators
+KEYSET_FILTERS = {'after': '>', 'until': '<='}
+
+# A listing's position in newest-first candidate order: (created_at, id)
+ListingCursor = Tuple[str, str]
+
+
+# A listing a scraper saw: (listing id, its source_platform)
+Sighting = Tuple[str, Optional[str]]
+
+
+class ListingSightings:
+    """
+    Listings seen during a scraper run, by source platform, and those whose last_seen_at
+    still has to be bumped: unchanged listings passed to store_listing, and known URLs the
+    scrapers skip after get_existing_listing_urls. Each scraper opens its own backend, so
+    every backend on the same database shares one buffer and the run flushes it once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._untouched: List[str] = []
+        self._by_source: Dict[str, set] = {}
+
+    def add(self, sightings: Iterable[Sighting], touch: bool = True) -> int:
+        """Record sightings, buffering them for the touch; returns how many are waiting"""
+        with self._lock:
+            for listing_id, source_platform in sightings:
+                if touch:
+                    self._untouched.append(listing_id)
+                if source_platform:
+                    self._by_source.setdefault(source_platform, set()).add(listing_id)
+            return len(self._untouched)
+
+    def take_untouched(self) -> List[str]:
+        with self._lock:
+            listing_ids, self._untouched = self._untouched, []
+        return listing_ids
+
+    def take_counts(self) -> Dict[str, int]:
+        """Distinct listings seen per source platform since the last call"""
+        with self._lock:
+            by_source, self._by_source = self._by_source, {}
+        return {source: len(listing_ids) for source, listing_ids in by_source.items()}
+
+
+# Sightings by database, shared by every backend opened on it
+_sightings: Dict[str, ListingSightings] = {}
+_sightings_lock = threading.Lock()
+
+
+def _shared_sightings(database: Optional[str]) -> ListingSightings:
+    if database is None:
+        return ListingSightings()
+    with _sightings_lock:
+        return _sightings.setdefault(database, ListingSightings())
+
+
+# Listing statuses still on the market: BusinessExits keeps a listing up as 'pending'
+# while its sale is pending. The sweeper marks listings it stops seeing 'inactive'
+LIVE_STATUSES = ('active', 'pending')
+
+
+class StorageBackend(ABC):
+    """
+    Repository interface over the listings, alerts, users and newsletter_logs tables.
+    Services and scrapers talk to this instead of PostgREST builders, so the same code
+    runs against Supabase in production and an embedded database locally.
+    """
+
+    # Named column projections, one per use case. Hot reads list only the columns they
+    # use, so raw payloads and other wide columns never cross the wire unless asked for.
+
+    # What generate_listing_html renders; the keyword scorer reads title, description
+    # and location, and results are ordered by created_at
+    LISTING_CARD_COLUMNS = (
+        'id,title,listing_url,source_platform,asking_price,revenue,ebitda,'
+        'profit_margin,selling_multiple,industry,location,description,created_at'
+    )
+    LISTING_MATCH_COLUMNS = LISTING_CARD_COLUMNS
+    # Existence checks before scraping detail pages
+    LISTING_DEDUP_COLUMNS = 'id,listing_url'
+    # Everything except the out-of-row raw payload
+    LISTING_ADMIN_COLUMNS = (
+        LISTING_CARD_COLUMNS + ',status,first_seen_at,last_seen_at,business_highlights,'
+        'financial_details,business_details,business_age,number_of_employees,business_model,raw_data_hash'
+    )
+    USER_CONTACT_COLUMNS = 'id,email'
+    NEWSLETTER_LOG_COLUMNS = 'id,user_id,alert_id,status,scheduled_for,sent_at,created_at'
+
+    # Recent active listings, materialized for newsletter matching. Covers one day more
+    # than the longest alert lookback.
+    NEWSLETTER_CANDIDATES = 'newsletter_candidates'
+    CANDIDATE_WINDOW_DAYS = 31
+
+    # Rows per request for stream_rows; well under the PostgREST max-rows cap
+    DEFAULT_PAGE_SIZE = 500
+
+    # Unchanged re-seen listings are buffered and get last_seen_at in one bulk update
+    SEEN_FLUSH_SIZE = 200
+
+    def __init__(self, database: Optional[str] = None):
+        """database identifies the underlying store, so backends on it share sightings"""
+        self.sightings = _shared_sightings(database)
+        self._change_subscribers: List[Callable[[ListingChange], None]] = []
+        self._new_listing_subscribers: List[Callable[[str, Dict], None]] = []
+        atexit.register(self.flush_seen_listings)
+
+    def _mark_seen(self, sightings: Iterable[Sighting], touch: bool = True):
+        """Count listings towards the run; touch=False for rows whose write set last_seen_at"""
+        if self.sightings.add(sightings, touch) >= self.SEEN_FLUSH_SIZE:
+            self.flush_seen_listings()
+
+    def flush_seen_listings(self) -> int:
+        """Bump last_seen_at on every buffered re-seen listing in bulk; returns how many"""
+        listing_ids = list(dict.fromkeys(self.sightings.take_untouched()))
+        if not listing_ids:
+            return 0
+        self._touch_listings(listing_ids, datetime.now(UTC).isoformat())
+        print(f"Marked {len(listing_ids)} re-seen listings as seen")
+        return len(listing_ids)
+
+    @abstractmethod
+    def _touch_listings(self, listing_ids: List[str], seen_at: str):
+        """Set last_seen_at for the given listings and reactivate any the sweep marked inactive"""
+
+    # New listings
+
+    def subscribe_new_listings(self, callback: Callable[[str, Dict], None]):
+        """Call callback(listing_id, row) for every listing inserted from now on"""
+        self._new_listing_subscribers.append(callback)
+
+    def _publish_new_listing(self, listing_id: str, row: Dict):
+        for callback in self._new_listing_subscribers:
+            try:
+                callback(listing_id, row)
+            except Exception as e:
+                print(f"Error in new listing subscriber: {e}")
+
+    # Listing history
+
+    def subscribe_listing_changes(self, callback: Callable[[ListingChange], None]):
+        """Call callback with a ListingChange whenever a stored listing's tracked metrics change"""
+        self._change_subscribers.append(callback)
+
+    def _record_changes(self, listing_id: str, row: Dict, changes: Dict, stored_row: Dict, observed_at: str):
+        """Append a listing_snapshots row and publish the change, if any tracked metric changed"""
+        metrics = metric_changes(changes, stored_row)
+        if not metrics:
+            return None
+        change = ListingChange(listing_id, row['listing_url'], row['source_platform'], observed_at, metrics)
+        self._insert_snapshot(snapshot_row(change, row))
+        for callback in self._change_subscribers:
+            try:
+                callback(change)
+            except Exception as e:
+                print(f"Error in listing change subscriber: {e}")
+        return change
+
+    @abstractmethod
+    def _insert_snapshot(self, snapshot: Dict):
+        """Append one row to listing_snapshots"""
+
+    def get_price_drops(self, since: datetime, columns: str = SNAPSHOT_COLUMNS) -> List[Dict]:
+        """Snapshots since the given time where the asking price went down, newest first"""
+        filters = [('lt', 'price_change', 0), ('gte', 'observed_at', since.isoformat())]
+        return list(self.stream_rows(SNAPSHOT_TABLE, columns, filters=filters, cursor_column='observed_at',
+                                     descending=True))
+
+    # Generic reads
+
+    @abstractmethod
+    def stream_rows(self, table: str, columns: str = '*', filters: Sequence[Filter] = (),
+                    page_size: int = DEFAULT_PAGE_SIZE, cursor_column: str = 'created_at',
+                    descending: bool = False) -> Iterator[Dict]:
+        """Yield every matching row lazily, ordered by (cursor_column, id)"""
+
+    def newest_candidate(self) -> Optional[ListingCursor]:
+        """The (created_at, id) of the newest newsletter candidate, or None if there are none"""
+        rows = self.stream_rows(self.NEWSLETTER_CANDIDATES, 'id,created_at', page_size=1, descending=True)
+        row = next(rows, None)
+        return (row['created_at'], row['id']) if row else None
+
+    # Listings
+
+    @abstractmethod
+    def store_listing(self, listing_data: Union[Listing, Dict]) -> str:
+        """Insert or update a listing by URL and return its id"""
+
+    @abstractmethod
+    def get_existing_listing_urls(self, urls: List[str]) -> List[str]:
+        """
+        Return the subset of urls already stored. Scrapers skip these, so they are
+        buffered as seen here, like an unchanged listing passed to store_listing
+        """
+
+    @abstractmethod
+    def get_listing_raw_data(self, listing_id: str) -> Optional[Dict]:
+        """Load a listing's raw scraped payload on demand"""
+
+    # Listing lifecycle
+
+    def start_scraper_run(self) -> datetime:
+        """Drop sightings left over from outside a run; returns the run's start time"""
+        self.flush_seen_listings()
+        self.sightings.take_counts()
+        return datetime.now(UTC)
+
+    def finish_scraper_run(self, started_at: datetime, failed_sources: Sequence[str] = ()) -> Dict[str, int]:
+        """
+        Write the buffered last_seen_at bumps, then record a run for every platform that saw
+        listings, counting the known ones the scrapers skipped. Returns the counts by platform.
+        """
+        self.flush_seen_listings()
+        counts = self.sightings.take_counts()
+        for source_platform, seen in counts.items():
+            self.record_scraper_run(source_platform, started_at, seen,
+                                    succeeded=source_platform not in failed_sources)
+        return counts
+
+    @abstractmethod
+    def record_scraper_run(self, source_platform: str, started_at: datetime, listings_seen: int,
+                           succeeded: bool = True):
+        """Record one platform's scraper run; only successful runs count towards staleness"""
+
+    @abstractmethod
+    def sweep_stale_listings(self, missed_runs: int) -> Dict[str, int]:
+        """
+        Mark active listings not seen in their platform's last missed_runs successful runs
+        as inactive, in one statement. Returns how many were swept per platform.
+        """
+
+    @abstractmethod
+    def refresh_newsletter_candidates(self):
+        """Rebuild newsletter_candidates from the current active listings"""
+
+    @abstractmethod
+    def search_candidates(self, columns: str, filters: Sequence[Filter], query: KeywordQuery,
+                          matching: bool = True, limit: Optional[int] = 10) -> List[Dict]:
+        """
+        Newsletter candidates passing filters whose text matches the keyword query, best
+        ranked first; with matching=False, the newest ones that don't match. Candidates
+        matching the query's exclusions are never returned. limit=None returns them all.
+        """
+
+    # Pending alert matches
+
+    @abstractmethod
+    def add_alert_matches(self, matches: List[Dict]):
+        """Add (alert_id, listing_id, exact, score) rows to the pending set; existing pairs are kept"""
+
+    @abstractmethod
+    def get_pending_alert_matches(self, alert_id: str, columns: str = LISTING_MATCH_COLUMNS) -> List[Dict]:
+        """
+        The alert's unsent matches to listings still live, newest first: the listing's
+        columns plus 'exact' and 'score'
+        """
+
+    @abstractmethod
+    def mark_alert_matches_sent(self, alert_id: str, listing_ids: List[str]):
+        """Remove listings from the alert's pending set once they have been sent"""
+
+    # Users and alerts
+
+    @abstractmethod
+    def get_user(self, user_id: str, columns: str = USER_CONTACT_COLUMNS) -> Optional[Dict]:
+        """Fetch one user"""
+
+    @abstractmethod
+    def get_alert(self, alert_id: str) -> Optional[Dict]:
+        """Fetch one alert"""
+
+    @abstractmethod
+    def get_user_alerts(self, user_id: str) -> List[Dict]:
+        """All alerts belonging to a user"""
+
+    @abstractmethod
+    def get_alerts_with_users(self, frequency: Optional[str] = None) -> List[Dict]:
+        """Alerts that have a user, each with the user's contact columns under 'users'"""
+
+    @abstractmethod
+    def mark_alert_notified(self, alert_id: str, sent_at: Optional[datetime] = None,
+                            cursor: Optional[ListingCursor] = None):
+        """
+        Set an alert's last_notification_sent and, in the same update, advance its listing
+        cursor to `cursor` if that is past the stored one. The cursor never moves back.
+        """
+
+    # Newsletter logs
+
+    @abstractmethod
+    def create_newsletter_log(self, user_id: str, scheduled_for: datetime = None, alert_id: str = None) -> str:
+        """Create a pending newsletter log entry and return its id"""
+
+    @abstractmethod
+    def get_pending_newsletters(self) -> List[Dict]:
+        """Pending, unsent newsletters that are due, oldest first"""
+
+    @abstractmethod
+    def get_newsletter_state(self, newsletter_id: str) -> Optional[Dict]:
+        """The current status and sent_at of a newsletter log"""
+
+    @abstractmethod
+    def has_pending_newsletter(self, alert_id: str) -> bool:
+        """Whether an alert already has a pending newsletter"""
+
+    @abstractmethod
+    def update_newsletter_status(self, newsletter_id: str, status: str, error_message: str = None) -> bool:
+        """Update the status of a newsletter"""
+
+    # Email outbox
+
+    @abstractmethod
+    def enqueue_emails(self, emails: List[Dict]):
+        """
+        Add (idempotency_key, params, context) rows to the email outbox as pending. An
+        email whose idempotency key is already queued is not added again.
+        """
+
+    @abstractmethod
+    def claim_outbox_emails(self, limit: int, lease: timedelta) -> List[Dict]:
+        """
+        Claim up to `limit` due outbox emails, oldest first: pending ones, and claimed ones
+        whose lease ran out without a result. Claimed emails are 'sending' with their
+        attempts counted, and due again once the lease expires.
+        """
+
+    @abstractmethod
+    def update_outbox_email(self, outbox_id: str, status: str, email_id: str = None,
+                            error_message: str = None, next_attempt_at: datetime = None, batch_key: str = None):
+        """
+        Record an outbox email's result: 'sent' with its email id, 'failed', or 'pending'
+        to retry at next_attempt_at, within the batch request batch_key if it was in one
+        """
+
+
+def get_storage_backend() -> StorageBackend:
+    """
+    The configured storage backend: Supabase by default, or an embedded SQLite database
+    when STORAGE_BACKEND=sqlite (path from SQLITE_PATH)
+    """
+    backend = os.getenv('STORAGE_BACKEND', 'supabase').lower()
+    if backend == 'sqlite':
+        from .sqlite_backend import SQLiteBackend
+        return SQLiteBackend(os.getenv('SQLITE_PATH', 'deal_aggregator.db'))
+    if backend != 'supabase':
+        raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+    from .supabase_db import SupabaseClient
+    return SupabaseClient()
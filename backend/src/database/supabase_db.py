@@ -1,57 +1,117 @@
 from supabase import create_client
 import os
-from typing import Dict, List, Optional, Tuple
-from datetime import datetime, UTC
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from datetime import datetime, timedelta, UTC
 import json
+from postgrest.types import ReturnMethod
+from .listing_record import Listing, fingerprint, changed_columns
+from .payload_store import PayloadStore, payload_hash
+from .listing_history import SNAPSHOT_TABLE
+from .keyword_query import KeywordQuery
+from .known_urls import KnownListingUrls
+from .storage import StorageBackend, Filter, KEYSET_FILTERS, LIVE_STATUSES, ListingCursor
+
+
+def _keyset_condition(method: str, column: str, value: ListingCursor) -> str:
+    """
+    A PostgREST condition for (column, id) > (value, id), or <= for 'until'. The plain
+    bound on column comes first so the (created_at, id) index serves it as a range scan.
+    """
+    created_at, row_id = value
+    if method == 'after':
+        return f'{column}.gte."{created_at}",or({column}.gt."{created_at}",id.gt."{row_id}")'
+    return f'{column}.lte."{created_at}",or({column}.lt."{created_at}",id.lte."{row_id}")'
+
+
+def _apply_filters(query, filters: Sequence[Filter]):
+    """Apply (method, column, value) filters to a PostgREST request builder"""
+    conditions = []
+    for method, column, value in filters:
+        if method in KEYSET_FILTERS:
+            conditions.append(_keyset_condition(method, column, value))
+        else:
+            query = getattr(query, method)(column, value)
+    if conditions:
+        # One 'and' parameter; stream_rows pages with its own 'or' parameter
+        query.params = query.params.add('and', f"({','.join(conditions)})")
+    return query
+
+
+class SupabaseClient(StorageBackend):
+    # Bounds for one listing_url IN (...) existence check, keeping GET URLs short
+    URL_CHECK_MAX_CHARS = 4000
+    URL_CHECK_MAX_URLS = 100
 
-class SupabaseClient:
     def __init__(self):
         url = os.environ.get("NEXT_PUBLIC_SUPABASE_URL")
         key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
         if not url or not key:
             raise ValueError("Missing Supabase credentials in environment variables")
         
+        super().__init__(url)
         self.client = create_client(url, key)
+        self.payloads = PayloadStore(self.client)
+        self.known_urls = KnownListingUrls(self)
         print("Supabase client initialized")
 
-    def store_listing(self, listing_data: Dict) -> str:
-        """Store a listing in the database"""
+    def store_listing(self, listing_data: Union[Listing, Dict]) -> str:
+        """
+        Store a listing in the database. Re-seen listings whose content is unchanged only
+        get last_seen_at bumped (batched, see flush_seen_listings); changed listings have
+        just their changed columns written.
+        """
+        storage_data = {}
         try:
+            listing = Listing.from_dict(listing_data)
+
+            # Nested details are serialized here, once. The bulky raw payload is referenced
+            # by hash and lives in the compressed payload store, not the row.
+            storage_data = listing.to_row(include_raw_data=False)
+            storage_data['raw_data_hash'] = payload_hash(listing.raw_data)
+            storage_data['content_hash'] = fingerprint(storage_data)
+
             # Check if listing already exists
-            existing = self.client.table('listings').select('id').eq('listing_url', listing_data['listing_url']).execute()
-            
-            # Prepare the data for storage
-            storage_data = {
-                'title': listing_data['title'],
-                'listing_url': listing_data['listing_url'],
-                'source_platform': listing_data.get('source_platform', ''),
-                'asking_price': listing_data.get('asking_price', 0),
-                'revenue': listing_data.get('revenue', 0),
-                'ebitda': listing_data.get('ebitda', 0),
-                'industry': listing_data.get('industry', ''),
-                'location': listing_data.get('location', 'United States'),
-                'description': listing_data.get('full_description', ''),
-                'business_highlights': listing_data.get('business_highlights', '{}'),
-                'financial_details': listing_data.get('financial_details', '{}'),
-                'business_details': listing_data.get('business_details', '{}'),
-                'raw_data': listing_data.get('raw_data', '{}'),
-                'status': listing_data.get('status', 'active'),
-                'first_seen_at': datetime.now().isoformat(),
-                'last_seen_at': datetime.now().isoformat()
-            }
+            existing = self.client.table('listings')\
+                .select('id,content_hash')\
+                .eq('listing_url', listing.listing_url)\
+                .execute()
             
             if existing.data:
-                # Update existing listing
                 listing_id = existing.data[0]['id']
-                storage_data['last_seen_at'] = datetime.now().isoformat()
-                self.client.table('listings').update(storage_data).eq('id', listing_id).execute()
-                print(f"Updated existing listing with ID: {listing_id}")
+                if existing.data[0].get('content_hash') == storage_data['content_hash']:
+                    self._mark_seen([(listing_id, listing.source_platform)])
+                    print(f"Listing unchanged, marked as seen: {listing_id}")
+                    return listing_id
+
+                # Write only the columns that differ from the stored row
+                stored = self.client.table('listings')\
+                    .select(','.join(column for column in storage_data if column != 'content_hash'))\
+                    .eq('id', listing_id)\
+                    .execute()
+                changes = changed_columns(storage_data, stored.data[0] if stored.data else {})
+                if 'raw_data_hash' in changes:
+                    self.payloads.put(listing.raw_data)
+                stored_row = stored.data[0] if stored.data else {}
+                seen_at = datetime.now(UTC).isoformat()
+                self._record_changes(listing_id, storage_data, changes, stored_row, seen_at)
+                changes['content_hash'] = storage_data['content_hash']
+                changes['last_seen_at'] = seen_at
+                self.client.table('listings').update(changes).eq('id', listing_id).execute()
+                self._mark_seen([(listing_id, listing.source_platform)], touch=False)
+                print(f"Updated {len(changes) - 2} changed columns of listing {listing_id}")
                 return listing_id
             
             # Insert new listing
+            self.payloads.put(listing.raw_data)
+            storage_data['raw_data'] = None
+            storage_data['first_seen_at'] = datetime.now(UTC).isoformat()
+            storage_data['last_seen_at'] = storage_data['first_seen_at']
             result = self.client.table('listings').insert(storage_data).execute()
             listing_id = result.data[0]['id']
+            self.known_urls.add(listing.listing_url)
+            self._mark_seen([(listing_id, listing.source_platform)], touch=False)
             print(f"Inserted new listing with ID: {listing_id}")
+            self._publish_new_listing(listing_id, storage_data)
             
             return listing_id
             
@@ -60,6 +120,156 @@ class SupabaseClient:
             print("Storage data:", json.dumps(storage_data, indent=2))
             raise
 
+    def _touch_listings(self, listing_ids: List[str], seen_at: str):
+        for start in range(0, len(listing_ids), self.URL_CHECK_MAX_URLS):
+            chunk = listing_ids[start:start + self.URL_CHECK_MAX_URLS]
+            self.client.table('listings')\
+                .update({'last_seen_at': seen_at}, returning=ReturnMethod.minimal)\
+                .in_('id', chunk)\
+                .execute()
+            # Swept listings the scrapers skipped as known are back on the market
+            self.client.table('listings')\
+                .update({'status': 'active'}, returning=ReturnMethod.minimal)\
+                .in_('id', chunk)\
+                .eq('status', 'inactive')\
+                .execute()
+
+    def _insert_snapshot(self, snapshot: Dict):
+        self.client.table(SNAPSHOT_TABLE).insert(snapshot, returning=ReturnMethod.minimal).execute()
+
+    def get_listing_raw_data(self, listing_id: str) -> Optional[Dict]:
+        """Load a listing's raw scraped payload on demand"""
+        try:
+            result = self.client.table('listings').select('raw_data_hash').eq('id', listing_id).execute()
+            if not result.data:
+                return None
+            return self.payloads.get(result.data[0]['raw_data_hash'])
+        except Exception as e:
+            print(f"Error loading raw data for listing {listing_id}: {str(e)}")
+            return None
+
+    def record_scraper_run(self, source_platform: str, started_at: datetime, listings_seen: int,
+                           succeeded: bool = True):
+        """Record one platform's scraper run; only successful runs count towards staleness"""
+        self.client.table('scraper_runs').insert({
+            'source_platform': source_platform,
+            'started_at': started_at.isoformat(),
+            'finished_at': datetime.now(UTC).isoformat(),
+            'listings_seen': listings_seen,
+            'status': 'succeeded' if succeeded else 'failed'
+        }, returning=ReturnMethod.minimal).execute()
+
+    def sweep_stale_listings(self, missed_runs: int) -> Dict[str, int]:
+        """
+        Mark listings not seen in their platform's last missed_runs successful runs as
+        inactive. The sweep_stale_listings function does it in a single UPDATE.
+        """
+        result = self.client.rpc('sweep_stale_listings', {'missed_runs': missed_runs}).execute()
+        return {row['platform']: row['swept'] for row in result.data or []}
+
+    def refresh_newsletter_candidates(self):
+        """Concurrently refresh the newsletter_candidates materialized view"""
+        self.client.rpc('refresh_newsletter_candidates', {}).execute()
+
+    def search_candidates(self, columns: str, filters: Sequence[Filter], query: KeywordQuery,
+                          matching: bool = True, limit: Optional[int] = 10) -> List[Dict]:
+        """
+        Full-text search over newsletter_candidates. The tsquery is matched and ranked by
+        the search_newsletter_candidates function; filters, order and limit apply on top.
+        Without a limit, results are read a page at a time past the server's row cap.
+        """
+        order = 'search_rank.desc,created_at.desc,id.desc' if matching else 'created_at.desc,id.desc'
+        page_size = limit if limit is not None else self.DEFAULT_PAGE_SIZE
+        rows, offset = [], 0
+        while True:
+            request = self.client.rpc('search_newsletter_candidates', {
+                'search_query': query.to_tsquery(),
+                'exclude_query': query.exclude_tsquery(),
+                'matching': matching
+            })
+            request = _apply_filters(request, filters)
+            request.params = request.params.add('select', columns).add('order', order)\
+                .add('limit', str(page_size)).add('offset', str(offset))
+            page = request.execute().data or []
+            rows.extend(page)
+            if limit is not None or len(page) < page_size:
+                return rows
+            offset += page_size
+
+    def add_alert_matches(self, matches: List[Dict]):
+        """Add rows to the pending alert match set; pairs already present are kept as they are"""
+        for start in range(0, len(matches), self.DEFAULT_PAGE_SIZE):
+            self.client.table('alert_matches').upsert(
+                matches[start:start + self.DEFAULT_PAGE_SIZE],
+                ignore_duplicates=True,
+                returning=ReturnMethod.minimal,
+                on_conflict='alert_id,listing_id'
+            ).execute()
+
+    def get_pending_alert_matches(self, alert_id: str,
+                                  columns: str = StorageBackend.LISTING_MATCH_COLUMNS) -> List[Dict]:
+        """The alert's unsent matches to still-live listings with their listing columns, newest first"""
+        result = self.client.table('alert_matches')\
+            .select(f"exact,score,listings!inner({columns})")\
+            .eq('alert_id', alert_id)\
+            .is_('sent_at', 'null')\
+            .in_('listings.status', list(LIVE_STATUSES))\
+            .order('matched_at', desc=True)\
+            .execute()
+        return [{**row['listings'], 'exact': row['exact'], 'score': row['score']} for row in result.data or []]
+
+    def mark_alert_matches_sent(self, alert_id: str, listing_ids: List[str]):
+        """Mark the alert's pending matches for these listings as sent"""
+        sent_at = datetime.now(UTC).isoformat()
+        for start in range(0, len(listing_ids), self.URL_CHECK_MAX_URLS):
+            self.client.table('alert_matches')\
+                .update({'sent_at': sent_at}, returning=ReturnMethod.minimal)\
+                .eq('alert_id', alert_id)\
+                .in_('listing_id', listing_ids[start:start + self.URL_CHECK_MAX_URLS])\
+                .execute()
+
+    def get_user(self, user_id: str, columns: str = StorageBackend.USER_CONTACT_COLUMNS) -> Optional[Dict]:
+        """Fetch one user"""
+        result = self.client.table('users').select(columns).eq('id', user_id).limit(1).execute()
+        return result.data[0] if result.data else None
+
+    def get_alert(self, alert_id: str) -> Optional[Dict]:
+        """Fetch one alert"""
+        result = self.client.table('alerts').select('*').eq('id', alert_id).limit(1).execute()
+        return result.data[0] if result.data else None
+
+    def get_user_alerts(self, user_id: str) -> List[Dict]:
+        """All alerts belonging to a user"""
+        result = self.client.table('alerts').select('*').eq('user_id', user_id).execute()
+        return result.data or []
+
+    def get_alerts_with_users(self, frequency: Optional[str] = None) -> List[Dict]:
+        """Alerts that have a user, each with the user's contact columns under 'users'"""
+        query = self.client.table('alerts').select(f"*, users!inner({self.USER_CONTACT_COLUMNS})")
+        if frequency:
+            query = query.eq('newsletter_frequency', frequency)
+        return query.execute().data or []
+
+    def mark_alert_notified(self, alert_id: str, sent_at: Optional[datetime] = None,
+                            cursor: Optional[ListingCursor] = None):
+        """
+        Set an alert's last_notification_sent. With a cursor, the mark_alert_notified
+        function also advances the alert's listing cursor in the same UPDATE.
+        """
+        sent_at = (sent_at or datetime.now(UTC)).isoformat()
+        if cursor is None:
+            self.client.table('alerts')\
+                .update({'last_notification_sent': sent_at})\
+                .eq('id', alert_id)\
+                .execute()
+            return
+        self.client.rpc('mark_alert_notified', {
+            'target_alert_id': alert_id,
+            'sent_at': sent_at,
+            'cursor_created_at': cursor[0],
+            'cursor_listing_id': cursor[1]
+        }).execute()
+
     def store_analysis(self, user_id: str, analysis_data: Dict) -> str:
         """Store analysis results"""
         try:
@@ -134,7 +344,7 @@ class SupabaseClient:
             # 2. Have not been sent yet (sent_at is null)
             # 3. Are due to be sent (scheduled_for <= now)
             result = self.client.table('newsletter_logs')\
-                .select('*')\
+                .select(self.NEWSLETTER_LOG_COLUMNS)\
                 .eq('status', 'pending')\
                 .is_('sent_at', 'null')\
                 .lte('scheduled_for', now_str)\
@@ -156,6 +366,25 @@ class SupabaseClient:
             print(f"Error getting pending newsletters: {str(e)}")
             return []
 
+    def get_newsletter_state(self, newsletter_id: str) -> Optional[Dict]:
+        """The current status and sent_at of a newsletter log"""
+        result = self.client.table('newsletter_logs')\
+            .select('status, sent_at')\
+            .eq('id', newsletter_id)\
+            .single()\
+            .execute()
+        return result.data
+
+    def has_pending_newsletter(self, alert_id: str) -> bool:
+        """Whether an alert already has a pending newsletter"""
+        result = self.client.table('newsletter_logs')\
+            .select('id')\
+            .eq('alert_id', alert_id)\
+            .eq('status', 'pending')\
+            .limit(1)\
+            .execute()
+        return bool(result.data)
+
     def update_newsletter_status(self, newsletter_id: str, status: str, error_message: str = None) -> bool:
         """Update the status of a newsletter"""
         try:
@@ -178,20 +407,131 @@ class SupabaseClient:
             print(f"Error updating newsletter status: {str(e)}")
             return False
 
+    def enqueue_emails(self, emails: List[Dict]):
+        """Insert outbox rows; keys already queued are left as they are"""
+        rows = [{'idempotency_key': e['idempotency_key'], 'params': e['params'], 'context': e.get('context')}
+                for e in emails]
+        for start in range(0, len(rows), self.DEFAULT_PAGE_SIZE):
+            self.client.table('email_outbox').upsert(
+                rows[start:start + self.DEFAULT_PAGE_SIZE],
+                ignore_duplicates=True,
+                returning=ReturnMethod.minimal,
+                on_conflict='idempotency_key'
+            ).execute()
+
+    def claim_outbox_emails(self, limit: int, lease: timedelta) -> List[Dict]:
+        """Claim due outbox emails with the claim_email_outbox function (FOR UPDATE SKIP LOCKED)"""
+        result = self.client.rpc('claim_email_outbox', {
+            'batch_size': limit,
+            'lease_seconds': int(lease.total_seconds())
+        }).execute()
+        return sorted(result.data or [], key=lambda row: (row['created_at'], row['idempotency_key']))
+
+    def update_outbox_email(self, outbox_id: str, status: str, email_id: str = None,
+                            error_message: str = None, next_attempt_at: datetime = None, batch_key: str = None):
+        """Record an outbox email's delivery result"""
+        update_data = {'status': status, 'updated_at': datetime.now(UTC).isoformat()}
+        if email_id:
+            update_data['email_id'] = email_id
+        if error_message:
+            update_data['error_message'] = error_message
+        if next_attempt_at:
+            update_data['next_attempt_at'] = next_attempt_at.isoformat()
+        if batch_key:
+            update_data['batch_key'] = batch_key
+        if status == 'sent':
+            update_data['sent_at'] = datetime.now(UTC).isoformat()
+        self.client.table('email_outbox')\
+            .update(update_data, returning=ReturnMethod.minimal)\
+            .eq('id', outbox_id)\
+            .execute()
+
+    def stream_rows(self, table: str, columns: str = '*',
+                    filters: Sequence[Filter] = (),
+                    page_size: int = StorageBackend.DEFAULT_PAGE_SIZE,
+                    cursor_column: str = 'created_at',
+                    descending: bool = False) -> Iterator[Dict]:
+        """
+        Yield every matching row of a table lazily, one page at a time.
+
+        Pages are ordered by (cursor_column, id) and each one resumes strictly after the
+        last row of the previous page (keyset pagination), so scans are never cut short
+        by the PostgREST row cap and memory stays bounded by page_size however large the
+        table grows. `filters` are (method, column, value) tuples such as
+        ('gte', 'asking_price', 100000), applied to every page. Rows whose cursor column
+        is NULL are not returned.
+        """
+        select_columns = columns
+        if columns.strip() != '*':
+            names = [name.strip() for name in columns.split(',')]
+            for required in (cursor_column, 'id'):
+                if required not in names:
+                    select_columns += f',{required}'
+
+        direction = '.desc' if descending else ''
+        op = 'lt' if descending else 'gt'
+        cursor = None
+
+        while True:
+            query = self.client.table(table).select(select_columns)
+            query = _apply_filters(query, filters)
+            if cursor is not None:
+                value, row_id = cursor
+                # (cursor_column, id) > (value, row_id), or < when descending
+                query.params = query.params.add(
+                    'or',
+                    f'({cursor_column}.{op}."{value}",'
+                    f'and({cursor_column}.eq."{value}",id.{op}."{row_id}"))'
+                )
+            query.params = query.params.add('order', f'{cursor_column}{direction},id{direction}')
+
+            rows = query.not_.is_(cursor_column, 'null').limit(page_size).execute().data or []
+            yield from rows
+
+            if len(rows) < page_size:
+                return
+            cursor = (rows[-1][cursor_column], rows[-1]['id'])
+
     def get_existing_listing_urls(self, urls: List[str]) -> List[str]:
         """Check which URLs already exist in the database"""
         try:
-            result = self.client.table('listings')\
-                .select('listing_url')\
-                .in_('listing_url', urls)\
-                .execute()
+            try:
+                candidates = self.known_urls.maybe_known(urls)
+            except Exception as e:
+                print(f"Known-URL filter unavailable, checking all URLs: {e}")
+                candidates = list(urls)
+
+            print(f"Existence check: {len(urls) - len(candidates)} of {len(urls)} URLs are definitely new")
+
+            rows = []
+            for chunk in self._url_chunks(candidates):
+                result = self.client.table('listings')\
+                    .select(self.LISTING_DEDUP_COLUMNS + ',source_platform')\
+                    .in_('listing_url', chunk)\
+                    .execute()
+                rows.extend(result.data or [])
+            self._mark_seen((row['id'], row['source_platform']) for row in rows)
             
-            return [item['listing_url'] for item in result.data]
+            return [row['listing_url'] for row in rows]
             
         except Exception as e:
             print(f"Error checking existing URLs: {e}")
             return []
 
+    def _url_chunks(self, urls: List[str]) -> Iterator[List[str]]:
+        """Split URLs into IN (...) lists bounded by count and total length"""
+        chunk, size = [], 0
+        for url in dict.fromkeys(urls):
+            # Quotes and separator PostgREST adds around each value
+            length = len(url) + 3
+            if chunk and (size + length > self.URL_CHECK_MAX_CHARS or len(chunk) >= self.URL_CHECK_MAX_URLS):
+                yield chunk
+                chunk, size = [], 0
+            chunk.append(url)
+            size += length
+        if chunk:
+            yield chunk
+
     def create_user_with_preferences(self, user_data: Dict, preferences_data: Dict) -> Tuple[str, str]:
         """Create a user and their preferences in a transaction"""
         try:
@@ -244,7 +584,7 @@ class SupabaseClient:
     def get_filtered_listings(self, min_price: float = None, max_price: float = None, industries: str = None, last_sent: datetime = None) -> List[Dict]:
         """Get listings filtered by user preferences"""
         try:
-            query = self.client.table('listings').select('*')
+            query = self.client.table('listings').select(self.LISTING_ADMIN_COLUMNS)
             
             # Apply filters
             if min_price is not None:
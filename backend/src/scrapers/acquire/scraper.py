@@ -6,15 +6,17 @@ import requests
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 from agentql import wrap
 from ..base_scraper import BaseScraper
-from backend.src.database.supabase_db import SupabaseClient
+from backend.src.database.storage import get_storage_backend
+from backend.src.database.listing_record import Listing
 from config.search_queries import BASE_URLS
+from backend.src.services.industry_classifier import classify_industry
 
 class AcquireScraper(BaseScraper):
     def __init__(self):
         super().__init__()
         self.base_url = BASE_URLS.get("acquire", "https://app.acquire.com/all-listing")
         self.login_url = "https://app.acquire.com/signin"
-        self.supabase = SupabaseClient()
+        self.supabase = get_storage_backend()
         self.login_state_path = os.path.join(os.path.dirname(__file__), 'acquire_login.json')
         self.agentql_api_url = "https://api.agentql.com/v1/query-data"
         self.headers = {
@@ -206,7 +208,7 @@ class AcquireScraper(BaseScraper):
                                         continue
                                     
                                     # Format listing for storage
-                                    formatted_listing = {
+                                    formatted_listing = Listing.from_dict({
                                         'title': item.get('listing_title', ''),
                                         'listing_url': item.get('listing_url', ''),
                                         'source_platform': 'Acquire',
@@ -217,18 +219,18 @@ class AcquireScraper(BaseScraper):
                                         'location': 'United States',  # Default for now
                                         'description': item.get('description', ''),
                                         'full_description': item.get('description', ''),  # Same as description for now
-                                        'business_highlights': json.dumps([]),  # Empty array for now
-                                        'financial_details': json.dumps({
+                                        'business_highlights': [],  # Empty array for now
+                                        'financial_details': {
                                             'revenue': self._parse_price(item.get('TTM_revenue', '0')),
                                             'ebitda': self._parse_price(item.get('TTM_profit', '0')),
                                             'asking_price': self._parse_price(item.get('asking_price', '0'))
-                                        }),
-                                        'business_details': json.dumps({
+                                        },
+                                        'business_details': {
                                             'location': 'United States',
                                             'business_age': None,
                                             'number_of_employees': None
-                                        }),
-                                        'raw_data': json.dumps(item),
+                                        },
+                                        'raw_data': item,
                                         'status': 'active',
                                         'first_seen_at': datetime.utcnow().isoformat(),
                                         'last_seen_at': datetime.utcnow().isoformat(),
@@ -239,7 +241,7 @@ class AcquireScraper(BaseScraper):
                                         'business_model': None,
                                         'profit_margin': None,
                                         'selling_multiple': None
-                                    }
+                                    })
                                     
                                     # Skip listings with zero revenue, EBITDA, or asking price
                                     if formatted_listing['revenue'] == 0 or formatted_listing['ebitda'] == 0 or formatted_listing['asking_price'] == 0:
@@ -247,7 +249,7 @@ class AcquireScraper(BaseScraper):
                                         print(f"Revenue: ${formatted_listing['revenue']:,}, EBITDA: ${formatted_listing['ebitda']:,}, Asking Price: ${formatted_listing['asking_price']:,}")
                                         continue
                                     
-                                    print(f"\nFound listing: {json.dumps(formatted_listing, indent=2)}")
+                                    print(f"\nFound listing: {json.dumps(formatted_listing.to_dict(), indent=2, default=str)}")
                                     listings.append(formatted_listing)
                                     
                                     # Store in database
@@ -302,17 +304,7 @@ class AcquireScraper(BaseScraper):
 
     def _extract_industry(self, title: str) -> str:
         """Extract industry from listing title"""
-        title = title.lower()
-        if any(term in title for term in ['saas', 'software', 'tech', 'app']):
-            return 'Software/SaaS'
-        elif any(term in title for term in ['ecommerce', 'e-commerce', 'amazon', 'shopify']):
-            return 'Ecommerce'
-        elif any(term in title for term in ['manufacturing', 'factory', 'production']):
-            return 'Manufacturing'
-        elif any(term in title for term in ['service', 'consulting', 'agency']):
-            return 'Service'
-        else:
-            return 'Other'
+        return classify_industry(title)
 
     def _do_login(self, page):
         """Helper method to perform login"""
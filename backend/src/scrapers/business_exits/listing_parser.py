@@ -3,12 +3,18 @@ from bs4 import BeautifulSoup
 import json
 from openai import OpenAI
 from config.config import OPENAI_API_KEY
-from backend.src.database.supabase_db import SupabaseClient
+from backend.src.database.storage import get_storage_backend
+from backend.src.database.listing_record import Listing
+from backend.src.services.rule_based_parser import RuleBasedListingParser, ParsePathStats
+from backend.src.services.prompt_builder import PromptBuilder, log_prompt_tokens
+from backend.src.services.industry_classifier import classify_industry
 
 class BusinessExitsListingParser:
     def __init__(self):
         self.client = OpenAI(api_key=OPENAI_API_KEY)
-        self.supabase = SupabaseClient()
+        self.supabase = get_storage_backend()
+        self.rule_parser = RuleBasedListingParser(self._extract_industry)
+        self.stats = ParsePathStats('BusinessExits')
         
     def parse_listing(self, listing_data: Dict) -> Dict:
         """Parse listing data specific to Business Exits format"""
@@ -25,15 +31,30 @@ class BusinessExitsListingParser:
             revenue = self._extract_amount(revenue_text.replace('Revenue:', '').strip())
             ebitda = self._extract_amount(income_text.replace('Income:', '').strip())
             
+            # Skip the LLM entirely when the page structure gives us everything we need
+            rule_listing, confidence = self.rule_parser.parse_business_exits(
+                listing_data, title, asking_price, revenue, ebitda
+            )
+            if rule_listing and self.rule_parser.is_confident(confidence):
+                self.stats.record('rules')
+                print(f"\n⚡ Parsed listing without LLM (confidence {confidence:.2f}): {title}")
+                return rule_listing
+            print(f"\n🤖 Low rule-based confidence ({confidence:.2f}), falling back to GPT")
+            
+            # Strip page chrome and repeated card text so the prompt stays within budget
+            listing_section = PromptBuilder(token_budget=1500)\
+                .add_field('Title', title)\
+                .add_field('Price', price_text)\
+                .add_field('Revenue', revenue_text)\
+                .add_field('Income', income_text)\
+                .add_text('Full Text', description_text)\
+                .build()
+            
             # Use GPT to parse and structure the data
             prompt = f"""
             Parse this business listing information and return a structured JSON object.
             
-            Title: {title}
-            Price: {price_text}
-            Revenue: {revenue_text}
-            Income: {income_text}
-            Full Text: {description_text}
+{listing_section}
             
             Return a JSON object with these fields:
             - full_description: A clean, well-formatted description of the business (this is very important)
@@ -55,11 +76,13 @@ class BusinessExitsListingParser:
                     ],
                     temperature=0
                 )
+                log_prompt_tokens('BusinessExitsListingParser', prompt, response)
                 
                 parsed_data = json.loads(response.choices[0].message.content)
+                self.stats.record('llm')
                 
                 # Create listing object with GPT-parsed data
-                listing = {
+                listing = Listing.from_dict({
                     'title': title,
                     'asking_price': asking_price,
                     'revenue': revenue,
@@ -70,15 +93,15 @@ class BusinessExitsListingParser:
                     'source_platform': 'BusinessExits',
                     'status': listing_data.get('status', 'active'),
                     'full_description': parsed_data['full_description'],  # Directly use the description
-                    'business_highlights': json.dumps(parsed_data.get('business_highlights', {})),
-                    'financial_details': json.dumps(parsed_data.get('financial_details', {})),
-                    'business_details': json.dumps(parsed_data.get('business_details', {})),
-                    'raw_data': json.dumps({
+                    'business_highlights': parsed_data.get('business_highlights', {}),
+                    'financial_details': parsed_data.get('financial_details', {}),
+                    'business_details': parsed_data.get('business_details', {}),
+                    'raw_data': {
                         'raw_html': listing_data.get('raw_html', ''),
                         'raw_text': listing_data.get('raw_text', ''),
                         'parsed_data': parsed_data
-                    })
-                }
+                    }
+                })
                 
                 # Debug output
                 print(f"\nSuccessfully parsed listing:")
@@ -131,17 +154,4 @@ class BusinessExitsListingParser:
 
     def _extract_industry(self, title: str) -> str:
         """Extract industry from listing title"""
-        title = title.lower()
-        
-        if any(term in title for term in ['saas', 'software', 'tech', 'app']):
-            return 'Software/SaaS'
-        elif any(term in title for term in ['ecommerce', 'e-commerce', 'amazon', 'shopify']):
-            return 'Ecommerce'
-        elif any(term in title for term in ['manufacturing', 'factory', 'production']):
-            return 'Manufacturing'
-        elif any(term in title for term in ['service', 'consulting', 'agency']):
-            return 'Service'
-        elif any(term in title for term in ['distribution', 'wholesale']):
-            return 'Wholesale/Distribution'
-        else:
-            return 'Other' 
\ No newline at end of file
+        return classify_industry(title)
\ No newline at end of file
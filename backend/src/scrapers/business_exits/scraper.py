@@ -9,7 +9,7 @@ from config.config import SCRAPER_API_KEY
 import json
 from .listing_parser import BusinessExitsListingParser
 from backend.src.services.listing_details_scraper import ListingDetailsScraper
-from backend.src.database.supabase_db import SupabaseClient
+from backend.src.database.storage import get_storage_backend
 
 class BusinessExitsScraper(BaseScraper):
     def __init__(self):
@@ -17,11 +17,12 @@ class BusinessExitsScraper(BaseScraper):
         self.base_url = "https://businessexits.com/listings/"
         self.parser = BusinessExitsListingParser()
         self.details_scraper = ListingDetailsScraper()
-        self.supabase = SupabaseClient()
+        self.supabase = get_storage_backend()
 
     def get_listings(self, max_pages: int = 1) -> List[Dict]:
         """Get all listings from Business Exits"""
         listings = []
+        self.parser.stats.reset()
         
         try:
             print("\nMaking direct request to Business Exits...")
@@ -145,7 +146,7 @@ class BusinessExitsScraper(BaseScraper):
                                 print(f"Successfully stored listing in Supabase with ID: {listing_id}")
                             except Exception as e:
                                 print(f"Error storing listing in Supabase: {e}")
-                                print("Listing data:", json.dumps(parsed_listing, indent=2))
+                                print("Listing data:", json.dumps(parsed_listing.to_dict(), indent=2, default=str))
                             
                             listings.append(parsed_listing)
                             print(f"\nSuccessfully processed listing: {parsed_listing.get('title', 'Untitled')}")
@@ -153,6 +154,8 @@ class BusinessExitsScraper(BaseScraper):
                     except Exception as e:
                         print(f"Error processing listing: {str(e)}")
                         continue
+                
+                self.parser.stats.print_summary()
             
             return listings
             
@@ -4,14 +4,16 @@ import os
 import json
 import requests
 from ..base_scraper import BaseScraper
-from backend.src.database.supabase_db import SupabaseClient
+from backend.src.database.storage import get_storage_backend
+from backend.src.database.listing_record import Listing
 from config.search_queries import BASE_URLS
+from backend.src.services.industry_classifier import classify_industry
 
 class EmpireFlippersScraper(BaseScraper):
     def __init__(self):
         super().__init__()
         self.base_url = BASE_URLS.get("empireflippers", "https://empireflippers.com/marketplace/")
-        self.supabase = SupabaseClient()
+        self.supabase = get_storage_backend()
         self.agentql_api_url = "https://api.agentql.com/v1/query-data"
         self.headers = {
             "X-API-Key": os.getenv('AGENTQL_API_KEY'),
@@ -183,7 +185,7 @@ class EmpireFlippersScraper(BaseScraper):
             
             print(f"Final title value: {title}")
             
-            formatted_listing = {
+            formatted_listing = Listing.from_dict({
                 'title': str(title).strip(),  # Ensure title is a string and stripped
                 'listing_url': listing_data.get('listing_url', ''),
                 'source_platform': 'Empire Flippers',
@@ -194,35 +196,35 @@ class EmpireFlippersScraper(BaseScraper):
                 'location': 'Online',  # Empire Flippers typically deals with online businesses
                 'description': listing_data.get('description', ''),
                 'full_description': listing_details.get('full_description', ''),
-                'business_highlights': json.dumps({
+                'business_highlights': {
                     'monetization': listing_data.get('monetization', ''),
                     'monthly_multiple': listing_data.get('monthly_multiple', ''),
                     'business_age': listing_data.get('business_created', ''),
                     'profit_trend': listing_data.get('profit_trend', ''),
                     'revenue_trend': listing_data.get('revenue_trend', ''),
                     'traffic_trend': listing_data.get('traffic_trend', '')
-                }),
-                'financial_details': json.dumps({
+                },
+                'financial_details': {
                     'monthly_revenue': monthly_revenue,
                     'monthly_profit': monthly_profit,
                     'yearly_revenue': listing_details.get('financial_details', {}).get('yearly_revenue', []),
                     'yearly_profit': listing_details.get('financial_details', {}).get('yearly_profit', []),
                     'expenses_breakdown': listing_details.get('financial_details', {}).get('expenses_breakdown', {})
-                }),
-                'business_details': json.dumps({
+                },
+                'business_details': {
                     'monetization_details': listing_details.get('business_details', {}).get('monetization_details', ''),
                     'business_model': listing_details.get('business_details', {}).get('business_model', ''),
                     'hours_required': listing_details.get('business_details', {}).get('hours_required', ''),
                     'training_period': listing_details.get('business_details', {}).get('training_period', ''),
                     'inventory_included': listing_details.get('business_details', {}).get('inventory_included', ''),
                     'growth_opportunities': listing_details.get('business_details', {}).get('growth_opportunities', [])
-                }),
-                'raw_data': json.dumps({
+                },
+                'raw_data': {
                     'listing_data': listing_data,
                     'listing_details': listing_details
-                }),
+                },
                 'status': listing_data.get('status', 'active')
-            }
+            })
             
             # Final validation
             print(f"Formatted listing title: {formatted_listing['title']}")
@@ -256,15 +258,4 @@ class EmpireFlippersScraper(BaseScraper):
 
     def _extract_industry(self, niche: str) -> str:
         """Extract industry from niche category"""
-        niche = niche.lower()
-        
-        if any(term in niche for term in ['saas', 'software', 'tech', 'application']):
-            return 'Software/SaaS'
-        elif any(term in niche for term in ['ecommerce', 'e-commerce', 'amazon', 'shopify', 'fba', 'fbm']):
-            return 'Ecommerce'
-        elif any(term in niche for term in ['content', 'blog', 'affiliate', 'display advertising']):
-            return 'Content/Affiliate'
-        elif any(term in niche for term in ['service', 'consulting', 'agency']):
-            return 'Service'
-        else:
-            return 'Other' 
\ No newline at end of file
+        return classify_industry(niche)
\ No newline at end of file
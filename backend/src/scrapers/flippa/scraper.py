@@ -4,14 +4,16 @@ import os
 import json
 import requests
 from ..base_scraper import BaseScraper
-from backend.src.database.supabase_db import SupabaseClient
+from backend.src.database.storage import get_storage_backend
+from backend.src.database.listing_record import Listing
 from config.search_queries import BASE_URLS
+from backend.src.services.industry_classifier import classify_industry
 
 class FlippaScraper(BaseScraper):
     def __init__(self):
         super().__init__()
         self.base_url = BASE_URLS.get("flippa")
-        self.supabase = SupabaseClient()
+        self.supabase = get_storage_backend()
         self.agentql_api_url = "https://api.agentql.com/v1/query-data"
         self.headers = {
             "X-API-Key": os.getenv('AGENTQL_API_KEY'),
@@ -225,7 +227,7 @@ class FlippaScraper(BaseScraper):
             annual_profit = monthly_profit * 12
             print(f"Calculated annual_profit (EBITDA): ${annual_profit:,}")
             
-            formatted_listing = {
+            formatted_listing = Listing.from_dict({
                 'title': listing_data.get('title', ''),
                 'listing_url': listing_data.get('listing_url', ''),
                 'source_platform': 'Flippa',
@@ -236,26 +238,26 @@ class FlippaScraper(BaseScraper):
                 'location': business_details.get('location', 'United States'),
                 'description': listing_data.get('description', ''),
                 'full_description': listing_details.get('description_text', ''),
-                'business_highlights': json.dumps(listing_details.get('highlights', [])),
-                'financial_details': json.dumps({
+                'business_highlights': listing_details.get('highlights', []),
+                'financial_details': {
                     'revenue_multiple': revenue_multiple,
                     'annual_revenue': annual_revenue,
                     'monthly_profit': monthly_profit,
                     'annual_profit': annual_profit,
                     'business_model': financial_info.get('business_model', '')
-                }),
-                'business_details': json.dumps({
+                },
+                'business_details': {
                     'location': business_details.get('location', 'United States'),
                     'employees': business_details.get('employees', ''),
                     'business_age': site_age,
                     'business_type': business_details.get('business_type', '')
-                }),
-                'raw_data': json.dumps({
+                },
+                'raw_data': {
                     'listing_data': listing_data,
                     'listing_details': listing_details
-                }),
+                },
                 'status': 'active'
-            }
+            })
             
             return formatted_listing
             
@@ -293,17 +295,7 @@ class FlippaScraper(BaseScraper):
             return 0
 
     def _extract_industry(self, business_type: str) -> str:
-        business_type = business_type.lower()
-        if any(term in business_type for term in ['saas', 'software', 'app', 'plugin', 'extension']):
-            return 'Software/SaaS'
-        elif any(term in business_type for term in ['ecommerce', 'e-commerce', 'shopify', 'fba', 'amazon']):
-            return 'Ecommerce'
-        elif any(term in business_type for term in ['content', 'blog', 'youtube', 'social media', 'newsletter']):
-            return 'Content/Media'
-        elif any(term in business_type for term in ['service', 'agency']):
-            return 'Service'
-        else:
-            return 'Other' 
+        return classify_industry(business_type)
 
     def _parse_revenue_multiple(self, multiple_str: str) -> float:
         try:
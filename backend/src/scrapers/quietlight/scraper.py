@@ -3,16 +3,18 @@ import json
 import requests
 import os
 from ..base_scraper import BaseScraper
-from backend.src.database.supabase_db import SupabaseClient
+from backend.src.database.storage import get_storage_backend
+from backend.src.database.listing_record import Listing
 from .selectors import LISTING_QUERY, LISTING_DETAILS_QUERY, DESCRIPTION_QUERY
 from datetime import datetime
 from config.search_queries import BASE_URLS
+from backend.src.services.industry_classifier import classify_industry
 
 class QuietLightScraper(BaseScraper):
     def __init__(self):
         super().__init__()
         self.base_url = BASE_URLS.get("quietlight", "https://quietlight.com/listings/")
-        self.supabase = SupabaseClient()
+        self.supabase = get_storage_backend()
         self.agentql_api_url = "https://api.agentql.com/v1/query-data"
         
         self.api_key = os.getenv('AGENTQL_API_KEY')
@@ -82,7 +84,7 @@ class QuietLightScraper(BaseScraper):
                     detailed_description = self._fetch_description(listing_url)
                     
                     # Format listing for storage
-                    listing = {
+                    listing = Listing.from_dict({
                         'title': listing_data.get('title', ''),
                         'listing_url': listing_url,
                         'source_platform': 'QuietLight',
@@ -93,24 +95,24 @@ class QuietLightScraper(BaseScraper):
                         'location': listing_data.get('location', 'United States'),
                         'description': listing_data.get('description', ''),  # Short description from listing
                         'full_description': detailed_description,  # Full description from detail page
-                        'business_highlights': json.dumps([]),
-                        'financial_details': json.dumps({
+                        'business_highlights': [],
+                        'financial_details': {
                             'revenue': self._parse_price(listing_data.get('revenue', '0')),
                             'ebitda': self._parse_price(listing_data.get('cash_flow', '0'))
-                        }),
-                        'business_details': json.dumps({
+                        },
+                        'business_details': {
                             'location': listing_data.get('location', 'United States'),
                             'employees': listing_data.get('employees', ''),
                             'established_year': listing_data.get('established_year', '')
-                        }),
-                        'raw_data': json.dumps(listing_data),
+                        },
+                        'raw_data': listing_data,
                         'status': 'active',
                         'created_at': datetime.now().isoformat(),
                         'updated_at': datetime.now().isoformat()
-                    }
+                    })
                     
                     print(f"Attempting to store listing in Supabase...")
-                    print(f"Storage data: {json.dumps(listing, indent=2)}")
+                    print(f"Storage data: {json.dumps(listing.to_dict(), indent=2, default=str)}")
                     
                     # Store in Supabase
                     listing_id = self.supabase.store_listing(listing)
@@ -150,17 +152,7 @@ class QuietLightScraper(BaseScraper):
 
     def _extract_industry(self, title: str) -> str:
         """Extract industry from listing title"""
-        title = title.lower()
-        if any(term in title for term in ['saas', 'software', 'tech', 'app']):
-            return 'Software/SaaS'
-        elif any(term in title for term in ['ecommerce', 'e-commerce', 'amazon', 'shopify']):
-            return 'Ecommerce'
-        elif any(term in title for term in ['manufacturing', 'factory', 'production']):
-            return 'Manufacturing'
-        elif any(term in title for term in ['service', 'consulting', 'agency']):
-            return 'Service'
-        else:
-            return 'Other' 
+        return classify_industry(title)
 
     def _fetch_description(self, listing_url: str) -> str:
         """Fetch description from individual listing page using AgentQL"""
@@ -3,14 +3,16 @@ import os
 import json
 import requests
 from ..base_scraper import BaseScraper
-from backend.src.database.supabase_db import SupabaseClient
+from backend.src.database.storage import get_storage_backend
+from backend.src.database.listing_record import Listing
 from config.search_queries import BASE_URLS
+from backend.src.services.industry_classifier import classify_industry
 
 class SunbeltScraper(BaseScraper):
     def __init__(self):
         super().__init__()
         self.base_url = BASE_URLS.get("sunbelt", "https://www.sunbeltnetwork.com/business-search/business-results/i-online-technology-for-sale-12/")
-        self.supabase = SupabaseClient()
+        self.supabase = get_storage_backend()
         self.agentql_api_url = "https://api.agentql.com/v1/query-data"
         self.headers = {
             "X-API-Key": os.getenv('AGENTQL_API_KEY'),
@@ -166,7 +168,7 @@ class SunbeltScraper(BaseScraper):
             business_details = listing_details.get('business_details', {})
             
             # Format listing for storage
-            formatted_listing = {
+            formatted_listing = Listing.from_dict({
                 'title': listing_data.get('title', ''),
                 'listing_url': listing_data.get('listing_link', ''),
                 'source_platform': 'Sunbelt',
@@ -177,25 +179,25 @@ class SunbeltScraper(BaseScraper):
                 'location': business_details.get('location', listing_data.get('location', 'United States')),
                 'description': listing_data.get('description', ''),
                 'full_description': listing_details.get('description_text', ''),
-                'business_highlights': json.dumps(listing_details.get('highlights', [])),
-                'financial_details': json.dumps({
+                'business_highlights': listing_details.get('highlights', []),
+                'financial_details': {
                     'revenue': self._parse_price(business_details.get('gross_revenue', '0')),
                     'ebitda': self._parse_price(listing_data.get('cash_flow', '0')),
                     'inventory': self._parse_price(business_details.get('inventory', '0')),
                     'payroll': self._parse_price(financial_info.get('payroll', '0'))
-                }),
-                'business_details': json.dumps({
+                },
+                'business_details': {
                     'location': business_details.get('location', listing_data.get('location', 'United States')),
                     'employees': business_details.get('employees', listing_data.get('employees', '')),
                     'established_year': business_details.get('established_year', listing_data.get('established_year', '')),
                     'inventory': business_details.get('inventory', '')
-                }),
-                'raw_data': json.dumps({
+                },
+                'raw_data': {
                     'listing_data': listing_data,
                     'listing_details': listing_details
-                }),
+                },
                 'status': 'active'
-            }
+            })
             
             return formatted_listing
             
@@ -221,14 +223,4 @@ class SunbeltScraper(BaseScraper):
 
     def _extract_industry(self, title: str) -> str:
         """Extract industry from listing title"""
-        title = title.lower()
-        if any(term in title for term in ['saas', 'software', 'tech', 'app']):
-            return 'Software/SaaS'
-        elif any(term in title for term in ['ecommerce', 'e-commerce', 'amazon', 'shopify']):
-            return 'Ecommerce'
-        elif any(term in title for term in ['manufacturing', 'factory', 'production']):
-            return 'Manufacturing'
-        elif any(term in title for term in ['service', 'consulting', 'agency']):
-            return 'Service'
-        else:
-            return 'Other' 
\ No newline at end of file
+        return classify_industry(title)
\ No newline at end of file
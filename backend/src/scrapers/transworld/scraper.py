@@ -4,14 +4,16 @@ import os
 import json
 import requests
 from ..base_scraper import BaseScraper
-from backend.src.database.supabase_db import SupabaseClient
+from backend.src.database.storage import get_storage_backend
+from backend.src.database.listing_record import Listing
 from config.search_queries import BASE_URLS
+from backend.src.services.industry_classifier import classify_industry
 
 class TransWorldScraper(BaseScraper):
     def __init__(self):
         super().__init__()
         self.base_url = BASE_URLS.get("transworld")
-        self.supabase = SupabaseClient()
+        self.supabase = get_storage_backend()
         self.agentql_api_url = "https://api.agentql.com/v1/query-data"
         self.headers = {
             "X-API-Key": os.getenv('AGENTQL_API_KEY'),
@@ -145,7 +147,7 @@ class TransWorldScraper(BaseScraper):
             financial_info = listing_details.get('financial_info', {})
             business_details = listing_details.get('business_details', {})
             
-            formatted_listing = {
+            formatted_listing = Listing.from_dict({
                 'title': listing_data.get('title', ''),
                 'listing_url': listing_data.get('listing_url', ''),
                 'source_platform': 'TransWorld',
@@ -156,24 +158,24 @@ class TransWorldScraper(BaseScraper):
                 'location': business_details.get('location', 'United States'),
                 'description': listing_data.get('description', ''),
                 'full_description': listing_details.get('description_text', ''),
-                'business_highlights': json.dumps(listing_details.get('highlights', [])),
-                'financial_details': json.dumps({
+                'business_highlights': listing_details.get('highlights', []),
+                'financial_details': {
                     'revenue': self._parse_price(business_details.get('revenue', '0')),
                     'cash_flow': self._parse_price(business_details.get('cash_flow', '0')),
                     'business_model': financial_info.get('business_model', '')
-                }),
-                'business_details': json.dumps({
+                },
+                'business_details': {
                     'location': business_details.get('location', 'United States'),
                     'employees': business_details.get('employees', ''),
                     'established_year': business_details.get('established_year', ''),
                     'business_type': business_details.get('business_type', '')
-                }),
-                'raw_data': json.dumps({
+                },
+                'raw_data': {
                     'listing_data': listing_data,
                     'listing_details': listing_details
-                }),
+                },
                 'status': 'active'
-            }
+            })
             
             return formatted_listing
             
@@ -195,14 +197,4 @@ class TransWorldScraper(BaseScraper):
             return 0
 
     def _extract_industry(self, business_type: str) -> str:
-        business_type = business_type.lower()
-        if any(term in business_type for term in ['saas', 'software', 'tech', 'app', 'internet']):
-            return 'Software/SaaS'
-        elif any(term in business_type for term in ['ecommerce', 'e-commerce', 'retail']):
-            return 'Ecommerce'
-        elif any(term in business_type for term in ['content', 'blog', 'media', 'digital']):
-            return 'Content/Media'
-        elif any(term in business_type for term in ['service', 'consulting', 'agency']):
-            return 'Service'
-        else:
-            return 'Other' 
\ No newline at end of file
+        return classify_industry(business_type)
\ No newline at end of file
@@ -13,6 +13,7 @@ class WebsiteClosersScraper(BaseScraper):
     def get_listings(self, max_pages: int = 1) -> List[Dict]:
         """Get all listings from Website Closers"""
         listings = []
+        self.parser.stats.reset()
         
         try:
             soup = self._make_request(self.base_url)
@@ -35,6 +36,7 @@ class WebsiteClosersScraper(BaseScraper):
                             'title_elem': title_elem,
                             'price_elem': div.find('div', class_='asking_price'),
                             'cash_flow_elem': div.find('div', class_='cash_flow'),
+                            'revenue_elem': div.find('div', class_='revenue'),
                             'description_elem': div.find('div', class_='the_content'),
                             'source_platform': 'WebsiteClosers',
                             'listing_url': title_elem['href']  # Ensure URL is always included
@@ -48,6 +50,8 @@ class WebsiteClosersScraper(BaseScraper):
                     except Exception as e:
                         print(f"Error extracting listing: {e}")
                         continue
+                
+                self.parser.stats.print_summary()
                         
             return listings
             
@@ -0,0 +1,132 @@
+from datetime import datetime, UTC
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .alert_index import RANGE_FILTERS, CompiledAlert, compile_alert
+
+# Alerts evaluated per block; a block's mask is block x listings booleans
+DEFAULT_BLOCK_SIZE = 256
+
+
+def _parse_timestamp(value: Optional[str]) -> float:
+    if not value:
+        return np.nan
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
+class ListingColumns:
+    """
+    A columnar snapshot of the candidate listings: one NumPy array per filtered column
+    (NaN where the value is missing), created_at as epoch seconds, and industries as
+    integer codes. A missing value is NaN, so no bound matches it, like NULL in SQL.
+    """
+
+    def __init__(self, rows: Sequence[Dict]):
+        self.ids = [row['id'] for row in rows]
+        self.columns: Dict[str, np.ndarray] = {}
+        for column, _, _ in RANGE_FILTERS:
+            values = [row.get(column) for row in rows]
+            self.columns[column] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        self.created_at = np.array([_parse_timestamp(row.get('created_at')) for row in rows], dtype=np.float64)
+
+        self.industry_codes: Dict[str, int] = {}
+        codes = [self.industry_codes.setdefault(row.get('industry'), len(self.industry_codes)) for row in rows]
+        self.industries = np.array(codes, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def newer_than(self, start: Tuple[datetime, Optional[str]], rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Which rows (all of them by default) are past a CompiledAlert.start position. At
+        the position's own created_at, a row is past it only if its id is greater.
+        """
+        at, after_id = start
+        threshold = at.timestamp()
+        created_at = self.created_at if rows is None else self.created_at[rows]
+        newer = created_at > threshold
+        if after_id is not None:
+            for i in np.flatnonzero(created_at == threshold):
+                newer[i] = self.ids[i if rows is None else rows[i]] > after_id
+        return newer
+
+    @classmethod
+    def load(cls, db, columns: str = None) -> 'ListingColumns':
+        """Read the newsletter candidates once"""
+        if columns is None:
+            columns = db.LISTING_MATCH_COLUMNS + ',business_age,number_of_employees'
+        return cls(list(db.stream_rows(db.NEWSLETTER_CANDIDATES, columns)))
+
+
+class BatchAlertEvaluator:
+    """
+    Evaluates the numeric, industry and new-listing (cursor or cutoff) filters of many
+    alerts at once over a ListingColumns snapshot. Each predicate is a vectorized comparison of an alerts
+    block's bounds against a whole column, giving an alerts x listings match matrix.
+    Keyword filters are not part of the matrix.
+    """
+
+    def __init__(self, listings: ListingColumns, now: Optional[datetime] = None):
+        self.listings = listings
+        self.now = now or datetime.now(UTC)
+
+    def _block_mask(self, alerts: Sequence[Union[Dict, CompiledAlert]]) -> np.ndarray:
+        listings = self.listings
+        compiled = [alert if isinstance(alert, CompiledAlert) else compile_alert(alert) for alert in alerts]
+        mask = np.ones((len(alerts), len(listings)), dtype=bool)
+
+        for column, _, _ in RANGE_FILTERS:
+            bounds = [c.bounds(column) for c in compiled]
+            if all(low is None and high is None for low, high in bounds):
+                continue
+            low = np.array([-np.inf if b[0] is None else b[0] for b in bounds], dtype=np.float64)[:, None]
+            high = np.array([np.inf if b[1] is None else b[1] for b in bounds], dtype=np.float64)[:, None]
+            unbounded = np.array([b == (None, None) for b in bounds])[:, None]
+            values = listings.columns[column][None, :]
+            # NaN compares False, so missing values only pass alerts without this filter
+            mask &= ((values >= low) & (values <= high)) | unbounded
+
+        starts = [c.start(self.now) for c in compiled]
+        thresholds = np.array([at.timestamp() for at, _ in starts], dtype=np.float64)
+        new = listings.created_at[None, :] > thresholds[:, None]
+        for i, start in enumerate(starts):
+            if start[1] is not None:
+                # Listings created at the same time as an alert's cursor are new past its id
+                new[i] = listings.newer_than(start)
+        mask &= new
+
+        # alert x industry-code table, then gathered per listing
+        allowed = np.zeros((len(alerts), len(listings.industry_codes)), dtype=bool)
+        for i, c in enumerate(compiled):
+            if c.industries is None:
+                allowed[i, :] = True
+                continue
+            for industry in c.industries:
+                code = listings.industry_codes.get(industry)
+                if code is not None:
+                    allowed[i, code] = True
+        mask &= allowed[:, listings.industries]
+        return mask
+
+    def evaluate(self, alerts: Sequence[Union[Dict, CompiledAlert]],
+                 block_size: int = DEFAULT_BLOCK_SIZE) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield (first alert index, block mask) for consecutive blocks of alerts (dicts or compiled)"""
+        for start in range(0, len(alerts), block_size):
+            yield start, self._block_mask(alerts[start:start + block_size])
+
+    def match_matrix(self, alerts: Sequence[Dict], block_size: int = DEFAULT_BLOCK_SIZE) -> np.ndarray:
+        """The full alerts x listings boolean matrix"""
+        matrix = np.zeros((len(alerts), len(self.listings)), dtype=bool)
+        for start, mask in self.evaluate(alerts, block_size):
+            matrix[start:start + len(mask)] = mask
+        return matrix
+
+    def matching_ids(self, alerts: Sequence[Dict], block_size: int = DEFAULT_BLOCK_SIZE) -> Dict[str, List[str]]:
+        """Matching listing ids per alert id, in snapshot order"""
+        ids = np.array(self.listings.ids, dtype=object)
+        result = {}
+        for start, mask in self.evaluate(alerts, block_size):
+            for offset, row in enumerate(mask):
+                result[alerts[start + offset]['id']] = ids[row].tolist()
+        return result
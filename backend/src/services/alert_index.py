@@ -0,0 +1,383 @@
+import threading
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from ..database.keyword_query import KeywordQuery
+from ..database.storage import ListingCursor
+from .keyword_scanner import CompiledQuery, KeywordScanner
+
+# Alert industry names and the listing industries they cover
+INDUSTRY_ALIASES = {
+    'SaaS': ['Software/SaaS', 'Technology'],
+    'E-commerce': ['Ecommerce'],
+    'Digital Products': ['Content/Media'],
+    'Content': ['Content/Media'],
+    'Advertising': ['Content/Media'],
+    'Services': ['Service'],
+    'Mobile Apps': ['Software/SaaS', 'Technology'],
+}
+
+# (listing column, alert minimum, alert maximum) for every range an alert can set
+RANGE_FILTERS = (
+    ('asking_price', 'min_price', 'max_price'),
+    ('revenue', 'min_annual_revenue', 'max_annual_revenue'),
+    ('ebitda', 'min_ebitda', 'max_ebitda'),
+    ('business_age', 'min_business_age', 'max_business_age'),
+    ('number_of_employees', 'min_employees', 'max_employees'),
+    ('profit_margin', 'min_profit_margin', 'max_profit_margin'),
+    ('selling_multiple', 'min_selling_multiple', 'max_selling_multiple'),
+)
+
+# Ranges the index buckets on; the others are only checked on candidates
+INDEXED_METRICS = ('asking_price', 'revenue', 'ebitda')
+
+# Buckets are powers of two: value v falls in bucket v.bit_length(), values <= 0 in 0
+MAX_BUCKET = 64
+
+
+def normalize_industries(industries: Iterable[str]) -> List[str]:
+    """Map alert industry names to listing industries, without duplicates"""
+    normalized = []
+    for industry in industries or []:
+        normalized.extend(INDUSTRY_ALIASES.get(industry, [industry]))
+    return list(dict.fromkeys(normalized))
+
+
+# How far back a newsletter looks, by frequency; anything else (monthly, instantly) uses
+# DEFAULT_LOOKBACK, as does an alert that was never sent
+LOOKBACKS = {'daily': timedelta(hours=24), 'weekly': timedelta(days=7)}
+DEFAULT_LOOKBACK = timedelta(days=30)
+
+
+def alert_cutoff(alert: Dict, now: datetime) -> datetime:
+    """Listings created after this are new for the alert: the lookback, or the last send if more recent"""
+    return compile_alert(alert).cutoff(now)
+
+
+def _bucket(value) -> int:
+    return int(value).bit_length() if value > 0 else 0
+
+
+def alert_bounds(alert: Dict, min_key: str, max_key: str) -> Tuple[Optional[float], Optional[float]]:
+    """An alert's (minimum, maximum) for one range filter; None where unset"""
+    low, high = alert.get(min_key), alert.get(max_key)
+    if min_key == 'min_price':
+        # The price filters treat 0 as unset
+        low, high = low or None, high or None
+    return low, high
+
+
+# (column, minimum, maximum) for each range an alert sets
+Ranges = Tuple[Tuple[str, Optional[float], Optional[float]], ...]
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledAlert:
+    """
+    An alert's criteria interpreted once: the listing industries it covers (None for
+    any), the ranges it sets, its keyword query with its own automaton, and where its
+    new listings start: past its listing cursor, or after its cutoff when it has none.
+    compile_alert caches these by alert id and version.
+    """
+    alert_id: Optional[str]
+    version: Tuple[Optional[str], ...]
+    industries: Optional[FrozenSet[str]]
+    ranges: Ranges
+    keywords: Optional[KeywordQuery]
+    lookback: timedelta
+    last_sent: Optional[datetime]
+    cursor: Optional[ListingCursor]
+    cursor_at: Optional[datetime]
+    scanner: Optional[KeywordScanner]
+    keyword_ids: Optional[CompiledQuery]
+
+    def bounds(self, column: str) -> Tuple[Optional[float], Optional[float]]:
+        for name, low, high in self.ranges:
+            if name == column:
+                return low, high
+        return None, None
+
+    def cutoff(self, now: datetime) -> datetime:
+        """Listings created after this are new for the alert, as in alert_cutoff"""
+        if self.last_sent is None:
+            return now - DEFAULT_LOOKBACK
+        return max(now - self.lookback, self.last_sent)
+
+    def start(self, now: datetime) -> Tuple[datetime, Optional[str]]:
+        """
+        Listings past this (created_at, id) are new for the alert: its listing cursor,
+        or its cutoff with id None, which stands for past every listing created then
+        """
+        if self.cursor is not None:
+            return self.cursor_at, self.cursor[1]
+        return self.cutoff(now), None
+
+    def filters(self, now: datetime, until: Optional[ListingCursor] = None) -> List[Tuple]:
+        """
+        The storage filters for the alert's ranges, industries and new listings: those
+        past its cursor, or after its cutoff, and up to `until` when given
+        """
+        filters = []
+        for column, low, high in self.ranges:
+            if high is not None:
+                filters.append(('lte', column, high))
+            if low is not None:
+                filters.append(('gte', column, low))
+        if self.industries is not None:
+            filters.append(('in_', 'industry', sorted(self.industries)))
+        if self.cursor is not None:
+            filters.append(('after', 'created_at', self.cursor))
+        else:
+            filters.append(('gt', 'created_at', self.cutoff(now).isoformat()))
+        if until is not None:
+            filters.append(('until', 'created_at', until))
+        return filters
+
+    def in_ranges(self, values: Dict) -> bool:
+        """Whether a listing's range-filtered values (see _metrics) satisfy every range"""
+        for column, low, high in self.ranges:
+            value = values.get(column)
+            # Like the SQL filters, a missing value never satisfies a bound
+            if value is None or (low is not None and value < low) or (high is not None and value > high):
+                return False
+        return True
+
+    def criteria_key(self) -> Tuple:
+        """
+        A hashable key equal for alerts that select the same listings apart from their
+        cutoff: industries, ranges and keywords in canonical order. A single keyword
+        group matches the same way under every match type.
+        """
+        keywords = None
+        if self.keywords is not None:
+            groups = [tuple(words) for words in self.keywords._grouped()]
+            match_type = 'any' if len(groups) == 1 else self.keywords.match_type
+            keywords = (
+                match_type,
+                tuple(sorted(groups)),
+                self.keywords.fields,
+                tuple(sorted(tuple(words) for words in self.keywords.exclude)),
+            )
+        industries = tuple(sorted(self.industries)) if self.industries is not None else None
+        return industries, self.ranges, keywords
+
+    def keyword_score(self, texts: Dict[str, Optional[str]]) -> Optional[int]:
+        """KeywordQuery.score of the listing text, from one scan with the alert's automaton"""
+        if self.keywords is None:
+            return 0
+        return self.scanner.score(self.keyword_ids, self.scanner.scan(texts))
+
+
+def alert_version(alert: Dict) -> Tuple[Optional[str], ...]:
+    """What a compiled alert is valid for: its criteria version, its last send and its cursor"""
+    return (alert.get('updated_at'), alert.get('last_notification_sent'),
+            alert.get('listing_cursor_created_at'), alert.get('listing_cursor_id'))
+
+
+def _parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def _compile(alert: Dict) -> CompiledAlert:
+    ranges = []
+    for column, min_key, max_key in RANGE_FILTERS:
+        low, high = alert_bounds(alert, min_key, max_key)
+        if low is not None or high is not None:
+            ranges.append((column, low, high))
+    industries = normalize_industries(alert.get('industries'))
+    last_sent = alert.get('last_notification_sent')
+    cursor_created_at, cursor_id = alert.get('listing_cursor_created_at'), alert.get('listing_cursor_id')
+    cursor = (cursor_created_at, cursor_id) if cursor_created_at and cursor_id else None
+    keywords = KeywordQuery.from_alert(alert)
+    scanner = KeywordScanner() if keywords else None
+    return CompiledAlert(
+        alert_id=alert.get('id'),
+        version=alert_version(alert),
+        industries=frozenset(industries) if industries else None,
+        ranges=tuple(ranges),
+        keywords=keywords,
+        lookback=LOOKBACKS.get(alert.get('newsletter_frequency', 'daily'), DEFAULT_LOOKBACK),
+        last_sent=_parse_timestamp(last_sent) if last_sent else None,
+        cursor=cursor,
+        cursor_at=_parse_timestamp(cursor_created_at) if cursor else None,
+        scanner=scanner,
+        keyword_ids=scanner.compile(keywords) if keywords else None
+    )
+
+
+# Compiled alerts by alert id, reused across scheduler ticks while the version matches.
+# Least recently used first: deleted alerts age out instead of keeping their scanners
+COMPILED_ALERT_CACHE_SIZE = 4096
+_compiled_alerts: 'OrderedDict[str, CompiledAlert]' = OrderedDict()
+_compiled_alerts_lock = threading.Lock()
+
+
+def compile_alert(alert: Dict) -> CompiledAlert:
+    """
+    The alert's compiled criteria, from the cache when its id and version match. Alerts
+    without an updated_at (not yet migrated, or built in memory) are compiled every time,
+    since a change to their criteria could not be detected.
+    """
+    alert_id = alert.get('id')
+    with _compiled_alerts_lock:
+        cached = _compiled_alerts.get(alert_id)
+        if cached is not None and alert.get('updated_at') is not None and cached.version == alert_version(alert):
+            _compiled_alerts.move_to_end(alert_id)
+            return cached
+    compiled = _compile(alert)
+    if alert_id is not None:
+        with _compiled_alerts_lock:
+            _compiled_alerts[alert_id] = compiled
+            _compiled_alerts.move_to_end(alert_id)
+            while len(_compiled_alerts) > COMPILED_ALERT_CACHE_SIZE:
+                _compiled_alerts.popitem(last=False)
+    return compiled
+
+
+def _metrics(listing: Dict) -> Dict:
+    """The listing's range-filtered values, deriving the ratios the database computes"""
+    values = {column: listing.get(column) for column, _, _ in RANGE_FILTERS}
+    revenue, ebitda, price = values['revenue'], values['ebitda'], values['asking_price']
+    if values['profit_margin'] is None and revenue and ebitda is not None and revenue > 0:
+        values['profit_margin'] = ebitda * 100.0 / revenue
+    if values['selling_multiple'] is None and ebitda and price is not None and ebitda > 0:
+        values['selling_multiple'] = price / ebitda
+    return values
+
+
+@dataclass(slots=True)
+class AlertMatch:
+    """
+    A listing routed to an alert. exact means it matched the alert's keywords; score is
+    the KeywordScanner score it matched with, kept for inspection. Newsletters never rank
+    by it: every path ranks keyword matches by BM25F over the CandidateCorpus.
+    """
+    alert_id: str
+    listing_id: str
+    exact: bool
+    score: int
+
+
+class AlertIndex:
+    """
+    In-memory index from listing attributes to the alerts that could want them: by
+    normalized industry, and by power-of-two buckets of each alert's asking price,
+    revenue and EBITDA range. A new listing is checked exactly against only the
+    alerts found in its industry and all three of its buckets. Keywords of all alerts
+    share one KeywordScanner, so a listing's text is scanned once however many
+    candidates have keywords.
+    """
+
+    def __init__(self, alerts: Iterable[Dict]):
+        self.alerts: Dict[str, Dict] = {}
+        self._compiled: Dict[str, CompiledAlert] = {}
+        self._queries: Dict[str, Optional[CompiledQuery]] = {}
+        self._scanner = KeywordScanner()
+        self._by_industry: Dict[str, Set[str]] = defaultdict(set)
+        self._any_industry: Set[str] = set()
+        self._buckets = {metric: defaultdict(set) for metric in INDEXED_METRICS}
+        self._unbounded = {metric: set() for metric in INDEXED_METRICS}
+        for alert in alerts:
+            self.add(alert)
+
+    def __len__(self) -> int:
+        return len(self.alerts)
+
+    def add(self, alert: Dict):
+        alert_id = alert['id']
+        self.alerts[alert_id] = alert
+        compiled = self._compiled[alert_id] = compile_alert(alert)
+        self._queries[alert_id] = self._scanner.compile(compiled.keywords) if compiled.keywords else None
+
+        if compiled.industries is not None:
+            for industry in compiled.industries:
+                self._by_industry[industry].add(alert_id)
+        else:
+            self._any_industry.add(alert_id)
+
+        for column in INDEXED_METRICS:
+            low, high = compiled.bounds(column)
+            if low is None and high is None:
+                self._unbounded[column].add(alert_id)
+                continue
+            first = _bucket(low) if low is not None else 0
+            last = _bucket(high) if high is not None else MAX_BUCKET
+            for bucket in range(first, last + 1):
+                self._buckets[column][bucket].add(alert_id)
+
+    def candidates(self, listing: Dict) -> Set[str]:
+        """Alerts whose industry and indexed ranges could include the listing"""
+        # Blank industries are 'Other', as in newsletter_candidates
+        industry = (listing.get('industry') or '').strip() or 'Other'
+        found = self._by_industry.get(industry, set()) | self._any_industry
+        for column in INDEXED_METRICS:
+            if not found:
+                break
+            value = listing.get(column)
+            allowed = self._unbounded[column]
+            if value is not None:
+                allowed = allowed | self._buckets[column].get(_bucket(value), set())
+            found = found & allowed
+        return found
+
+    def matches(self, listing_id: str, listing: Dict) -> List[AlertMatch]:
+        """The alerts the listing satisfies, checked exactly"""
+        values = _metrics(listing)
+        hits = None
+        result = []
+        for alert_id in self.candidates(listing):
+            if not self._compiled[alert_id].in_ranges(values):
+                continue
+            query = self._queries[alert_id]
+            if query is None:
+                score = 0
+            else:
+                if hits is None:
+                    hits = self._scanner.scan(listing)
+                score = self._scanner.score(query, hits)
+            if score is None:
+                continue
+            result.append(AlertMatch(alert_id, listing_id, exact=score > 0, score=score))
+        return result
+
+
+class AlertRouter:
+    """
+    Routes newly stored listings to the alerts they match, as they are stored. Matches
+    are buffered and written in bulk to the per-alert pending set. The set is partial:
+    only listings inserted while subscribed are routed, against the alerts as they were
+    when the index was built, so an alert added or changed between scrapes has no
+    pending matches for its backlog and may keep some it no longer wants. Newsletters
+    therefore read the candidates from the alert's cursor and only clear the pending
+    matches that read covered (see NewsletterService.get_alert_matches).
+    """
+
+    FLUSH_SIZE = 500
+
+    def __init__(self, db, alerts: Optional[Iterable[Dict]] = None):
+        self.db = db
+        self.index = AlertIndex(alerts if alerts is not None else db.get_alerts_with_users())
+        self._pending: List[Dict] = []
+        self.routed = 0
+        print(f"Alert index built for {len(self.index)} alerts")
+
+    def subscribe(self):
+        """Route every listing the storage backend inserts from now on"""
+        self.db.subscribe_new_listings(self.route)
+
+    def route(self, listing_id: str, listing: Dict):
+        for match in self.index.matches(listing_id, listing):
+            self._pending.append({'alert_id': match.alert_id, 'listing_id': match.listing_id,
+                                  'exact': match.exact, 'score': match.score})
+        if len(self._pending) >= self.FLUSH_SIZE:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write buffered matches; returns how many were written"""
+        pending, self._pending = self._pending, []
+        if pending:
+            self.db.add_alert_matches(pending)
+            self.routed += len(pending)
+        return len(pending)
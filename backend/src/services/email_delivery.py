@@ -0,0 +1,107 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import resend
+
+# Most emails Resend accepts in one batch request
+RESEND_BATCH_LIMIT = 100
+
+# Status codes of a request Resend rejected after validating it, without sending anything
+VALIDATION_ERROR_CODES = (400, 422)
+
+
+@dataclass
+class DeliveryResult:
+    """The outcome of one queued email: its Resend id, or why it was not sent"""
+    params: Dict
+    context: Any
+    email_id: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def sent(self) -> bool:
+        return self.email_id is not None
+
+
+def _status(error: Exception) -> Optional[int]:
+    try:
+        return int(error.code)
+    except (TypeError, ValueError):
+        return None
+
+
+class BatchEmailDelivery:
+    """
+    Accumulates rendered emails and submits them through Resend's batch endpoint, up to
+    batch_size per request, instead of one request per email. Each email carries a
+    caller's context that comes back with its result.
+
+    The batch endpoint accepts or rejects a request as a whole, so a batch rejected as
+    invalid is retried one email at a time: one bad address only fails its own email.
+    Any other error (a timeout, a dropped connection, a 429 or 5xx) may come after the
+    batch was sent, so its emails are reported as failed rather than sent again.
+    """
+
+    def __init__(self, batch_size: int = RESEND_BATCH_LIMIT):
+        if not 1 <= batch_size <= RESEND_BATCH_LIMIT:
+            raise ValueError(f"batch_size must be between 1 and {RESEND_BATCH_LIMIT}")
+        self.batch_size = batch_size
+        self._queue: List[DeliveryResult] = []
+        self.requests = 0
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def add(self, params: Dict, context: Any = None) -> List[DeliveryResult]:
+        """Queue an email; returns the results of the batch it completed, if any"""
+        self._queue.append(DeliveryResult(params=params, context=context))
+        if len(self._queue) >= self.batch_size:
+            return self.flush()
+        return []
+
+    def flush(self) -> List[DeliveryResult]:
+        """Send every queued email and return their results, in queue order"""
+        results = []
+        while self._queue:
+            batch, self._queue = self._queue[:self.batch_size], self._queue[self.batch_size:]
+            results.extend(self._send_batch(batch))
+        return results
+
+    def _send_batch(self, batch: List[DeliveryResult]) -> List[DeliveryResult]:
+        if len(batch) == 1:
+            return [self._send_one(batch[0])]
+        try:
+            self.requests += 1
+            response = resend.Batch.send([item.params for item in batch])
+        except Exception as e:
+            if isinstance(e, resend.exceptions.ResendError) and _status(e) in VALIDATION_ERROR_CODES:
+                print(f"⚠️ Batch of {len(batch)} emails rejected ({str(e)}), sending them one at a time")
+                return [self._send_one(item) for item in batch]
+            print(f"❌ Batch of {len(batch)} emails failed ({str(e)}), it may have been sent: not retrying")
+            for item in batch:
+                item.error = f"Batch delivery failed, emails may have been sent: {str(e)}"
+            return batch
+
+        # The response lists one {'id': ...} per email, in request order
+        data = response.get('data') if isinstance(response, dict) else response
+        data = data if isinstance(data, list) else []
+        for i, item in enumerate(batch):
+            sent = data[i] if i < len(data) else None
+            if isinstance(sent, dict) and sent.get('id'):
+                item.email_id = sent['id']
+            else:
+                item.error = f"Invalid response from email service: {sent}"
+        print(f"📤 Sent a batch of {len(batch)} emails")
+        return batch
+
+    def _send_one(self, item: DeliveryResult) -> DeliveryResult:
+        try:
+            self.requests += 1
+            response = resend.Emails.send(item.params)
+            if response and isinstance(response, dict) and response.get('id'):
+                item.email_id = response['id']
+            else:
+                item.error = f"Invalid response from email service: {response}"
+        except Exception as e:
+            item.error = str(e)
+        return item
@@ -0,0 +1,202 @@
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timedelta, UTC
+from typing import Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+import resend
+
+from .email_delivery import RESEND_BATCH_LIMIT
+
+# Resend's default limit is 2 requests per second per team
+DEFAULT_RATE_LIMIT = 2.0
+
+
+class RateLimiter:
+    """Spaces requests at least 1/rate seconds apart, across all the tasks sharing it"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hold every request for `seconds`, as after a 429"""
+        self._next = max(self._next, time.monotonic() + seconds)
+
+
+class EmailDispatcher:
+    """
+    Drains the email outbox: claims due emails, sends them through Resend's batch
+    endpoint under a requests-per-second limit, and records each email's result.
+
+    Every request carries an Idempotency-Key, so a retry after a lost response is not
+    delivered twice: an email's own key when sent alone, and a digest of its emails' keys
+    for a batch. When a batch fails without an answer, its key is stored on its emails,
+    which are retried together under it. Rate limiting (429), server errors and network
+    failures are retried with exponential backoff until max_attempts; a batch the API
+    rejects is retried one email at a time, and an email it rejects fails for good.
+
+    on_sent(row, email_id) and on_failed(row, error) are called with the outbox row
+    once an email is sent or has failed for good.
+    """
+
+    def __init__(self, db, on_sent: Optional[Callable[[Dict, str], None]] = None,
+                 on_failed: Optional[Callable[[Dict, str], None]] = None,
+                 rate_limit: float = DEFAULT_RATE_LIMIT, batch_size: int = RESEND_BATCH_LIMIT,
+                 concurrency: int = 4, max_attempts: int = 5, retry_delay: float = 30.0,
+                 lease: timedelta = timedelta(minutes=5), api_url: Optional[str] = None,
+                 api_key: Optional[str] = None, timeout: float = 30.0):
+        self.db = db
+        self.on_sent = on_sent
+        self.on_failed = on_failed
+        self.rate_limit = rate_limit
+        self.limiter: Optional[RateLimiter] = None
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.lease = lease
+        self.api_url = (api_url or resend.api_url).rstrip('/')
+        self.api_key = api_key or resend.api_key
+        self.timeout = timeout
+        self.stats: Dict[str, int] = {}
+
+    def run(self) -> Dict[str, int]:
+        """Drain the outbox from synchronous code"""
+        return asyncio.run(self.drain())
+
+    async def drain(self) -> Dict[str, int]:
+        """Send due emails until none are left; emails waiting for a retry stay queued"""
+        self.limiter = RateLimiter(self.rate_limit)
+        self.stats = {'sent': 0, 'retried': 0, 'failed': 0, 'requests': 0}
+        headers = {'Authorization': f"Bearer {self.api_key}", 'Content-Type': 'application/json'}
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(headers=headers, timeout=timeout) as session:
+            while True:
+                rows = self.db.claim_outbox_emails(self.batch_size * self.concurrency, self.lease)
+                if not rows:
+                    break
+                await asyncio.gather(*(self._send_batch(session, batch, key) for batch, key in self._batches(rows)))
+        return self.stats
+
+    def _batches(self, rows: List[Dict]) -> List[Tuple[List[Dict], Optional[str]]]:
+        """
+        Claimed rows as (batch, idempotency key) pairs: emails of an earlier batch that
+        failed without an answer go out together again under its key, the rest in new
+        batches. Claims are ordered by batch key, so only a claim that ends mid-group
+        splits one; the part sent under the old key then gets the old response replayed,
+        and its missing emails are retried.
+        """
+        retried: Dict[str, List[Dict]] = {}
+        fresh = []
+        for row in rows:
+            if row.get('batch_key'):
+                retried.setdefault(row['batch_key'], []).append(row)
+            else:
+                fresh.append(row)
+        batches = [(batch, key) for key, batch in retried.items()]
+        batches.extend((fresh[i:i + self.batch_size], None) for i in range(0, len(fresh), self.batch_size))
+        return batches
+
+    async def _post(self, session: aiohttp.ClientSession, path: str, payload,
+                    idempotency_key: str) -> Tuple[Optional[int], object]:
+        """(status, body) of one API request; status None when it never got a response"""
+        await self.limiter.acquire()
+        self.stats['requests'] += 1
+        try:
+            async with session.post(f"{self.api_url}{path}", json=payload,
+                                    headers={'Idempotency-Key': idempotency_key}) as response:
+                if response.status == 429:
+                    self.limiter.pause(float(response.headers.get('Retry-After') or 1))
+                return response.status, await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            return None, str(e) or type(e).__name__
+
+    @staticmethod
+    def _transient(status: Optional[int]) -> bool:
+        return status is None or status == 429 or status >= 500
+
+    @staticmethod
+    def _error(status: Optional[int], body) -> str:
+        message = body.get('message') if isinstance(body, dict) else body
+        return f"{status}: {message}" if status else str(message)
+
+    async def _send_batch(self, session: aiohttp.ClientSession, rows: List[Dict], key: Optional[str] = None):
+        if len(rows) == 1 and not key:
+            await self._send_one(session, rows[0])
+            return
+        if not key:
+            keys = '\n'.join(row['idempotency_key'] for row in rows)
+            key = 'batch-' + hashlib.sha256(keys.encode()).hexdigest()[:40]
+        status, body = await self._post(session, '/emails/batch', [row['params'] for row in rows], key)
+
+        if status == 200:
+            data = body.get('data') if isinstance(body, dict) else None
+            data = data if isinstance(data, list) else []
+            for i, row in enumerate(rows):
+                sent = data[i] if i < len(data) else None
+                if isinstance(sent, dict) and sent.get('id'):
+                    self._sent(row, sent['id'])
+                else:
+                    self._retry(row, f"Invalid response from email service: {sent}")
+        elif self._transient(status):
+            # The batch may have been sent: retry these emails together, at the same time
+            error = self._error(status, body)
+            retry_at = self._retry_at(max(row['attempts'] for row in rows))
+            for row in rows:
+                self._retry(row, error, retry_at, batch_key=key)
+        else:
+            print(f"⚠️ Batch of {len(rows)} emails rejected ({self._error(status, body)}), sending them one at a time")
+            for row in rows:
+                await self._send_one(session, row)
+
+    async def _send_one(self, session: aiohttp.ClientSession, row: Dict):
+        status, body = await self._post(session, '/emails', row['params'], row['idempotency_key'])
+        if status == 200 and isinstance(body, dict) and body.get('id'):
+            self._sent(row, body['id'])
+        elif self._transient(status) or status == 200:
+            self._retry(row, self._error(status, body))
+        else:
+            self._failed(row, self._error(status, body))
+
+    def _sent(self, row: Dict, email_id: str):
+        self.stats['sent'] += 1
+        self.db.update_outbox_email(row['id'], 'sent', email_id=email_id)
+        self._notify(self.on_sent, row, email_id)
+
+    def _retry_at(self, attempts: int) -> datetime:
+        return datetime.now(UTC) + timedelta(seconds=self.retry_delay * 2 ** (attempts - 1))
+
+    def _retry(self, row: Dict, error: str, retry_at: Optional[datetime] = None, batch_key: Optional[str] = None):
+        if row['attempts'] >= self.max_attempts:
+            self._failed(row, f"Gave up after {row['attempts']} attempts: {error}")
+            return
+        self.stats['retried'] += 1
+        self.db.update_outbox_email(row['id'], 'pending', error_message=error,
+                                    next_attempt_at=retry_at or self._retry_at(row['attempts']),
+                                    batch_key=batch_key)
+
+    def _failed(self, row: Dict, error: str):
+        self.stats['failed'] += 1
+        print(f"❌ Could not send email to {row['params'].get('to')}: {error}")
+        self.db.update_outbox_email(row['id'], 'failed', error_message=error)
+        self._notify(self.on_failed, row, error)
+
+    @staticmethod
+    def _notify(callback: Optional[Callable[[Dict, str], None]], row: Dict, value: str):
+        if callback is None:
+            return
+        try:
+            callback(row, value)
+        except Exception as e:
+            print(f"⚠️ Error recording the result of outbox email {row['id']}: {str(e)}")
@@ -0,0 +1,98 @@
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+OTHER_INDUSTRY = 'Other'
+
+# Shared industry taxonomy, in priority order: the first category with any term
+# present in the text wins. Terms match whole words, optionally plural. Specific
+# categories come before the generic "Service".
+INDUSTRY_TAXONOMY: Sequence[Tuple[str, Sequence[str]]] = (
+    ('Software/SaaS', ('saas', 'software', 'tech', 'technology', 'app', 'plugin', 'extension', 'internet')),
+    ('Ecommerce', ('ecommerce', 'e-commerce', 'amazon', 'shopify', 'fba', 'fbm', 'retail', 'commerce')),
+    ('Content/Media', ('content', 'blog', 'media', 'digital', 'youtube', 'social media', 'newsletter',
+                       'advertising', 'entertainment', 'affiliate')),
+    ('Manufacturing', ('manufacturing', 'factory', 'production')),
+    ('Wholesale/Distribution', ('distribution', 'wholesale')),
+    ('Education', ('education', 'learning', 'teaching', 'edtech')),
+    ('Healthcare Services', ('health', 'healthcare', 'medical')),
+    ('Marketing', ('marketing', 'seo', 'ppc')),
+    ('Renewable Energy', ('renewable', 'energy', 'solar', 'wind')),
+    ('Service', ('service', 'consulting', 'agency', 'agencies')),
+)
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """
+    Build a regex alternation factored by shared prefixes ("a(?:gency|mazon|pp)"), so the
+    engine dispatches on each character instead of trying every term at every position
+    """
+    trie: Dict[str, dict] = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # A term ending here is a valid match; the quantifier stays greedy so longer terms win
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+
+class IndustryClassifier:
+    """
+    Maps free text (titles, niches, business types) to the shared industry taxonomy.
+    All terms are compiled into one prefix-factored regex so each string is scanned
+    once, left to right, instead of once per term. Terms match whole words (or their
+    plural with an "s"), so "Apparel" is not an "app" and "Windows" is not "wind";
+    where terms overlap the longest one wins.
+    """
+
+    def __init__(self, taxonomy: Sequence[Tuple[str, Sequence[str]]] = INDUSTRY_TAXONOMY,
+                 cache_size: int = 8192):
+        self.categories = [name for name, _ in taxonomy]
+        self._term_priority: Dict[str, int] = {}
+        for priority, (_, terms) in enumerate(taxonomy):
+            for term in terms:
+                self._term_priority.setdefault(term.lower(), priority)
+
+        self._pattern = re.compile(r'\b(' + _trie_pattern(self._term_priority) + r')s?\b')
+        self._classify_cached = lru_cache(maxsize=cache_size)(self._classify)
+
+    def _classify(self, text: str) -> str:
+        matches = self._pattern.findall(text)
+        if not matches:
+            return OTHER_INDUSTRY
+        return self.categories[min(self._term_priority[term] for term in matches)]
+
+    def classify(self, text: str) -> str:
+        """Return the taxonomy category for a piece of text"""
+        if not text:
+            return OTHER_INDUSTRY
+        return self._classify_cached(text.lower().strip())
+
+    def classify_many(self, texts: Iterable[str]) -> List[str]:
+        """Classify a batch of texts, reusing results for repeated values"""
+        return [self.classify(text) for text in texts]
+
+    def cache_info(self):
+        return self._classify_cached.cache_info()
+
+
+_default_classifier = IndustryClassifier()
+
+
+def classify_industry(text: str) -> str:
+    """Classify text with the shared taxonomy"""
+    return _default_classifier.classify(text)
+
+
+def classify_industries(texts: Iterable[str]) -> List[str]:
+    """Batch version of classify_industry"""
+    return _default_classifier.classify_many(texts)
@@ -0,0 +1,128 @@
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..database.keyword_query import FIELD_WEIGHTS, WORD, KeywordQuery
+
+Phrase = Tuple[str, ...]
+
+
+def _normalize(text: Optional[str]) -> str:
+    """The text as its lowercase words, each preceded by one space"""
+    return ''.join(' ' + word for word in WORD.findall((text or '').lower()))
+
+
+class CompiledQuery:
+    """A KeywordQuery as the scanner's phrase ids: one set per keyword group, one for exclusions"""
+
+    __slots__ = ('groups', 'exclude', 'fields', 'match_all')
+
+    def __init__(self, groups: List[int], exclude: Set[int], fields: Tuple[str, ...], match_all: bool):
+        self.groups = groups
+        self.exclude = exclude
+        self.fields = fields
+        self.match_all = match_all
+
+
+class KeywordScanner:
+    """
+    An Aho–Corasick automaton over the keyword and exclusion phrases of many alerts.
+    Each listing field is scanned once for every phrase at the same time, giving the
+    set of phrase ids it contains; every alert's query is then evaluated on those sets.
+
+    Text is scanned as its words joined by single spaces, and every phrase is anchored
+    with a leading space, so a phrase matches at a word start and its last word matches
+    as a prefix, like KeywordQuery.score.
+    """
+
+    def __init__(self, queries: Iterable[KeywordQuery] = ()):
+        self._phrase_ids: Dict[Phrase, int] = {}
+        self._goto: List[Dict[str, int]] = [{}]
+        self._outputs: List[Set[int]] = [set()]
+        self._built = True
+        for query in queries:
+            self.compile(query)
+
+    def __len__(self) -> int:
+        return len(self._phrase_ids)
+
+    def _phrase_id(self, words: List[str]) -> int:
+        phrase = tuple(words)
+        phrase_id = self._phrase_ids.get(phrase)
+        if phrase_id is None:
+            phrase_id = self._phrase_ids[phrase] = len(self._phrase_ids)
+            self._insert(' ' + ' '.join(phrase), phrase_id)
+        return phrase_id
+
+    def compile(self, query: KeywordQuery) -> CompiledQuery:
+        """Add the query's phrases to the automaton; phrases shared between alerts get one id"""
+        groups = list(dict.fromkeys(self._phrase_id(words) for words in query._grouped()))
+        exclude = {self._phrase_id(words) for words in query.exclude}
+        return CompiledQuery(groups, exclude, query.fields, query.match_type != 'any')
+
+    # Automaton
+
+    def _insert(self, pattern: str, phrase_id: int):
+        state = 0
+        for char in pattern:
+            following = self._goto[state].get(char)
+            if following is None:
+                following = len(self._goto)
+                self._goto[state][char] = following
+                self._goto.append({})
+                self._outputs.append(set())
+            state = following
+        self._outputs[state].add(phrase_id)
+        self._built = False
+
+    def _build(self):
+        """Failure links by breadth-first search, folding each state's suffix outputs into it"""
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in self._goto[state].items():
+                queue.append(following)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[following] = target if target != following else 0
+                self._outputs[following] |= self._outputs[self._fail[following]]
+        self._built = True
+
+    def _scan_text(self, text: str) -> Set[int]:
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        hits: Set[int] = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if outputs[state]:
+                hits |= outputs[state]
+        return hits
+
+    def scan(self, texts: Dict[str, Optional[str]]) -> Dict[str, Set[int]]:
+        """The phrase ids found in each field ('title', 'description', 'location')"""
+        if not self._built:
+            self._build()
+        return {f: self._scan_text(_normalize(texts.get(f))) for f in FIELD_WEIGHTS}
+
+    # Evaluation
+
+    @staticmethod
+    def score(compiled: CompiledQuery, hits: Dict[str, Set[int]]) -> Optional[int]:
+        """
+        KeywordQuery.score from a scan's hit sets: None when an exclusion is found, 0
+        when the query does not match, otherwise the score with title hits counting double.
+        """
+        found = set().union(*(hits[f] for f in compiled.fields))
+        if compiled.exclude & found:
+            return None
+        matched = found.intersection(compiled.groups)
+        if not matched or (compiled.match_all and len(matched) < len(compiled.groups)):
+            return 0
+        return sum(
+            (2 if f == 'title' else 1) * len(matched & hits[f])
+            for f in compiled.fields
+        )
@@ -6,7 +6,8 @@ import time
 import json
 from datetime import datetime
 import os
-from backend.src.database.supabase_db import SupabaseClient
+from backend.src.database.storage import get_storage_backend
+from backend.src.database.listing_record import Listing
 from backend.src.services.listing_page_scraper import ListingPageScraper
 
 class ListingDetailsScraper:
@@ -18,7 +19,7 @@ class ListingDetailsScraper:
             'premium': 'true',
             'country_code': 'us'
         }
-        self.supabase = SupabaseClient()
+        self.supabase = get_storage_backend()
         self.page_scraper = ListingPageScraper()
 
     def enrich_listings(self, listings: List[Dict]) -> List[Dict]:
@@ -33,7 +34,7 @@ class ListingDetailsScraper:
                 detailed_info = self.scrape_listing_details(listing['listing_url'])
                 
                 # Merge the detailed info with the original listing
-                enriched_listing = {
+                enriched_listing = Listing.from_dict({
                     'title': listing['title'],
                     'listing_url': listing['listing_url'],
                     'source_platform': listing.get('source_platform', ''),
@@ -43,12 +44,12 @@ class ListingDetailsScraper:
                     'industry': listing.get('industry', ''),
                     'location': listing.get('location', 'United States'),
                     'description': detailed_info.get('full_description', ''),
-                    'business_highlights': json.dumps(detailed_info.get('business_highlights', {})),
-                    'financial_details': json.dumps(detailed_info.get('financial_details', {})),
-                    'business_details': json.dumps(detailed_info.get('business_details', {})),
-                    'raw_data': json.dumps(listing),  # Store complete original data
+                    'business_highlights': detailed_info.get('business_highlights', {}),
+                    'financial_details': detailed_info.get('financial_details', {}),
+                    'business_details': detailed_info.get('business_details', {}),
+                    'raw_data': listing,  # Store complete original data
                     'status': 'active'
-                }
+                })
 
                 # Store in Supabase and get the ID
                 try:
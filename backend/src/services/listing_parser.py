@@ -2,27 +2,56 @@ from openai import OpenAI
 from typing import Dict, Optional
 from config.config import OPENAI_API_KEY
 import json
-from backend.src.database.supabase_db import SupabaseClient
+from backend.src.database.storage import get_storage_backend
+from backend.src.database.listing_record import Listing
+from backend.src.services.rule_based_parser import RuleBasedListingParser, ParsePathStats
+from backend.src.services.prompt_builder import PromptBuilder, log_prompt_tokens
+from backend.src.services.industry_classifier import classify_industry
+
+# Platforms whose card layout the rule-based parser understands
+RULE_BASED_PLATFORMS = {'WebsiteClosers'}
 
 class ListingParser:
     def __init__(self):
         self.client = OpenAI(api_key=OPENAI_API_KEY)
-        self.supabase = SupabaseClient()
-        
+        self.supabase = get_storage_backend()
+        self.rule_parser = RuleBasedListingParser(self._extract_industry)
+        self.stats = ParsePathStats('ListingParser')
+
     def parse_listing(self, listing_data: Dict) -> Optional[Dict]:
         """
         Use OpenAI to parse listing data into structured format matching our Supabase schema
         """
         try:
+            # Recognized card layouts are parsed deterministically; GPT only handles the rest
+            if listing_data.get('source_platform') in RULE_BASED_PLATFORMS:
+                storage_data, confidence = self.rule_parser.parse_website_closers(listing_data)
+                if storage_data and self.rule_parser.is_confident(confidence):
+                    self.stats.record('rules')
+                    print(f"\n⚡ Parsed listing without LLM (confidence {confidence:.2f}): {storage_data['title']}")
+                    return self._store_listing(storage_data)
+                print(f"\n🤖 Low rule-based confidence ({confidence:.2f}), falling back to GPT")
+
             # Extract text content from elements for OpenAI
             content = {
                 'title': listing_data['title_elem'].text.strip() if listing_data['title_elem'] else '',
                 'price': listing_data['price_elem'].get_text(' ', strip=True) if listing_data['price_elem'] else '',
                 'ebitda': listing_data['cash_flow_elem'].get_text(' ', strip=True) if listing_data['cash_flow_elem'] else '',
+                'revenue': listing_data['revenue_elem'].get_text(' ', strip=True) if listing_data.get('revenue_elem') else '',
                 'description': listing_data['description_elem'].get_text(' ', strip=True) if listing_data['description_elem'] else '',
                 'full_text': listing_data['raw_text']
             }
 
+            # Card fields are kept verbatim; the full text only contributes what they don't repeat
+            listing_section = PromptBuilder()\
+                .add_field('Title', content['title'])\
+                .add_field('Price Information', content['price'])\
+                .add_field('EBITDA (Cash Flow)', content['ebitda'])\
+                .add_field('Revenue', content['revenue'])\
+                .add_text('Description', content['description'])\
+                .add_text('Full Text', content['full_text'])\
+                .build()
+
             prompt = f"""You are a business listing data parser. Extract structured information from this business listing.
             Focus on accurate extraction of financial figures, removing any currency symbols and converting to plain numbers.
             If a value is a range, use the lower number. If a value is not found, use 0 for numeric fields or empty string for text fields.
@@ -41,11 +70,7 @@ class ListingParser:
             - description: string (use empty string if not found)
 
             Listing Information:
-            Title: {content['title']}
-            Price Information: {content['price']}
-            EBITDA (Cash Flow): {content['ebitda']}
-            Description: {content['description']}
-            Full Text: {content['full_text'][:1500]}
+{listing_section}
 
             Parse this content according to the schema, ensuring:
             1. All financial figures are pure numbers (no symbols or text)
@@ -121,10 +146,12 @@ class ListingParser:
                 ],
                 temperature=0
             )
+            log_prompt_tokens('ListingParser', prompt, response)
 
             # Parse the response
             parsed_data = json.loads(response.choices[0].message.content)
-            
+            self.stats.record('llm')
+
             # Ensure required fields exist with default values
             parsed_data = {
                 'title': parsed_data.get('title', content['title'] or 'Untitled Listing'),
@@ -140,7 +167,7 @@ class ListingParser:
             }
 
             # Format data for Supabase storage
-            storage_data = {
+            storage_data = Listing.from_dict({
                 'title': parsed_data['title'],
                 'asking_price': parsed_data['asking_price'],
                 'revenue': parsed_data.get('revenue', 0),
@@ -148,34 +175,40 @@ class ListingParser:
                 'industry': parsed_data.get('industry', ''),
                 'location': parsed_data.get('location', 'United States'),
                 'description': parsed_data['description'],
-                'business_highlights': json.dumps(parsed_data.get('business_highlights', {})),
-                'financial_details': json.dumps(parsed_data.get('financial_details', {})),
-                'business_details': json.dumps(parsed_data.get('business_details', {})),
+                'business_highlights': parsed_data.get('business_highlights', {}),
+                'financial_details': parsed_data.get('financial_details', {}),
+                'business_details': parsed_data.get('business_details', {}),
                 'listing_url': listing_data['listing_url'],
                 'source_platform': listing_data['source_platform'],
-                'raw_data': json.dumps({
+                'raw_data': {
                     'html': listing_data['raw_html'],
                     'text': listing_data['raw_text'],
                     'parsed_data': parsed_data
-                }),
+                },
                 'status': 'active'
-            }
+            })
 
-            # Store in Supabase
-            try:
-                listing_id = self.supabase.store_listing(storage_data)
-                storage_data['id'] = listing_id
-                print(f"Successfully stored listing in Supabase with ID: {listing_id}")
-            except Exception as e:
-                print(f"Error storing listing in Supabase: {e}")
-                # Continue even if storage fails
-            
-            return storage_data
+            return self._store_listing(storage_data)
 
         except Exception as e:
             print(f"Error parsing listing: {e}")
             return None
 
+    def _store_listing(self, storage_data: Dict) -> Dict:
+        """Store a parsed listing in Supabase, continuing even if storage fails"""
+        try:
+            listing_id = self.supabase.store_listing(storage_data)
+            storage_data['id'] = listing_id
+            print(f"Successfully stored listing in Supabase with ID: {listing_id}")
+        except Exception as e:
+            print(f"Error storing listing in Supabase: {e}")
+
+        return storage_data
+
+    def _extract_industry(self, title: str) -> str:
+        """Extract industry from listing title"""
+        return classify_industry(title)
+
     def _clean_number(self, value: str) -> int:
         """Convert string numbers to integers, handling K/M/B suffixes"""
         try:
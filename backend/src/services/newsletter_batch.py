@@ -0,0 +1,227 @@
+import json
+from collections import defaultdict
+from datetime import datetime, UTC
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..database.keyword_query import FIELD_WEIGHTS, KeywordQuery, term_frequencies
+from ..database.storage import ListingCursor
+from .alert_batch import BatchAlertEvaluator, ListingColumns
+from .alert_index import CompiledAlert, compile_alert
+from .keyword_scanner import CompiledQuery, KeywordScanner
+from .term_index import TermIndex
+
+
+def _stored_frequencies(row: Dict) -> Optional[Dict]:
+    """A candidate's stored term frequencies; rows written as JSON text hold a string"""
+    value = row.get('term_frequencies')
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    return value if isinstance(value, dict) else None
+
+
+class CandidateCorpus:
+    """
+    BM25F statistics over every newsletter candidate up to a high-water mark. Keyword
+    alerts are ranked against this one corpus whichever path matches them (batch or
+    per-alert query), so the same listings make the sections either way. Documents
+    are numbered in the order they are added; candidates are added newest first.
+    """
+
+    # What a candidate's term frequencies are read, or for older rows computed, from
+    COLUMNS = 'id,created_at,title,description,location,term_frequencies'
+
+    def __init__(self):
+        self.term_index = TermIndex()
+        self.docs: Dict[str, int] = {}
+
+    def add(self, row: Dict) -> int:
+        doc = self.docs[row['id']] = len(self.docs)
+        # Listings stored before term frequencies were recorded are counted here
+        self.term_index.add(doc, _stored_frequencies(row) or term_frequencies(row))
+        return doc
+
+    def load(self, db, filters: Sequence[Tuple] = ()) -> 'CandidateCorpus':
+        """Add the candidates passing filters, newest first"""
+        for row in db.stream_rows(db.NEWSLETTER_CANDIDATES, self.COLUMNS, filters=list(filters), descending=True):
+            self.add(row)
+        return self
+
+    @classmethod
+    def up_to(cls, db, until: Optional[ListingCursor]) -> 'CandidateCorpus':
+        """The corpus of every candidate up to `until`, or of all of them"""
+        return cls().load(db, [('until', 'created_at', until)] if until is not None else [])
+
+    def top(self, listings: List[Dict], query: KeywordQuery, limit: int) -> List[Dict]:
+        """
+        The limit listings scoring highest for the query, newest first. Among equal
+        scores the newest win, as in NewsletterBatch._top.
+        """
+        scores = self.term_index.scores(query)
+        newest = sorted(listings, key=lambda row: (row['created_at'], row['id']), reverse=True)
+        relevance = [scores[self.docs[row['id']]] if row['id'] in self.docs else 0.0 for row in newest]
+        best = sorted(range(len(newest)), key=lambda i: -relevance[i])[:limit]
+        return [newest[i] for i in sorted(best)]
+
+
+class NewsletterBatch:
+    """
+    Newsletter matches for many alerts from one read of the candidates. The candidates
+    from the earliest start among the alerts (listing cursor, or cutoff) are fetched
+    once, newest first; ranges, industries and starts are evaluated for all alerts with
+    BatchAlertEvaluator, and each listing's text is scanned once for every alert's
+    keywords. high_water is the newest candidate read, which the alerts' cursors
+    advance to once their newsletters are sent.
+
+    For each alert the result is the {'exact_matches', 'other_matches'} that
+    get_matching_listings returns, each section newest first. Keyword matches are
+    ranked by BM25F over the CandidateCorpus of every candidate up to high_water, as
+    get_matching_listings ranks them, and so are the other listings of a keyword alert
+    (partial matches of an 'all' alert first); alerts without keywords get the newest
+    listings.
+    """
+
+    def __init__(self, db, alerts: Sequence[Dict], limit: int = 10, now: Optional[datetime] = None):
+        self.db = db
+        self.alerts = list(alerts)
+        self.limit = limit
+        self.now = now or datetime.now(UTC)
+        self._output_columns = [name.strip() for name in db.LISTING_MATCH_COLUMNS.split(',')]
+
+        self.scanner = KeywordScanner()
+        self.compiled: Dict[str, CompiledAlert] = {}
+        self.keyword_queries: Dict[str, Optional[KeywordQuery]] = {}
+        self.queries: Dict[str, Optional[CompiledQuery]] = {}
+        for alert in self.alerts:
+            compiled = self.compiled[alert['id']] = compile_alert(alert)
+            query = self.keyword_queries[alert['id']] = compiled.keywords
+            self.queries[alert['id']] = self.scanner.compile(query) if query else None
+
+        self.rows: List[Dict] = []
+        self.listings: Optional[ListingColumns] = None
+        self._field_hits: Dict[str, np.ndarray] = {}
+        self.corpus = CandidateCorpus()
+        self.high_water: Optional[ListingCursor] = None
+        self.distinct_criteria = 0
+
+    def load(self) -> 'NewsletterBatch':
+        """
+        Fetch the candidates once and scan their text. For keyword alerts their term
+        frequencies are indexed, with those of the older candidates, into the corpus.
+        """
+        if not self.alerts:
+            self.listings = ListingColumns([])
+            return self
+        widest = min(compiled.start(self.now)[0] for compiled in self.compiled.values())
+        # Inclusive, since listings created with a cursor's timestamp can still be past it
+        self.rows = list(self.db.stream_rows(
+            self.db.NEWSLETTER_CANDIDATES,
+            self.db.LISTING_MATCH_COLUMNS + ',business_age,number_of_employees,term_frequencies',
+            filters=[('gte', 'created_at', widest.isoformat())],
+            descending=True
+        ))
+        self.listings = ListingColumns(self.rows)
+        if self.rows:
+            self.high_water = (self.rows[0]['created_at'], self.rows[0]['id'])
+
+        if any(self.queries.values()):
+            # phrase x listing hit matrices, one per field
+            self._field_hits = {f: np.zeros((len(self.scanner), len(self.rows)), dtype=bool) for f in FIELD_WEIGHTS}
+            for i, row in enumerate(self.rows):
+                for f, phrase_ids in self.scanner.scan(row).items():
+                    if phrase_ids:
+                        self._field_hits[f][list(phrase_ids), i] = True
+                self.corpus.add(row)
+            # Older candidates only count towards the corpus statistics
+            self.corpus.load(self.db, [('lt', 'created_at', widest.isoformat())])
+        print(f"📦 Loaded {len(self.rows)} candidates created after {widest.isoformat()} for {len(self.alerts)} alerts")
+        return self
+
+    def _keyword_vectors(self, query: CompiledQuery):
+        """(excluded, matched) over the candidates for one keyword query"""
+        size = len(self.rows)
+        found = np.zeros((len(query.groups), size), dtype=bool)
+        excluded = np.zeros(size, dtype=bool)
+        exclude = list(query.exclude)
+        for f in query.fields:
+            found |= self._field_hits[f][query.groups]
+            if exclude:
+                excluded |= self._field_hits[f][exclude].any(axis=0)
+        matched = found.all(axis=0) if query.match_all else found.any(axis=0)
+        return excluded, matched
+
+    def _listing(self, index: int) -> Dict:
+        row = self.rows[index]
+        return {column: row.get(column) for column in self._output_columns}
+
+    def _top(self, rows: np.ndarray, relevance: np.ndarray) -> np.ndarray:
+        """The most relevant rows, back in newest-first order"""
+        # Rows are newest first, so a stable sort keeps the newest among equal scores
+        best = rows[np.argsort(-relevance[rows], kind='stable')][:self.limit]
+        return np.sort(best)
+
+    def _shared(self, alert: CompiledAlert, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        """(keyword matches, other listings, relevance) for one criteria set, before starts"""
+        query = self.queries[alert.alert_id]
+        if query is None:
+            return np.array([], dtype=np.int64), np.flatnonzero(mask), None
+        excluded, matched = self._keyword_vectors(query)
+        mask = mask & ~excluded
+        relevance = self.corpus.term_index.scores(alert.keywords)
+        return np.flatnonzero(mask & matched), np.flatnonzero(mask & ~matched), relevance
+
+    def _sections(self, shared: Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]],
+                  alert: CompiledAlert) -> Dict[str, List[Dict]]:
+        """One alert's sections from its criteria set's rows, keeping those past its start"""
+        exact, other, relevance = shared
+        start = alert.start(self.now)
+        exact = exact[self.listings.newer_than(start, exact)]
+        other = other[self.listings.newer_than(start, other)]
+        if relevance is None:
+            other = other[:self.limit]
+        else:
+            exact, other = self._top(exact, relevance), self._top(other, relevance)
+        return {
+            'exact_matches': [self._listing(i) for i in exact],
+            'other_matches': [self._listing(i) for i in other],
+        }
+
+    def _start_order(self, alert: CompiledAlert) -> Tuple:
+        """Sort key putting the earliest start first; a cutoff comes after every id at its time"""
+        at, after_id = alert.start(self.now)
+        return at, after_id is None, after_id or ''
+
+    @property
+    def sharing_ratio(self) -> float:
+        """Alerts per distinct criteria set in the last matches() call"""
+        return len(self.alerts) / self.distinct_criteria if self.distinct_criteria else 1.0
+
+    def matches(self) -> Dict[str, Dict[str, List[Dict]]]:
+        """
+        Each alert's newsletter sections, by alert id. Alerts with the same criteria
+        key are evaluated once, from the group's earliest start, and each alert keeps
+        the rows past its own start.
+        """
+        if self.listings is None:
+            self.load()
+        groups: Dict[Tuple, List[CompiledAlert]] = defaultdict(list)
+        for compiled in self.compiled.values():
+            groups[compiled.criteria_key()].append(compiled)
+        members = list(groups.values())
+        representatives = [min(group, key=self._start_order) for group in members]
+        self.distinct_criteria = len(members)
+
+        evaluator = BatchAlertEvaluator(self.listings, now=self.now)
+        result = {}
+        for start, block in evaluator.evaluate(representatives):
+            for offset, mask in enumerate(block):
+                shared = self._shared(representatives[start + offset], mask)
+                for compiled in members[start + offset]:
+                    result[compiled.alert_id] = self._sections(shared, compiled)
+        print(f"🔁 {len(self.alerts)} alerts share {self.distinct_criteria} distinct criteria sets "
+              f"(sharing ratio {self.sharing_ratio:.2f})")
+        return result
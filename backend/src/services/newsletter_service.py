@@ -1,21 +1,41 @@
 import requests
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import os
 from datetime import datetime, timedelta, UTC
+from itertools import islice
 import sys
 
 # Add the project root to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from src.database.supabase_db import SupabaseClient
+from src.database.storage import ListingCursor, get_storage_backend
+from src.services.alert_index import compile_alert
+from src.services.newsletter_batch import CandidateCorpus, NewsletterBatch
+from src.services.email_delivery import RESEND_BATCH_LIMIT, BatchEmailDelivery, DeliveryResult
+from src.services.email_dispatcher import DEFAULT_RATE_LIMIT, EmailDispatcher
+from src.services.industry_classifier import classify_industry
 import json
 import resend
 
+# Listings shown per newsletter section (exact matches / other matches)
+MAX_LISTINGS_PER_SECTION = 10
+
 class NewsletterService:
     def __init__(self):
         self.from_email = os.getenv('RESEND_FROM_EMAIL', 'alerts@dealsight.co')
         resend.api_key = os.getenv('RESEND_API_KEY')
-        self.db = SupabaseClient()
+        self.db = get_storage_backend()
+        # Match all alerts from one read of the candidates instead of a query per alert
+        self.batch_mode = os.getenv('NEWSLETTER_BATCH_MODE', 'true').lower() == 'true'
+        # Emails per Resend batch request; 1 sends each newsletter as soon as it is rendered
+        self.delivery_batch_size = int(os.getenv('NEWSLETTER_DELIVERY_BATCH_SIZE', str(RESEND_BATCH_LIMIT)))
+        # Queue rendered newsletters in the email outbox and deliver them with the async
+        # dispatcher, so matching never waits on Resend
+        self.outbox = os.getenv('NEWSLETTER_OUTBOX', 'true').lower() == 'true'
+        self.email_rate_limit = float(os.getenv('RESEND_RATE_LIMIT', str(DEFAULT_RATE_LIMIT)))
+        self.email_max_attempts = int(os.getenv('EMAIL_MAX_ATTEMPTS', '5'))
+        # Ranking corpus for per-alert queries, reused while the newest candidate is the same
+        self._corpus: Optional[Tuple[ListingCursor, CandidateCorpus]] = None
         print(f"NewsletterService initialized with from_email: {self.from_email}")
         print(f"Resend API Key available: {'Yes' if resend.api_key else 'No'}")
 
@@ -23,28 +43,34 @@ class NewsletterService:
         """Send personalized newsletters to all users based on their preferences"""
         try:
             # Get all alerts
-            alerts_result = self.db.client.table('alerts')\
-                .select('*, users!inner(*)')\
-                .execute()
+            alerts = self.db.get_alerts_with_users()
                 
-            if not alerts_result.data:
+            if not alerts:
                 print("ℹ️ No alerts found")
                 return
                 
-            print(f"\n📊 Found {len(alerts_result.data)} alerts")
+            print(f"\n📊 Found {len(alerts)} alerts")
+
+            batch = self.get_matching_listings_batch(alerts) if self.batch_mode else None
+            delivery = None
+            if not self.outbox and self.delivery_batch_size > 1:
+                delivery = BatchEmailDelivery(self.delivery_batch_size)
+            delivered = []
+            queued = []
             
             success_count = 0
             error_count = 0
             skipped_count = 0
+            queued_count = 0
             
             # Process each alert
-            for alert in alerts_result.data:
+            for alert in alerts:
                 try:
                     user = alert['users']
                     print(f"\n📧 Processing alert '{alert['name']}' for user: {user['email']}")
                     
                     # Get matching listings for this alert
-                    matching_listings = self.get_matching_listings(alert)
+                    matching_listings, pending_ids, cursor = self.get_alert_matches(alert, batch)
                     
                     if not matching_listings:
                         print(f"ℹ️ Skipping: No matching listings found for alert '{alert['name']}'")
@@ -52,6 +78,38 @@ class NewsletterService:
                         continue
                         
                     print(f"📑 Found {len(matching_listings)} matching listings")
+
+                    if self.outbox:
+                        email = self.outbox_email(
+                            user={'email': user['email'], 'alert': alert},
+                            listings=matching_listings,
+                            pending_ids=pending_ids,
+                            cursor=cursor
+                        )
+                        if email is None:
+                            print(f"❌ Failed to prepare newsletter for {user['email']}")
+                            error_count += 1
+                            continue
+                        queued.append(email)
+                        queued_count += 1
+                        if len(queued) >= RESEND_BATCH_LIMIT:
+                            self.db.enqueue_emails(queued)
+                            queued = []
+                        continue
+
+                    if delivery is not None:
+                        # Rendered now, sent with the next full batch
+                        prepared = self.prepare_newsletter(
+                            user={'email': user['email'], 'alert': alert},
+                            listings=matching_listings
+                        )
+                        if prepared is None:
+                            print(f"❌ Failed to prepare newsletter for {user['email']}")
+                            error_count += 1
+                            continue
+                        log_id, params = prepared
+                        delivered.extend(delivery.add(params, context=(alert, log_id, pending_ids, cursor)))
+                        continue
                     
                     # Send newsletter
                     print(f"📤 Sending newsletter to {user['email']}...")
@@ -66,13 +124,11 @@ class NewsletterService:
                     if email_id:
                         print(f"✅ Newsletter sent successfully to {user['email']}!")
                         success_count += 1
+                        self.mark_matches_sent(alert, pending_ids)
                         
                         try:
-                            # Update last notification sent timestamp
-                            self.db.client.table('alerts')\
-                                .update({'last_notification_sent': datetime.now().isoformat()})\
-                                .eq('id', alert['id'])\
-                                .execute()
+                            # Update last notification sent timestamp and advance the listing cursor
+                            self.db.mark_alert_notified(alert['id'], cursor=cursor)
                         except Exception as e:
                             # If we can't update the timestamp, log it but don't count as an error
                             print(f"⚠️ Could not update last_notification_sent for alert '{alert['name']}': {str(e)}")
@@ -84,20 +140,41 @@ class NewsletterService:
                     print(f"❌ Error processing alert {alert.get('id')}: {str(e)}")
                     error_count += 1
                     continue
+
+            if delivery is not None:
+                delivered.extend(delivery.flush())
+                for result in delivered:
+                    if self.finish_delivery(result):
+                        success_count += 1
+                    else:
+                        error_count += 1
+                print(f"📤 {len(delivered)} newsletters delivered in {delivery.requests} requests")
+
+            if self.outbox:
+                if queued:
+                    self.db.enqueue_emails(queued)
+                print(f"📥 Queued {queued_count} newsletters in the email outbox")
+                stats = self.dispatch_outbox()
+                success_count += stats.get('sent', 0)
+                error_count += stats.get('failed', 0)
             
             # Print summary
             print("\n📊 Newsletter Send Summary")
             print(f"✅ Successfully sent: {success_count}")
             print(f"⚠️ Skipped: {skipped_count}")
             print(f"❌ Errors: {error_count}")
-            print(f"📧 Total processed: {len(alerts_result.data)}")
+            print(f"📧 Total processed: {len(alerts)}")
             
         except Exception as e:
             print(f"❌ Error in send_personalized_newsletters: {str(e)}")
             raise
 
-    def send_newsletter(self, user: dict, listings: list) -> str:
-        """Send a newsletter to a single user"""
+    def prepare_newsletter(self, user: dict, listings: dict) -> Optional[Tuple[str, Dict]]:
+        """
+        Create the newsletter log entry and render the email for a user, without sending
+        it. Returns (log id, Resend email parameters), or None if there is nothing to send
+        or it could not be rendered.
+        """
         try:
             if not user or not user.get('email') or not user.get('alert'):
                 print("❌ Invalid user data provided")
@@ -138,6 +215,21 @@ class NewsletterService:
                 "subject": f"Your {user['alert'].get('name', 'Deal')} Alert",
                 "html": email_content
             }
+            return log_id, params
+
+        except Exception as e:
+            print(f"❌ Error in prepare_newsletter: {str(e)}")
+            print(f"User data: {user}")
+            return None
+
+    def send_newsletter(self, user: dict, listings: list) -> str:
+        """Send a newsletter to a single user"""
+        try:
+            prepared = self.prepare_newsletter(user, listings)
+            if prepared is None:
+                return None
+            log_id, params = prepared
+            alert_id = user['alert'].get('id')
             
             try:
                 # Send email using Resend (synchronously since it doesn't support async)
@@ -153,10 +245,7 @@ class NewsletterService:
                     # Update last_notification_sent timestamp with UTC time
                     try:
                         if alert_id:
-                            self.db.client.table('alerts')\
-                                .update({'last_notification_sent': datetime.now(UTC).isoformat()})\
-                                .eq('id', alert_id)\
-                                .execute()
+                            self.db.mark_alert_notified(alert_id)
                     except Exception as e:
                         print(f"⚠️ Could not update last_notification_sent: {str(e)}")
                     
@@ -180,277 +269,229 @@ class NewsletterService:
             print(f"User data: {user}")
             return None
 
+    def record_newsletter_sent(self, alert: Dict, newsletter_ids: List[str], pending_ids: List[str],
+                               cursor: Optional[ListingCursor]):
+        """Once a newsletter is delivered: its logs, the alert's pending matches, last send and cursor"""
+        for newsletter_id in newsletter_ids:
+            self.db.update_newsletter_status(newsletter_id, 'sent')
+        self.mark_matches_sent(alert, pending_ids)
+        try:
+            # Update last notification sent timestamp and advance the listing cursor
+            self.db.mark_alert_notified(alert['id'], cursor=cursor)
+        except Exception as e:
+            print(f"⚠️ Could not update last_notification_sent for alert '{alert.get('name')}': {str(e)}")
+
+    def finish_delivery(self, result: DeliveryResult) -> bool:
+        """Record the outcome of a newsletter sent through BatchEmailDelivery"""
+        alert, log_id, pending_ids, cursor = result.context
+        email = result.params['to'][0]
+        if not result.sent:
+            print(f"❌ Failed to send newsletter to {email}: {result.error}")
+            self.db.update_newsletter_status(log_id, 'failed', result.error)
+            return False
+
+        print(f"✅ Newsletter sent successfully to {email}! (Email ID: {result.email_id})")
+        self.record_newsletter_sent(alert, [log_id], pending_ids, cursor)
+        return True
+
+    def outbox_email(self, user: dict, listings: dict, pending_ids: List[str], cursor: Optional[ListingCursor],
+                     scheduled_id: str = None) -> Optional[Dict]:
+        """
+        Render a newsletter into an email outbox row, keyed by its newsletter log so it is
+        never queued or delivered twice. The context carries what to record once it is
+        delivered: the logs (and the scheduled newsletter it answers), pending matches and
+        listing cursor. Returns None if there is nothing to send or it could not be rendered.
+        """
+        prepared = self.prepare_newsletter(user, listings)
+        if prepared is None:
+            return None
+        log_id, params = prepared
+        # Queued logs are not pending, so they are not picked up as scheduled newsletters
+        self.db.update_newsletter_status(log_id, 'queued')
+        alert = user['alert']
+        return {
+            'idempotency_key': f"newsletter-{log_id}",
+            'params': params,
+            'context': {
+                'alert_id': alert['id'],
+                'alert_name': alert.get('name'),
+                'newsletter_ids': [log_id] + ([scheduled_id] if scheduled_id else []),
+                'pending_ids': pending_ids,
+                'cursor': list(cursor) if cursor else None,
+            },
+        }
+
+    def _outbox_sent(self, row: Dict, email_id: str):
+        context = row.get('context') or {}
+        print(f"✅ Newsletter sent successfully to {row['params']['to'][0]}! (Email ID: {email_id})")
+        self.record_newsletter_sent(
+            {'id': context['alert_id'], 'name': context.get('alert_name')},
+            context.get('newsletter_ids') or [],
+            context.get('pending_ids') or [],
+            tuple(context['cursor']) if context.get('cursor') else None
+        )
+
+    def _outbox_failed(self, row: Dict, error: str):
+        for newsletter_id in (row.get('context') or {}).get('newsletter_ids') or []:
+            self.db.update_newsletter_status(newsletter_id, 'failed', error)
+
+    def dispatch_outbox(self) -> Dict[str, int]:
+        """Deliver the queued emails that are due, under the provider rate limit"""
+        try:
+            dispatcher = EmailDispatcher(
+                self.db,
+                on_sent=self._outbox_sent,
+                on_failed=self._outbox_failed,
+                rate_limit=self.email_rate_limit,
+                max_attempts=self.email_max_attempts
+            )
+            stats = dispatcher.run()
+            print(f"📤 Outbox: {stats['sent']} sent, {stats['retried']} to retry, {stats['failed']} failed "
+                  f"in {stats['requests']} requests")
+            return stats
+        except Exception as e:
+            print(f"❌ Error dispatching the email outbox: {str(e)}")
+            return {}
+
     def normalize_industry(self, industry: str) -> str:
         """Normalize industry name to match standard categories"""
-        industry = industry.lower().strip()
-        
-        # Software/SaaS/Technology variations
-        if any(term in industry for term in ['saas', 'software', 'tech', 'app', 'plugin', 'extension', 'mobile']):
-            return 'Software/SaaS'
-        
-        # Ecommerce variations
-        elif any(term in industry for term in ['ecommerce', 'e-commerce', 'amazon', 'shopify', 'fba', 'retail', 'commerce']):
-            return 'Ecommerce'
-        
-        # Content/Media variations
-        elif any(term in industry for term in ['content', 'blog', 'media', 'digital', 'youtube', 'social media', 'newsletter', 'advertising', 'entertainment']):
-            return 'Content/Media'
-        
-        # Service variations
-        elif any(term in industry for term in ['service', 'consulting', 'agency', 'services']):
-            return 'Service'
-        
-        # Manufacturing variations
-        elif any(term in industry for term in ['manufacturing', 'factory', 'production']):
-            return 'Manufacturing'
-        
-        # Wholesale/Distribution variations
-        elif any(term in industry for term in ['distribution', 'wholesale']):
-            return 'Wholesale/Distribution'
-        
-        # Education variations
-        elif any(term in industry for term in ['education', 'learning', 'teaching', 'edtech']):
-            return 'Education'
-        
-        # Healthcare variations
-        elif any(term in industry for term in ['health', 'healthcare', 'medical']):
-            return 'Healthcare Services'
-        
-        # Marketing variations
-        elif any(term in industry for term in ['marketing', 'seo', 'ppc', 'advertising']):
-            return 'Marketing'
-        
-        # Renewable Energy variations
-        elif any(term in industry for term in ['renewable', 'energy', 'solar', 'wind']):
-            return 'Renewable Energy'
-        
+        return classify_industry(industry)
+
+    def get_alert_matches(self, alert: Dict,
+                          batch: Optional[Tuple[Dict[str, Dict[str, List[Dict]]], Optional[ListingCursor]]] = None
+                          ) -> Tuple[Dict[str, List[Dict]], List[str], Optional[ListingCursor]]:
+        """
+        The listings to send for an alert, the ids of the pending matches the newsletter
+        covers, and the listing cursor to advance the alert to once it is sent. The
+        listings come from the batch results when given, and otherwise from querying the
+        candidates between the alert's cursor and the newest one.
+        Pending matches routed to the alert during scraping are not read for the sections:
+        the router can miss listings, so only a read from the cursor covers every
+        candidate. Pending matches up to the newest candidate are covered by that read,
+        whether sent, past the section limits or no longer matching, and are cleared
+        with the send; newer ones stay pending for the next newsletter.
+        """
+        if batch is not None and alert['id'] in batch[0]:
+            results, high_water = batch[0][alert['id']], batch[1]
         else:
-            return 'Other'
+            high_water = self.db.newest_candidate()
+            results = self.get_matching_listings(alert, until=high_water)
+        if high_water is None:
+            return results, [], high_water
 
-    def get_matching_listings(self, preferences: Dict) -> Dict[str, List[Dict]]:
-        """Get listings matching the user's preferences, separated into exact matches and other matches"""
+        pending = self.db.get_pending_alert_matches(alert['id'], columns='id,created_at')
+        covered = [row['id'] for row in pending if (row['created_at'], row['id']) <= tuple(high_water)]
+        if covered:
+            print(f"Clearing {len(covered)} pending matches covered by this newsletter")
+        return results, covered, high_water
+
+    def mark_matches_sent(self, alert: Dict, pending_ids: List[str]):
+        """Clear the pending matches a sent newsletter covered"""
+        if not pending_ids:
+            return
+        try:
+            self.db.mark_alert_matches_sent(alert['id'], pending_ids)
+        except Exception as e:
+            print(f"⚠️ Could not clear pending matches for alert '{alert.get('name')}': {str(e)}")
+
+    def get_matching_listings_batch(self, alerts: List[Dict]
+                                    ) -> Optional[Tuple[Dict[str, Dict[str, List[Dict]]], Optional[ListingCursor]]]:
+        """
+        get_matching_listings for every alert from one read of the candidates, by alert id,
+        and the newest candidate read, which the alerts' cursors advance to once sent.
+        Returns None if the batch fails, so callers fall back to per-alert queries.
+        """
+        try:
+            batch = NewsletterBatch(self.db, alerts, limit=MAX_LISTINGS_PER_SECTION)
+            return batch.matches(), batch.high_water
+        except Exception as e:
+            print(f"⚠️ Batch matching failed, querying per alert: {str(e)}")
+            return None
+
+    def candidate_corpus(self, until: Optional[ListingCursor]) -> CandidateCorpus:
+        """The BM25F corpus of the candidates up to `until`, built once per newest candidate"""
+        if until is None:
+            return CandidateCorpus.up_to(self.db, None)
+        if self._corpus is None or self._corpus[0] != tuple(until):
+            self._corpus = (tuple(until), CandidateCorpus.up_to(self.db, until))
+        return self._corpus[1]
+
+    def get_matching_listings(self, preferences: Dict, until: Optional[ListingCursor] = None) -> Dict[str, List[Dict]]:
+        """
+        Get listings matching the user's preferences, separated into exact matches and other
+        matches. Only listings past the alert's cursor (or cutoff) are read, up to `until`.
+        """
         try:
             print("\nBuilding query with filters:")
-            query = self.db.client.table('listings').select('*')
-            
-            # Apply price filters if set
-            if preferences.get('max_price'):
-                print(f"- Max price: {preferences['max_price']}")
-                query = query.lte('asking_price', preferences['max_price'])
-            if preferences.get('min_price'):
-                print(f"- Min price: {preferences['min_price']}")
-                query = query.gte('asking_price', preferences['min_price'])
-            
-            # Apply business age filters
-            if preferences.get('min_business_age') is not None:
-                print(f"- Min business age: {preferences['min_business_age']}")
-                query = query.gte('business_age', preferences['min_business_age'])
-            if preferences.get('max_business_age') is not None:
-                print(f"- Max business age: {preferences['max_business_age']}")
-                query = query.lte('business_age', preferences['max_business_age'])
-
-            # Apply employee filters
-            if preferences.get('min_employees') is not None:
-                print(f"- Min employees: {preferences['min_employees']}")
-                query = query.gte('employees', preferences['min_employees'])
-            if preferences.get('max_employees') is not None:
-                print(f"- Max employees: {preferences['max_employees']}")
-                query = query.lte('employees', preferences['max_employees'])
-
-            # Apply annual revenue filters
-            if preferences.get('min_annual_revenue') is not None:
-                print(f"- Min annual revenue: {preferences['min_annual_revenue']}")
-                query = query.gte('annual_revenue', preferences['min_annual_revenue'])
-            if preferences.get('max_annual_revenue') is not None:
-                print(f"- Max annual revenue: {preferences['max_annual_revenue']}")
-                query = query.lte('annual_revenue', preferences['max_annual_revenue'])
-
-            # Apply EBITDA filters
-            if preferences.get('min_ebitda') is not None:
-                print(f"- Min EBITDA: {preferences['min_ebitda']}")
-                query = query.gte('ebitda', preferences['min_ebitda'])
-            if preferences.get('max_ebitda') is not None:
-                print(f"- Max EBITDA: {preferences['max_ebitda']}")
-                query = query.lte('ebitda', preferences['max_ebitda'])
-
-            # Apply profit margin filters
-            if preferences.get('min_profit_margin') is not None:
-                print(f"- Min profit margin: {preferences['min_profit_margin']}")
-                query = query.gte('profit_margin', preferences['min_profit_margin'])
-            if preferences.get('max_profit_margin') is not None:
-                print(f"- Max profit margin: {preferences['max_profit_margin']}")
-                query = query.lte('profit_margin', preferences['max_profit_margin'])
-
-            # Apply selling multiple filters
-            if preferences.get('min_selling_multiple') is not None:
-                print(f"- Min selling multiple: {preferences['min_selling_multiple']}")
-                query = query.gte('selling_multiple', preferences['min_selling_multiple'])
-            if preferences.get('max_selling_multiple') is not None:
-                print(f"- Max selling multiple: {preferences['max_selling_multiple']}")
-                query = query.lte('selling_multiple', preferences['max_selling_multiple'])
-
-            # Apply industry filters
-            if preferences.get('industries'):
-                # Normalize industries
-                normalized_industries = []
-                for industry in preferences['industries']:
-                    if industry == 'SaaS':
-                        print(f"Normalized industry '{industry}' to 'Software/SaaS'")
-                        normalized_industries.extend(['Software/SaaS', 'Technology'])
-                    elif industry == 'E-commerce':
-                        print(f"Normalized industry '{industry}' to 'Ecommerce'")
-                        normalized_industries.append('Ecommerce')
-                    elif industry in ['Digital Products', 'Content', 'Advertising']:
-                        print(f"Normalized industry '{industry}' to 'Content/Media'")
-                        normalized_industries.append('Content/Media')
-                    elif industry == 'Services':
-                        print(f"Normalized industry '{industry}' to 'Service'")
-                        normalized_industries.append('Service')
-                    elif industry == 'Mobile Apps':
-                        print(f"Normalized industry '{industry}' to 'Software/SaaS'")
-                        normalized_industries.extend(['Software/SaaS', 'Technology'])
-                    else:
-                        normalized_industries.append(industry)
-                
-                # uplicates while preserving order
-                normalized_industries = list(dict.fromkeys(normalized_industries))
-                print(f"Final normalized industries: {normalized_industries}")
-                
-                # Apply industry filter
-                query = query.in_('industry', normalized_industries)
-                print(f"- Industry filter: IN {normalized_industries}")
+            # Criteria are compiled once per alert version and reused across runs
+            alert = compile_alert(preferences)
+
+            # Candidates are the recent active listings, materialized after each scrape.
+            # Range filters (price, business age, employees, revenue, EBITDA, profit margin,
+            # selling multiple), normalized industries and the cursor or cutoff come from the alert
+            now = datetime.now(UTC)
+            cutoff = alert.cutoff(now)
+            filters = alert.filters(now, until)
+            for column, low, high in alert.ranges:
+                print(f"- {column}: {low if low is not None else '-'} to {high if high is not None else '-'}")
+            if alert.industries is not None:
+                print(f"- Industry filter: IN {sorted(alert.industries)}")
             
             # Apply business model filters
             if preferences.get('preferred_business_models'):
                 print(f"- Business models (disabled): {preferences['preferred_business_models']}")
             
-            # Apply time filter based on frequency and last notification
-            last_sent = preferences.get('last_notification_sent')
-            frequency = preferences.get('newsletter_frequency', 'daily')
-            now = datetime.now(UTC)
-            
-            if last_sent:
-                last_sent_dt = datetime.fromisoformat(last_sent.replace('Z', '+00:00'))
-                print(f"- Last notification sent: {last_sent_dt}")
-                
-                # Calculate the time filter based on frequency
-                if frequency == 'daily':
-                    # For daily, use either 24 hours ago or last notification time, whichever is more recent
-                    twenty_four_hours_ago = now - timedelta(hours=24)
-                    cutoff = max(twenty_four_hours_ago, last_sent_dt)
-                    print(f"- Time filter: created_at > {cutoff.isoformat()} (daily - using max of 24h ago or last notification)")
-                elif frequency == 'weekly':
-                    # For weekly, use either 7 days ago or last notification time, whichever is more recent
-                    seven_days_ago = now - timedelta(days=7)
-                    cutoff = max(seven_days_ago, last_sent_dt)
-                    print(f"- Time filter: created_at > {cutoff.isoformat()} (weekly)")
-                else:  # monthly
-                    # For monthly, use either 30 days ago or last notification time, whichever is more recent
-                    thirty_days_ago = now - timedelta(days=30)
-                    cutoff = max(thirty_days_ago, last_sent_dt)
-                    print(f"- Time filter: created_at > {cutoff.isoformat()} (monthly)")
-                
-                query = query.gt('created_at', cutoff.isoformat())
+            print(f"- Last notification sent: {preferences.get('last_notification_sent') or 'Never'}")
+            if alert.cursor is not None:
+                print(f"- Listing cursor: (created_at, id) > {alert.cursor}")
             else:
-                # If no last_sent, use a more lenient cutoff for testing
-                cutoff = now - timedelta(days=30)  # Show last 30 days of listings
-                query = query.gt('created_at', cutoff.isoformat())
-                print(f"- Time filter: created_at > {cutoff.isoformat()} (default 30 days)")
-            
-            # Execute query and get results
-            print("\nExecuting query...")
-            result = query.execute()
+                print(f"- Time filter: created_at > {cutoff.isoformat()} ({preferences.get('newsletter_frequency', 'daily')})")
+            if until is not None:
+                print(f"- Up to newest candidate: {until}")
             
-            if not result.data:
-                print("No listings found matching the query")
-                return {'exact_matches': [], 'other_matches': []}
-
-            # Apply keyword search filters (post-query filtering)
-            listings = result.data
             exact_matches = []
             other_matches = []
 
-            if preferences.get('search_keywords'):
-                search_keywords = preferences['search_keywords']
-                search_match_type = preferences.get('search_match_type', 'any')
-                search_in = preferences.get('search_in', ['title', 'description'])
-                exclude_keywords = preferences.get('exclude_keywords', [])
-                
+            keyword_query = alert.keywords
+            if keyword_query:
                 print(f"\nApplying keyword filters:")
-                print(f"- Keywords: {search_keywords}")
-                print(f"- Match type: {search_match_type}")
-                print(f"- Search in: {search_in}")
-                print(f"- Exclude: {exclude_keywords}")
-                
-                # Calculate search scores for each listing
-                scored_exact_matches = []
-                for listing in listings:
-                    score = 0
-                    matched_keywords = set()
-                    
-                    # Prepare search text based on fields to search in
-                    search_text = ""
-                    if 'title' in search_in:
-                        search_text += f" {listing.get('title', '')}"
-                    if 'description' in search_in:
-                        search_text += f" {listing.get('description', '')}"
-                        search_text += f" {listing.get('full_description', '')}"
-                    if 'location' in search_in:
-                        search_text += f" {listing.get('location', '')}"
-                    
-                    search_text = search_text.lower()
-                    
-                    # Check for excluded keywords first
-                    excluded = False
-                    for keyword in exclude_keywords:
-                        if keyword.lower() in search_text:
-                            excluded = True
-                            break
-                    
-                    if excluded:
-                        continue
-                    
-                    # Check for search keywords
-                    for keyword in search_keywords:
-                        keyword = keyword.lower()
-                        if keyword in search_text:
-                            matched_keywords.add(keyword)
-                            # Give extra weight to title matches
-                            if 'title' in search_in and keyword in listing.get('title', '').lower():
-                                score += 2
-                            else:
-                                score += 1
-                    
-                    # Apply match type rules
-                    include_listing = False
-                    if search_match_type == 'any' and len(matched_keywords) > 0:
-                        include_listing = True
-                    elif search_match_type == 'all' and len(matched_keywords) == len(search_keywords):
-                        include_listing = True
-                    elif search_match_type == 'exact':
-                        # For exact match, check if the exact phrase appears
-                        exact_phrase = ' '.join(search_keywords).lower()
-                        if exact_phrase in search_text:
-                            include_listing = True
-                            score += 3  # Bonus for exact phrase match
-                    
-                    if include_listing:
-                        scored_exact_matches.append((listing, score))
-                    else:
-                        other_matches.append(listing)
-                
-                # Sort exact matches by score (highest first)
-                scored_exact_matches.sort(key=lambda x: x[1], reverse=True)
-                exact_matches = [item[0] for item in scored_exact_matches]
+                print(f"- Keywords: {preferences['search_keywords']}")
+                print(f"- Match type: {keyword_query.match_type}")
+                print(f"- Search in: {list(keyword_query.fields)}")
+                print(f"- Exclude: {preferences.get('exclude_keywords', [])}")
+
+                # Matching and exclusions run in the database's full-text index. Both sections
+                # are ranked by BM25F over the candidate corpus, as in batch mode
+                print("\nExecuting query...")
+                exact_matches = self.db.search_candidates(
+                    self.db.LISTING_MATCH_COLUMNS, filters, keyword_query, matching=True, limit=None
+                )
+                other_matches = self.db.search_candidates(
+                    self.db.LISTING_MATCH_COLUMNS, filters, keyword_query, matching=False, limit=None
+                )
+                corpus = self.candidate_corpus(until)
+                exact_matches = corpus.top(exact_matches, keyword_query, MAX_LISTINGS_PER_SECTION)
+                other_matches = corpus.top(other_matches, keyword_query, MAX_LISTINGS_PER_SECTION)
                 
                 print(f"Found {len(exact_matches)} exact matches and {len(other_matches)} other matches after keyword filtering")
             else:
-                # If no keywords specified, all matches go to other_matches
-                other_matches = listings
+                # If no keywords specified, all matches go to other_matches, newest first
+                print("\nExecuting query...")
+                listings = self.db.stream_rows(
+                    self.db.NEWSLETTER_CANDIDATES,
+                    self.db.LISTING_MATCH_COLUMNS,
+                    filters=filters,
+                    descending=True
+                )
+                other_matches = list(islice(listings, MAX_LISTINGS_PER_SECTION))
+
+            if not exact_matches and not other_matches:
+                print("No listings found matching the query")
+                return {'exact_matches': [], 'other_matches': []}
 
             # Sort both lists by newest first and limit each to 10 listings
-            exact_matches = sorted(exact_matches, key=lambda x: x.get('created_at', ''), reverse=True)[:10]
-            other_matches = sorted(other_matches, key=lambda x: x.get('created_at', ''), reverse=True)[:10]
+            exact_matches = sorted(exact_matches, key=lambda x: x.get('created_at', ''), reverse=True)[:MAX_LISTINGS_PER_SECTION]
+            other_matches = sorted(other_matches, key=lambda x: x.get('created_at', ''), reverse=True)[:MAX_LISTINGS_PER_SECTION]
             
             # Debug: print industries of matched listings
             if exact_matches:
@@ -729,17 +770,14 @@ class NewsletterService:
                 return
                 
             print(f"📋 Found {len(pending_newsletters)} pending newsletters")
+            queued_count = 0
             
             for newsletter in pending_newsletters:
                 try:
                     # Double check status hasn't changed
-                    current = self.db.client.table('newsletter_logs')\
-                        .select('status, sent_at')\
-                        .eq('id', newsletter['id'])\
-                        .single()\
-                        .execute()
+                    current = self.db.get_newsletter_state(newsletter['id'])
                         
-                    if not current.data or current.data['status'] != 'pending' or current.data.get('sent_at'):
+                    if not current or current['status'] != 'pending' or current.get('sent_at'):
                         print(f"⚠️ Newsletter {newsletter['id']} status changed, skipping")
                         continue
                     
@@ -757,13 +795,8 @@ class NewsletterService:
                     alert = None
                     if newsletter.get('alert_id'):
                         print(f"🔍 Fetching alert data...")
-                        alert_result = self.db.client.table('alerts')\
-                            .select('*')\
-                            .eq('id', newsletter['alert_id'])\
-                            .single()\
-                            .execute()
-                        if alert_result.data:
-                            alert = alert_result.data
+                        alert = self.db.get_alert(newsletter['alert_id'])
+                        if alert:
                             print(f"✅ Found alert: {alert.get('name')}")
                             print(f"Alert details:")
                             print(f"- Frequency: {alert.get('newsletter_frequency', 'daily')}")
@@ -777,36 +810,28 @@ class NewsletterService:
 
                     # Get user data
                     print(f"🔍 Fetching user data...")
-                    user_result = self.db.client.table('users')\
-                        .select('*')\
-                        .eq('id', newsletter['user_id'])\
-                        .single()\
-                        .execute()
+                    user = self.db.get_user(newsletter['user_id'])
                         
-                    if not user_result.data:
+                    if not user:
                         error_msg = f"User not found for newsletter {newsletter['id']}"
                         print(f"❌ {error_msg}")
                         self.db.update_newsletter_status(newsletter['id'], 'failed', error_msg)
                         continue
                     
-                    user = user_result.data
                     print(f"✅ Found user: {user.get('email')}")
                     
                     # Get user's preferences/alerts if not already fetched
                     if not alert:
                         print(f"🔍 Fetching user alerts...")
-                        alerts_result = self.db.client.table('alerts')\
-                            .select('*')\
-                            .eq('user_id', user['id'])\
-                            .execute()
+                        user_alerts = self.db.get_user_alerts(user['id'])
                             
-                        if not alerts_result.data:
+                        if not user_alerts:
                             error_msg = f"No alerts found for user {user['email']}"
                             print(f"❌ {error_msg}")
                             self.db.update_newsletter_status(newsletter['id'], 'failed', error_msg)
                             continue
                         
-                        alert = alerts_result.data[0]  # Use the first alert if multiple exist
+                        alert = user_alerts[0]  # Use the first alert if multiple exist
                         print(f"✅ Using alert: {alert.get('name')}")
                         print(f"Alert details:")
                         print(f"- Frequency: {alert.get('newsletter_frequency', 'daily')}")
@@ -815,7 +840,7 @@ class NewsletterService:
 
                     # Get matching listings
                     print(f"\n🔍 Finding matching listings...")
-                    matching_listings = self.get_matching_listings(alert)
+                    matching_listings, pending_ids, cursor = self.get_alert_matches(alert)
                     
                     # Check if there are any matches
                     exact_matches = matching_listings.get('exact_matches', [])
@@ -824,16 +849,32 @@ class NewsletterService:
                         skip_msg = f"No matching listings found for alert '{alert['name']}' since last notification at {alert.get('last_notification_sent', 'Never')}"
                         print(f"ℹ️ {skip_msg}")
                         self.db.update_newsletter_status(newsletter['id'], 'skipped', skip_msg)
-                        # Update last notification sent timestamp even when skipped
-                        self.db.client.table('alerts')\
-                            .update({'last_notification_sent': datetime.now(UTC).isoformat()})\
-                            .eq('id', alert['id'])\
-                            .execute()
+                        # Update last notification sent timestamp and cursor even when skipped
+                        self.db.mark_alert_notified(alert['id'], cursor=cursor)
                         print(f"✅ Updated last notification timestamp for alert")
                         continue
                     
                     print(f"✅ Found {len(exact_matches)} exact matches and {len(other_matches)} other matches")
                     
+                    if self.outbox:
+                        # Delivered by the dispatcher below, which marks the newsletter sent
+                        email = self.outbox_email(
+                            user={'email': user['email'], 'alert': alert},
+                            listings=matching_listings,
+                            pending_ids=pending_ids,
+                            cursor=cursor,
+                            scheduled_id=newsletter['id']
+                        )
+                        if email is None:
+                            error_msg = f"Failed to prepare newsletter for {user['email']}"
+                            print(f"❌ {error_msg}")
+                            self.db.update_newsletter_status(newsletter['id'], 'failed', error_msg)
+                            continue
+                        self.db.enqueue_emails([email])
+                        queued_count += 1
+                        print(f"📥 Queued newsletter for {user['email']}")
+                        continue
+
                     # Send the newsletter
                     print(f"\n📤 Sending newsletter to {user['email']}...")
                     email_id = self.send_newsletter(
@@ -843,11 +884,9 @@ class NewsletterService:
                     
                     if email_id:
                         print(f"✅ Newsletter sent successfully! (Email ID: {email_id})")
-                        # Update last notification sent timestamp
-                        self.db.client.table('alerts')\
-                            .update({'last_notification_sent': datetime.now(UTC).isoformat()})\
-                            .eq('id', alert['id'])\
-                            .execute()
+                        self.mark_matches_sent(alert, pending_ids)
+                        # Update last notification sent timestamp and advance the listing cursor
+                        self.db.mark_alert_notified(alert['id'], cursor=cursor)
                         print(f"✅ Updated last notification timestamp for alert")
                         # Update newsletter status to sent
                         self.db.update_newsletter_status(newsletter['id'], 'sent')
@@ -862,6 +901,9 @@ class NewsletterService:
                     print(f"❌ {error_msg}")
                     self.db.update_newsletter_status(newsletter['id'], 'failed', error_msg)
                     continue
+
+            if queued_count:
+                self.dispatch_outbox()
                     
         except Exception as e:
             print(f"❌ Error processing scheduled newsletters: {str(e)}")
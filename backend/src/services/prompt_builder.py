@@ -0,0 +1,130 @@
+import re
+from typing import List, Optional, Tuple
+
+# Default budget for the listing content part of a parser prompt
+DEFAULT_TOKEN_BUDGET = 1200
+
+# Page chrome that scraped listing text picks up from headers, footers and sidebars
+BOILERPLATE_PATTERN = re.compile(
+    r'\b(?:cookies?|privacy policy|terms (?:of (?:service|use)|and conditions)|all rights reserved|'
+    r'skip to (?:main )?content|sign (?:up|in)|log ?in|log ?out|create an account|subscribe|'
+    r'follow us|share (?:this|on)|contact us|back to (?:top|listings)|view all listings|'
+    r'read more|toggle navigation|main menu|search listings|request info|download nda)\b',
+    re.IGNORECASE
+)
+NAV_WORDS = {
+    'home', 'about', 'blog', 'contact', 'listings', 'buy', 'sell', 'resources', 'faq', 'menu',
+    'login', 'register', 'search', 'careers', 'team', 'services', 'pricing', 'next', 'previous'
+}
+SEGMENT_SPLIT = re.compile(r'(?<=[.!?])\s+|\s*[|\n\r\t•]\s*|\s{3,}')
+TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+# Segments at least this long are treated as content even if they mention boilerplate terms
+MIN_CONTENT_WORDS = 12
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap local estimate of the model token count: one token per word or symbol,
+    plus one for every further 6 characters of long words, which BPE splits up
+    """
+    if not text:
+        return 0
+    return sum(1 + (len(token) - 1) // 6 for token in TOKEN_PATTERN.findall(text))
+
+
+def _normalize(segment: str) -> str:
+    return ' '.join(TOKEN_PATTERN.findall(segment.lower()))
+
+
+def _is_boilerplate(segment: str) -> bool:
+    words = segment.split()
+    if len(words) >= MIN_CONTENT_WORDS:
+        return False
+    if BOILERPLATE_PATTERN.search(segment):
+        return True
+    # Runs of short navigation labels ("Home About Listings Contact")
+    lowered = [word.strip('.,:').lower() for word in words]
+    return bool(lowered) and sum(word in NAV_WORDS for word in lowered) / len(lowered) >= 0.5
+
+
+def clean_listing_text(text: str, seen: Optional[set] = None) -> List[str]:
+    """
+    Split scraped listing text into segments, dropping navigation/boilerplate
+    and any segment already seen (in this text or in earlier prompt sections)
+    """
+    seen = seen if seen is not None else set()
+    segments = []
+    for segment in SEGMENT_SPLIT.split(text or ''):
+        segment = segment.strip()
+        if not segment or _is_boilerplate(segment):
+            continue
+        key = _normalize(segment)
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        segments.append(segment)
+    return segments
+
+
+class PromptBuilder:
+    """
+    Assembles the listing part of a parser prompt. Short labelled fields are always
+    kept; long free text is cleaned, deduplicated against those fields and cut at
+    a segment boundary so the whole listing section fits the token budget.
+    """
+
+    def __init__(self, token_budget: int = DEFAULT_TOKEN_BUDGET):
+        self.token_budget = token_budget
+        self.fields: List[Tuple[str, str]] = []
+        self.free_text: List[Tuple[str, str]] = []
+
+    def add_field(self, label: str, value: str) -> 'PromptBuilder':
+        value = ' '.join((value or '').split())
+        if value:
+            self.fields.append((label, value))
+        return self
+
+    def add_text(self, label: str, text: str) -> 'PromptBuilder':
+        if text:
+            self.free_text.append((label, text))
+        return self
+
+    def build(self) -> str:
+        seen = set()
+        lines = []
+        for label, value in self.fields:
+            # A field that only repeats an earlier one adds tokens but no information
+            key = _normalize(value)
+            if key in seen:
+                continue
+            seen.add(key)
+            seen.update(_normalize(segment) for segment in clean_listing_text(value))
+            lines.append(f"{label}: {value}")
+
+        remaining = self.token_budget - estimate_tokens('\n'.join(lines))
+        for label, text in self.free_text:
+            kept = []
+            header_tokens = estimate_tokens(f"{label}: ")
+            for segment in clean_listing_text(text, seen):
+                cost = estimate_tokens(segment) + 1
+                if cost + header_tokens > remaining:
+                    break
+                kept.append(segment)
+                remaining -= cost
+            if kept:
+                remaining -= header_tokens
+                lines.append(f"{label}: {' '.join(kept)}")
+
+        return '\n'.join(lines)
+
+
+def log_prompt_tokens(parser_name: str, prompt: str, response=None) -> int:
+    """Print the estimated prompt size and, when available, the API-reported usage"""
+    estimated = estimate_tokens(prompt)
+    usage = getattr(response, 'usage', None) if response is not None else None
+    if usage is not None:
+        print(f"🧮 {parser_name} tokens: ~{estimated} estimated, "
+              f"{usage.prompt_tokens} prompt / {usage.completion_tokens} completion")
+    else:
+        print(f"🧮 {parser_name} prompt tokens: ~{estimated} estimated")
+    return estimated
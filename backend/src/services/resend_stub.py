@@ -0,0 +1,201 @@
+"""
+A local stand-in for the Resend email API, for tests, benchmarks and development runs
+that should not send real email. It serves POST /emails and POST /emails/batch with
+Resend's request and response shapes, keeps the accepted emails in memory and can add
+a fixed latency per request to model the provider's response time.
+
+Recipients at a rejected domain fail validation; like Resend, a batch containing one
+is rejected as a whole. Like the real API, it can enforce a requests-per-second rate
+limit (429 with Retry-After) and replays the response of a request whose
+Idempotency-Key it has already accepted instead of sending again. To exercise retries
+it can fail the next requests with a 500, before or after accepting their emails (a
+response lost on the way back).
+
+Usage:
+    python -m src.services.resend_stub [--port 8025] [--latency 0.05] [--rate-limit 2]
+    RESEND_API_URL=http://127.0.0.1:8025 python run.py
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Kept in step with email_delivery.RESEND_BATCH_LIMIT
+BATCH_LIMIT = 100
+
+
+class ResendStub:
+    """
+    The stub server, run on a background thread. Point resend.api_url (or the
+    RESEND_API_URL environment variable, read when resend is imported) at `url`.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 rejected_domains: Iterable[str] = ('invalid.test',), rate_limit: Optional[float] = None):
+        self.latency = latency
+        self.rejected_domains = set(rejected_domains)
+        self.rate_limit = rate_limit
+        self.emails: List[Dict] = []
+        self.requests = 0
+        self.rate_limited = 0
+        self.replayed = 0
+        # Requests still to fail with a 500, and to accept but answer with a 500
+        self.failures = 0
+        self.lost_responses = 0
+        self._recent = deque()
+        self._responses: Dict[Tuple[str, str], Dict] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'ResendStub':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'ResendStub':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _invalid(self, email) -> Optional[str]:
+        """Why Resend would reject an email, or None if it is accepted"""
+        if not isinstance(email, dict):
+            return 'Each email must be an object'
+        for field in ('from', 'to', 'subject'):
+            if not email.get(field):
+                return f"Missing `{field}` field"
+        recipients = email['to'] if isinstance(email['to'], list) else [email['to']]
+        for recipient in recipients:
+            if recipient.rsplit('@', 1)[-1] in self.rejected_domains:
+                return f"Invalid `to` field: {recipient}"
+        return None
+
+    def _accept(self, email: Dict) -> Dict:
+        email_id = str(uuid.uuid4())
+        with self._lock:
+            self.emails.append({**email, 'id': email_id})
+        return {'id': email_id}
+
+    def _admit(self) -> Optional[Tuple[int, Dict]]:
+        """An error response for a request that is rate limited or set to fail, else None"""
+        with self._lock:
+            self.requests += 1
+            if self.rate_limit:
+                now = time.monotonic()
+                while self._recent and self._recent[0] <= now - 1:
+                    self._recent.popleft()
+                if len(self._recent) >= self.rate_limit:
+                    self.rate_limited += 1
+                    return 429, {'statusCode': 429, 'name': 'rate_limit_exceeded',
+                                 'message': f"Too many requests. You can only make {self.rate_limit:g} requests per second."}
+                self._recent.append(now)
+            if self.failures:
+                self.failures -= 1
+                return 500, {'statusCode': 500, 'name': 'application_error', 'message': 'Internal server error'}
+        return None
+
+    def handle(self, path: str, body, idempotency_key: Optional[str] = None) -> Tuple[int, Dict]:
+        """(status, response body) for one API request"""
+        rejected = self._admit()
+        if rejected:
+            return rejected
+        if self.latency:
+            time.sleep(self.latency)
+        if idempotency_key:
+            with self._lock:
+                response = self._responses.get((path, idempotency_key))
+                if response is not None:
+                    self.replayed += 1
+                    return 200, response
+        status, response = self._handle(path, body)
+        with self._lock:
+            if idempotency_key and status == 200:
+                self._responses[(path, idempotency_key)] = response
+            if self.lost_responses:
+                self.lost_responses -= 1
+                return 500, {'statusCode': 500, 'name': 'application_error', 'message': 'Internal server error'}
+        return status, response
+
+    def _handle(self, path: str, body) -> Tuple[int, Dict]:
+        if path == '/emails':
+            error = self._invalid(body)
+            if error:
+                return 422, {'statusCode': 422, 'name': 'validation_error', 'message': error}
+            return 200, self._accept(body)
+
+        if path == '/emails/batch':
+            if not isinstance(body, list) or not 1 <= len(body) <= BATCH_LIMIT:
+                message = f"A batch must contain between 1 and {BATCH_LIMIT} emails"
+                return 422, {'statusCode': 422, 'name': 'validation_error', 'message': message}
+            for i, email in enumerate(body):
+                error = self._invalid(email)
+                if error:
+                    return 422, {'statusCode': 422, 'name': 'validation_error', 'message': f"emails[{i}]: {error}"}
+            return 200, {'data': [self._accept(email) for email in body]}
+
+        return 404, {'statusCode': 404, 'name': 'not_found', 'message': 'The requested endpoint does not exist.'}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b'null')
+                except ValueError:
+                    status, response = 400, {'statusCode': 400, 'name': 'validation_error',
+                                             'message': 'Invalid JSON body'}
+                else:
+                    status, response = stub.handle(self.path, body, self.headers.get('Idempotency-Key'))
+                payload = json.dumps(response).encode()
+                self.send_response(status)
+                if status == 429:
+                    self.send_header('Retry-After', '1')
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8025)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every request')
+    parser.add_argument('--rate-limit', type=float, default=None, help='requests per second before 429s')
+    args = parser.parse_args()
+
+    stub = ResendStub(args.host, args.port, latency=args.latency, rate_limit=args.rate_limit).start()
+    print(f"📮 Resend stub listening on {stub.url}")
+    try:
+        while True:
+            time.sleep(60)
+            print(f"📮 {stub.requests} requests, {len(stub.emails)} emails accepted")
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,300 @@
+import re
+from typing import Dict, Optional, Tuple
+from backend.src.database.listing_record import Listing
+
+# Listings scoring at or above this are built without calling the LLM
+CONFIDENCE_THRESHOLD = 0.8
+
+# Weight of each field in the confidence score (weights sum to 1 per platform)
+# Price and revenue are weighted so a card without either falls below the threshold:
+# alerts filter on both
+BUSINESS_EXITS_WEIGHTS = {
+    'title': 0.1,
+    'asking_price': 0.25,
+    'revenue': 0.25,
+    'ebitda': 0.1,
+    'description': 0.15,
+    'industry': 0.1,
+    'highlights': 0.05
+}
+
+# Revenue is weighted so a card without it falls below the threshold: alerts filter on it
+WEBSITE_CLOSERS_WEIGHTS = {
+    'title': 0.1,
+    'asking_price': 0.2,
+    'revenue': 0.25,
+    'ebitda': 0.15,
+    'description': 0.15,
+    'industry': 0.1,
+    'highlights': 0.05
+}
+
+# A description shorter than this is not trusted as a full_description
+MIN_DESCRIPTION_LENGTH = 200
+MAX_HIGHLIGHTS = 5
+
+AMOUNT_PATTERN = re.compile(r'\$?\s*(\d[\d,]*(?:\.\d+)?)(?:\s*(thousand|million|billion|[kmb])\b)?', re.IGNORECASE)
+# "Revenue: $1.2M", "annual revenue of $850,000", "$3M in gross sales"; not "revenue grew 32%"
+REVENUE_PATTERNS = (
+    re.compile(r'\b(?:revenue|sales)\s*(?::|of|was|is|were|totaling|totalling)?\s*'
+               r'(?:over|approximately|about|nearly|~)?\s*(\$\s*\d[\d,.]*(?:\s*(?:thousand|million|billion|[kmb])\b)?)',
+               re.IGNORECASE),
+    re.compile(r'(\$\s*\d[\d,.]*(?:\s*(?:thousand|million|billion|[kmb])\b)?)\s+(?:in\s+)?'
+               r'(?:annual\s+|gross\s+|yearly\s+)?(?:revenue|sales)\b', re.IGNORECASE),
+)
+LOCATION_PATTERN = re.compile(
+    r'(?:location|located in|based in|headquartered in)\s*:?\s*'
+    r'([A-Z][A-Za-z .\'-]+?,\s*(?:[A-Z]{2}\b|[A-Z][a-z]+))',
+)
+DETAIL_PATTERNS = {
+    'years_in_business': re.compile(r'(\d+)\+?\s*(?:year|yr)s?\s+(?:in\s+business|old|established|of\s+operation)', re.IGNORECASE),
+    'employees': re.compile(r'(\d+)\s*(?:full[- ]time\s+)?(?:employee|staff|team\s*member)s?', re.IGNORECASE),
+    'reason_for_sale': re.compile(r'reason\s+for\s+sale[:\s]+([^.]+)', re.IGNORECASE)
+}
+HIGHLIGHT_TERMS = (
+    'recurring', 'revenue', 'grew', 'growth', 'growing', 'margin', 'customers', 'clients',
+    'subscribers', 'established', 'years', 'retention', 'repeat', 'contracts', 'profit', 'mrr', 'arr'
+)
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+
+
+def parse_amount(text: str) -> int:
+    """Extract the first dollar amount from text, handling K/M/B suffixes and ranges"""
+    if not text:
+        return 0
+    match = AMOUNT_PATTERN.search(text)
+    if not match:
+        return 0
+    try:
+        value = float(match.group(1).replace(',', ''))
+    except ValueError:
+        return 0
+    suffix = (match.group(2) or '').lower()
+    multiplier = {
+        'k': 1000, 'thousand': 1000,
+        'm': 1000000, 'million': 1000000,
+        'b': 1000000000, 'billion': 1000000000
+    }.get(suffix, 1)
+    return int(value * multiplier)
+
+
+def extract_revenue(text: str) -> int:
+    """Find a dollar revenue figure stated in listing text"""
+    for pattern in REVENUE_PATTERNS:
+        match = pattern.search(text or '')
+        if match:
+            return parse_amount(match.group(1))
+    return 0
+
+
+def extract_location(text: str, default: str = 'United States') -> str:
+    """Find an explicit "City, ST" style location in listing text"""
+    match = LOCATION_PATTERN.search(text or '')
+    return match.group(1).strip() if match else default
+
+
+def extract_highlights(text: str) -> Dict[str, str]:
+    """Pick short, metric-bearing sentences out of a description as highlights"""
+    highlights = {}
+    for sentence in SENTENCE_SPLIT.split(text or ''):
+        sentence = sentence.strip()
+        if not sentence or len(sentence) > 240:
+            continue
+        lowered = sentence.lower()
+        has_metric = any(char.isdigit() for char in sentence)
+        if has_metric and any(term in lowered for term in HIGHLIGHT_TERMS):
+            highlights[f'highlight_{len(highlights) + 1}'] = sentence
+            if len(highlights) >= MAX_HIGHLIGHTS:
+                break
+    return highlights
+
+
+def extract_business_details(text: str, location: str) -> Dict[str, str]:
+    """Pull operational details (age, headcount, reason for sale) out of listing text"""
+    details = {'location': location}
+    for key, pattern in DETAIL_PATTERNS.items():
+        match = pattern.search(text or '')
+        if match:
+            details[key] = match.group(1).strip()
+    return details
+
+
+def score_confidence(found: Dict[str, bool], weights: Dict[str, float]) -> float:
+    """Weighted share of the expected fields that were extracted"""
+    return round(sum(weight for field, weight in weights.items() if found.get(field)), 2)
+
+
+class ParsePathStats:
+    """Counts how many listings went through the rule-based path vs the LLM in a run"""
+
+    def __init__(self, platform: str):
+        self.platform = platform
+        self.reset()
+
+    def reset(self):
+        self.counts = {'rules': 0, 'llm': 0}
+
+    def record(self, path: str):
+        self.counts[path] = self.counts.get(path, 0) + 1
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def fraction(self, path: str) -> float:
+        return self.counts.get(path, 0) / self.total if self.total else 0.0
+
+    def print_summary(self):
+        if not self.total:
+            print(f"\n🧭 Parse paths - {self.platform}: no listings parsed")
+            return
+        print(f"\n🧭 Parse paths - {self.platform}:")
+        print(f"⚡ Rule-based: {self.counts['rules']} ({self.fraction('rules'):.0%})")
+        print(f"🤖 LLM: {self.counts['llm']} ({self.fraction('llm'):.0%})")
+
+
+class RuleBasedListingParser:
+    """
+    Deterministic extractor for listing pages whose structure we recognize.
+    Produces the same listing row shape as the LLM parsers together with a
+    confidence score, so callers only fall back to GPT for low-confidence pages.
+    """
+
+    def __init__(self, industry_extractor, threshold: float = CONFIDENCE_THRESHOLD):
+        self.extract_industry = industry_extractor
+        self.threshold = threshold
+
+    def is_confident(self, confidence: float) -> bool:
+        return confidence >= self.threshold
+
+    def parse_business_exits(self, listing_data: Dict, title: str, asking_price: int,
+                             revenue: int, ebitda: int) -> Tuple[Optional[Listing], float]:
+        """Build a BusinessExits listing from the card amounts and the detail-page text"""
+        if not listing_data.get('title_elem') or not listing_data.get('price_elem'):
+            return None, 0.0
+
+        description = (listing_data.get('raw_text') or '').strip()
+        industry = self.extract_industry(title)
+        location = extract_location(description)
+        highlights = extract_highlights(description)
+
+        confidence = score_confidence({
+            'title': bool(title),
+            'asking_price': asking_price > 0,
+            'revenue': revenue > 0,
+            'ebitda': ebitda > 0,
+            'description': len(description) >= MIN_DESCRIPTION_LENGTH,
+            'industry': industry != 'Other',
+            'highlights': bool(highlights)
+        }, BUSINESS_EXITS_WEIGHTS)
+
+        parsed_data = {
+            'full_description': description,
+            'business_highlights': highlights,
+            'financial_details': {
+                'asking_price': asking_price,
+                'revenue': revenue,
+                'ebitda': ebitda
+            },
+            'business_details': extract_business_details(description, location),
+            'parser': 'rules',
+            'confidence': confidence
+        }
+
+        listing = Listing.from_dict({
+            'title': title,
+            'asking_price': asking_price,
+            'revenue': revenue,
+            'ebitda': ebitda,
+            'industry': industry,
+            'location': location,
+            'listing_url': listing_data.get('listing_url', ''),
+            'source_platform': 'BusinessExits',
+            'status': listing_data.get('status', 'active'),
+            'full_description': description,
+            'business_highlights': parsed_data['business_highlights'],
+            'financial_details': parsed_data['financial_details'],
+            'business_details': parsed_data['business_details'],
+            'raw_data': {
+                'raw_html': listing_data.get('raw_html', ''),
+                'raw_text': listing_data.get('raw_text', ''),
+                'parsed_data': parsed_data
+            }
+        })
+        return listing, confidence
+
+    def parse_website_closers(self, listing_data: Dict) -> Tuple[Optional[Listing], float]:
+        """
+        Build a WebsiteClosers listing from the fixed asking_price/cash_flow card divs,
+        with revenue from a revenue div when the card has one, or else the card text
+        """
+        title_elem = listing_data.get('title_elem')
+        price_elem = listing_data.get('price_elem')
+        if not title_elem or not price_elem:
+            return None, 0.0
+
+        title = title_elem.get_text(' ', strip=True)
+        asking_price = parse_amount(self._strong_text(price_elem))
+        cash_flow_elem = listing_data.get('cash_flow_elem')
+        ebitda = parse_amount(self._strong_text(cash_flow_elem)) if cash_flow_elem else 0
+        description_elem = listing_data.get('description_elem')
+        description = description_elem.get_text(' ', strip=True) if description_elem else ''
+        full_text = listing_data.get('raw_text') or ''
+        revenue_elem = listing_data.get('revenue_elem')
+        revenue = parse_amount(self._strong_text(revenue_elem)) if revenue_elem else extract_revenue(full_text)
+
+        industry = self.extract_industry(title)
+        location = extract_location(full_text)
+        highlights = extract_highlights(description)
+
+        confidence = score_confidence({
+            'title': bool(title),
+            'asking_price': asking_price > 0,
+            'revenue': revenue > 0,
+            'ebitda': ebitda > 0,
+            'description': len(description) >= MIN_DESCRIPTION_LENGTH,
+            'industry': industry != 'Other',
+            'highlights': bool(highlights)
+        }, WEBSITE_CLOSERS_WEIGHTS)
+
+        parsed_data = {
+            'title': title,
+            'asking_price': asking_price,
+            'revenue': revenue,
+            'ebitda': ebitda,
+            'industry': industry,
+            'location': location,
+            'description': description,
+            'business_highlights': highlights,
+            'financial_details': {'cash_flow': ebitda, 'revenue': revenue},
+            'business_details': extract_business_details(full_text, location),
+            'parser': 'rules',
+            'confidence': confidence
+        }
+
+        listing = Listing.from_dict({
+            'title': title,
+            'asking_price': asking_price,
+            'revenue': revenue,
+            'ebitda': ebitda,
+            'industry': industry,
+            'location': location,
+            'description': description,
+            'business_highlights': parsed_data['business_highlights'],
+            'financial_details': parsed_data['financial_details'],
+            'business_details': parsed_data['business_details'],
+            'listing_url': listing_data['listing_url'],
+            'source_platform': listing_data['source_platform'],
+            'raw_data': {
+                'html': listing_data.get('raw_html', ''),
+                'text': full_text,
+                'parsed_data': parsed_data
+            },
+            'status': 'active'
+        })
+        return listing, confidence
+
+    def _strong_text(self, elem) -> str:
+        """Card values live in a <strong> inside the labelled div; fall back to the div text"""
+        strong = elem.find('strong')
+        return (strong or elem).get_text(' ', strip=True)
@@ -5,12 +5,12 @@ from apscheduler.triggers.cron import CronTrigger
 from pytz import UTC
 from typing import List, Dict
 import asyncio
-from ..database.supabase_db import SupabaseClient
+from ..database.storage import get_storage_backend
 from .newsletter_service import NewsletterService
 
 class SchedulerService:
     def __init__(self):
-        self.db = SupabaseClient()
+        self.db = get_storage_backend()
         self.newsletter_service = NewsletterService()
         self.scheduler = BackgroundScheduler(timezone=UTC)
         
@@ -38,6 +38,13 @@ class SchedulerService:
             self.process_newsletters,
             CronTrigger(minute='*/15')
         )
+
+        # Deliver queued emails and due retries from the email outbox every 5 minutes
+        self.scheduler.add_job(
+            self.newsletter_service.dispatch_outbox,
+            CronTrigger(minute='*/5'),
+            max_instances=1
+        )
         
     def run_scraper(self):
         try:
@@ -60,18 +67,15 @@ class SchedulerService:
         """Process instant alerts after new listings are scraped"""
         try:
             # Get all instant alerts
-            alerts_result = self.db.client.table('alerts')\
-                .select('*, users!inner(*)')\
-                .eq('newsletter_frequency', 'instantly')\
-                .execute()
+            alerts = self.db.get_alerts_with_users(frequency='instantly')
 
-            if not alerts_result.data:
+            if not alerts:
                 print("No instant alerts found")
                 return
 
-            print(f"Processing {len(alerts_result.data)} instant alerts")
+            print(f"Processing {len(alerts)} instant alerts")
             
-            for alert in alerts_result.data:
+            for alert in alerts:
                 try:
                     # Schedule the alert to be sent
                     next_schedule = datetime.now(UTC) + timedelta(minutes=5)
@@ -121,34 +125,25 @@ class SchedulerService:
         try:
             print("\n📅 Starting newsletter scheduling process...")
             
-            # Get all users with alerts
-            users_result = self.db.client.table('users')\
-                .select('*')\
-                .execute()
-                
-            if not users_result.data:
-                print("❌ No users found in database")
-                return
+            # Stream all users page by page so large user tables are never truncated
+            users = self.db.stream_rows('users', self.db.USER_CONTACT_COLUMNS)
+            user_count = 0
                 
-            print(f"Found {len(users_result.data)} users to process")
-                
-            for user in users_result.data:
+            for user in users:
+                user_count += 1
                 try:
                     print(f"\n👤 Processing user: {user.get('email', user['id'])}")
                     
                     # Get user's alerts
-                    alerts_result = self.db.client.table('alerts')\
-                        .select('*')\
-                        .eq('user_id', user['id'])\
-                        .execute()
+                    alerts = self.db.get_user_alerts(user['id'])
                         
-                    if not alerts_result.data:
+                    if not alerts:
                         print(f"⚠️ No alerts found for user {user['id']}")
                         continue
                         
-                    print(f"Found {len(alerts_result.data)} alerts for user")
+                    print(f"Found {len(alerts)} alerts for user")
                         
-                    for alert in alerts_result.data:
+                    for alert in alerts:
                         try:
                             print(f"\n🔔 Processing alert: {alert.get('name', alert['id'])}")
                             print(f"Alert settings:")
@@ -180,13 +175,7 @@ class SchedulerService:
                             print(f"📅 Scheduling newsletter for {scheduled_time} UTC")
                             
                             # Check for existing pending newsletters
-                            pending_result = self.db.client.table('newsletter_logs')\
-                                .select('id')\
-                                .eq('alert_id', alert['id'])\
-                                .eq('status', 'pending')\
-                                .execute()
-                                
-                            if pending_result.data:
+                            if self.db.has_pending_newsletter(alert['id']):
                                 print(f"⚠️ Found existing pending newsletter for this alert, skipping")
                                 continue
                             
@@ -208,6 +197,12 @@ class SchedulerService:
                 except Exception as e:
                     print(f"❌ Error processing user {user['id']}: {str(e)}")
                     continue
+
+            if not user_count:
+                print("❌ No users found in database")
+                return
+
+            print(f"Processed {user_count} users")
                     
         except Exception as e:
             print(f"❌ Error in schedule_newsletters: {str(e)}")
@@ -230,13 +225,9 @@ class SchedulerService:
             for newsletter in pending:
                 try:
                     # Double check status hasn't changed
-                    current = self.db.client.table('newsletter_logs')\
-                        .select('status, sent_at')\
-                        .eq('id', newsletter['id'])\
-                        .single()\
-                        .execute()
+                    current = self.db.get_newsletter_state(newsletter['id'])
                         
-                    if not current.data or current.data['status'] != 'pending' or current.data.get('sent_at'):
+                    if not current or current['status'] != 'pending' or current.get('sent_at'):
                         print(f"⚠️ Newsletter {newsletter['id']} status changed, skipping")
                         continue
                         
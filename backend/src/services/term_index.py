@@ -0,0 +1,131 @@
+import math
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..database.keyword_query import FIELD_WEIGHTS, KeywordQuery
+
+# term -> field -> count, as stored in listings.term_frequencies
+Frequencies = Dict[str, Dict[str, int]]
+
+
+class TermIndex:
+    """
+    Inverted index over listing text for BM25F ranking of keyword matches, behind the
+    CandidateCorpus that batch and per-alert newsletter matching both rank with. Documents
+    are small integer ids (row positions) added from their precomputed term
+    frequencies, and can be added, replaced and removed one at a time; per-field
+    document lengths and corpus totals are kept up to date as they change.
+
+    A query term's score contributions over all documents are computed once per set
+    of fields and cached, so ranking an alert's matches is a sum of cached vectors.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    # Title hits count most, as with the A/B/C tsvector weights
+    FIELD_BOOSTS = {'title': 3.0, 'description': 1.0, 'location': 0.5}
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, Dict[str, int]]] = defaultdict(dict)
+        self._lengths: Dict[int, Dict[str, int]] = {}
+        self._terms: Dict[int, List[str]] = {}
+        self._total_lengths = {f: 0 for f in FIELD_WEIGHTS}
+        self._size = 0
+        self._vocabulary: Optional[List[str]] = None
+        self._vectors: Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, doc: int, frequencies: Frequencies):
+        """Index a document's term frequencies, replacing any previous version of it"""
+        if doc in self._lengths:
+            self.remove(doc)
+        lengths, terms = {}, set()
+        for f in FIELD_WEIGHTS:
+            counts = frequencies.get(f) or {}
+            lengths[f] = sum(counts.values())
+            self._total_lengths[f] += lengths[f]
+            for term, count in counts.items():
+                postings = self._postings[term]
+                if not postings:
+                    self._vocabulary = None
+                postings.setdefault(doc, {})[f] = count
+                terms.add(term)
+        self._lengths[doc] = lengths
+        self._terms[doc] = list(terms)
+        self._size = max(self._size, doc + 1)
+        self._vectors.clear()
+
+    def remove(self, doc: int):
+        lengths = self._lengths.pop(doc, None)
+        if lengths is None:
+            return
+        for f, length in lengths.items():
+            self._total_lengths[f] -= length
+        for term in self._terms.pop(doc):
+            del self._postings[term][doc]
+            if not self._postings[term]:
+                del self._postings[term]
+                self._vocabulary = None
+        self._vectors.clear()
+
+    def expand(self, word: str, prefix: bool = False) -> Tuple[str, ...]:
+        """The indexed terms a query word stands for: itself, or every term it prefixes"""
+        if not prefix:
+            return (word,) if word in self._postings else ()
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        start = bisect_left(self._vocabulary, word)
+        end = start
+        while end < len(self._vocabulary) and self._vocabulary[end].startswith(word):
+            end += 1
+        return tuple(self._vocabulary[start:end])
+
+    def _vector(self, terms: Tuple[str, ...], fields: Tuple[str, ...]) -> np.ndarray:
+        """
+        One query word's BM25F contribution to every document. A prefix expanding to
+        several terms counts as one term, with their frequencies summed.
+        """
+        key = (terms, fields)
+        vector = self._vectors.get(key)
+        if vector is not None:
+            return vector
+
+        weighted: Dict[int, float] = defaultdict(float)
+        averages = {f: self._total_lengths[f] / len(self._lengths) if self._lengths else 0 for f in fields}
+        for term in terms:
+            for doc, counts in self._postings.get(term, {}).items():
+                for f in fields:
+                    count = counts.get(f)
+                    if count:
+                        norm = 1 - self.B + self.B * self._lengths[doc][f] / (averages[f] or 1)
+                        weighted[doc] += self.FIELD_BOOSTS[f] * count / norm
+
+        vector = np.zeros(self._size, dtype=np.float64)
+        if weighted:
+            matched = len(weighted)
+            idf = math.log(1 + (len(self._lengths) - matched + 0.5) / (matched + 0.5))
+            docs = np.fromiter(weighted.keys(), dtype=np.int64, count=matched)
+            tf = np.fromiter(weighted.values(), dtype=np.float64, count=matched)
+            vector[docs] = idf * tf * (self.K1 + 1) / (tf + self.K1)
+        self._vectors[key] = vector
+        return vector
+
+    def scores(self, query: KeywordQuery) -> np.ndarray:
+        """BM25F scores of every document for the query's words, over its search fields"""
+        total = np.zeros(self._size, dtype=np.float64)
+        words = {}
+        for phrase in query._grouped():
+            for word in phrase[:-1]:
+                words.setdefault(word, False)
+            # The last word of a phrase matches as a prefix
+            words[phrase[-1]] = True
+        for word, prefix in words.items():
+            terms = self.expand(word, prefix)
+            if terms:
+                total += self._vector(terms, query.fields)
+        return total
@@ -0,0 +1,47 @@
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta, UTC
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent.parent)
+sys.path.append(project_root)
+
+from backend.src.services.alert_batch import BatchAlertEvaluator, ListingColumns
+
+NOW = datetime(2024, 4, 1, tzinfo=UTC)
+
+
+def row(listing_id, days_old=1, **values):
+    data = {'id': listing_id, 'industry': 'Software/SaaS', 'asking_price': 250000, 'revenue': 200000,
+            'ebitda': 50000, 'profit_margin': 25.0, 'created_at': (NOW - timedelta(days=days_old)).isoformat()}
+    data.update(values)
+    return data
+
+
+def test_match_matrix_applies_ranges_industries_and_cutoffs():
+    listings = ListingColumns([
+        row('a'),
+        row('b', asking_price=2_000_000),
+        row('c', industry='Ecommerce', ebitda=None, profit_margin=None),
+        row('d', days_old=10),
+    ])
+    alerts = [
+        {'id': 'saas', 'industries': ['SaaS'], 'max_price': 500000},
+        {'id': 'any', 'industries': [], 'min_price': 0},
+        {'id': 'margin', 'industries': [], 'min_profit_margin': 20},
+        {'id': 'daily', 'industries': [], 'newsletter_frequency': 'daily',
+         'last_notification_sent': (NOW - timedelta(days=3)).isoformat()},
+        {'id': 'employees', 'industries': [], 'min_employees': 5},
+    ]
+    evaluator = BatchAlertEvaluator(listings, now=NOW)
+
+    matrix = evaluator.match_matrix(alerts, block_size=2)
+    assert matrix.tolist() == [
+        [True, False, False, True],
+        [True, True, True, True],
+        [True, True, False, True],
+        [False, False, False, False],
+        # No employee counts in the snapshot, so a bound on them matches nothing
+        [False, False, False, False],
+    ]
+    assert evaluator.matching_ids(alerts[:1]) == {'saas': ['a', 'd']}
@@ -0,0 +1,165 @@
+import sys
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent.parent)
+sys.path.append(project_root)
+
+from backend.src.database.listing_record import Listing
+from backend.src.database.sqlite_backend import SQLiteBackend
+from backend.src.services import alert_index
+from backend.src.services.alert_index import AlertIndex, AlertRouter, compile_alert, normalize_industries
+from backend.src.services.newsletter_service import MAX_LISTINGS_PER_SECTION, NewsletterService
+
+ALERTS = [
+    {'id': 'saas', 'industries': ['SaaS'], 'min_price': 100000, 'max_price': 500000},
+    {'id': 'cheap', 'industries': [], 'max_price': 50000},
+    {'id': 'fba', 'industries': ['E-commerce'], 'search_keywords': ['amazon fba'], 'exclude_keywords': ['dropship']},
+    {'id': 'margin', 'industries': [], 'min_ebitda': 10000, 'min_profit_margin': 30},
+]
+
+
+def listing(**overrides):
+    data = {'title': 'Business', 'description': '', 'location': 'United States', 'industry': 'Software/SaaS',
+            'asking_price': 250000, 'revenue': 200000, 'ebitda': 50000}
+    data.update(overrides)
+    return data
+
+
+def test_candidates_are_pruned_by_industry_and_range_buckets():
+    index = AlertIndex(ALERTS)
+    assert index.candidates(listing()) == {'saas', 'margin'}
+    assert index.candidates(listing(asking_price=10_000_000)) == {'margin'}
+    assert index.candidates(listing(industry='Ecommerce', asking_price=40000)) == {'cheap', 'fba', 'margin'}
+    assert normalize_industries(['SaaS', 'Mobile Apps', 'Other']) == ['Software/SaaS', 'Technology', 'Other']
+
+
+def test_matches_check_exact_bounds_derived_ratios_and_keywords():
+    index = AlertIndex(ALERTS)
+    matched = {m.alert_id: m for m in index.matches('l1', listing(asking_price=500001))}
+    # 500001 is in the same bucket as the saas maximum but above it; margin is 25%
+    assert matched == {}
+
+    ecommerce = listing(industry='Ecommerce', title='Amazon FBA brand', revenue=100000, ebitda=40000)
+    matched = {m.alert_id: m for m in index.matches('l2', ecommerce)}
+    assert set(matched) == {'fba', 'margin'}
+    assert matched['fba'].exact and matched['fba'].score == 2
+    assert not matched['margin'].exact
+
+    excluded = listing(industry='Ecommerce', title='Amazon FBA dropshipping store', ebitda=0)
+    assert index.matches('l3', excluded) == []
+
+
+def test_router_writes_pending_matches_that_newsletters_read():
+    db = SQLiteBackend()
+    db.insert_many('users', [{'id': 'u1', 'email': 'buyer@example.com'}])
+    db.insert_many('alerts', [{'id': 'saas', 'user_id': 'u1', 'name': 'SaaS', 'industries': ['SaaS'],
+                               'min_price': 100000, 'max_price': 500000}])
+    router = AlertRouter(db)
+    router.subscribe()
+
+    matching = db.store_listing(Listing.from_dict({'title': 'CRM', 'listing_url': 'https://example.com/1',
+                                                   'source_platform': 'Flippa', 'industry': 'Software/SaaS',
+                                                   'asking_price': 200000}))
+    db.store_listing(Listing.from_dict({'title': 'Shop', 'listing_url': 'https://example.com/2',
+                                        'source_platform': 'Flippa', 'industry': 'Ecommerce',
+                                        'asking_price': 200000}))
+    assert router.flush() == 1
+
+    pending = db.get_pending_alert_matches('saas')
+    assert [(row['id'], row['title'], row['exact']) for row in pending] == [(matching, 'CRM', False)]
+    db.mark_alert_matches_sent('saas', [matching])
+    assert db.get_pending_alert_matches('saas') == []
+
+
+def test_pending_matches_covered_by_the_newsletter_are_cleared(monkeypatch):
+    monkeypatch.setenv('STORAGE_BACKEND', 'sqlite')
+    monkeypatch.setenv('SQLITE_PATH', ':memory:')
+    service = NewsletterService()
+    db = service.db = SQLiteBackend()
+    db.insert_many('alerts', [{'id': 'saas', 'name': 'SaaS', 'industries': ['SaaS']}])
+    router = AlertRouter(db, [db.get_alert('saas')])
+    router.subscribe()
+    ids = [db.store_listing(Listing.from_dict({'title': f'CRM {i}', 'listing_url': f'https://example.com/{i}',
+                                               'source_platform': 'Flippa', 'industry': 'Software/SaaS'}))
+           for i in range(25)]
+    db.refresh_newsletter_candidates()
+    # Stored after the candidates were refreshed, so no newsletter has read it yet
+    later = db.store_listing(Listing.from_dict({'title': 'CRM later', 'listing_url': 'https://example.com/later',
+                                                'source_platform': 'Flippa', 'industry': 'Software/SaaS'}))
+    router.flush()
+
+    sections, pending_ids, cursor = service.get_alert_matches(db.get_alert('saas'))
+    sent = [row['id'] for row in sections['other_matches']]
+    assert len(sent) == MAX_LISTINGS_PER_SECTION and later not in sent
+    assert cursor == db.newest_candidate()
+    # Those past the section limit were read too; the cursor moves past them
+    assert sorted(pending_ids) == sorted(ids)
+
+    service.mark_matches_sent(db.get_alert('saas'), pending_ids)
+    assert [row['id'] for row in db.get_pending_alert_matches('saas')] == [later]
+
+
+def test_alerts_added_or_changed_after_routing_get_their_backlog(monkeypatch):
+    monkeypatch.setenv('STORAGE_BACKEND', 'sqlite')
+    monkeypatch.setenv('SQLITE_PATH', ':memory:')
+    service = NewsletterService()
+    db = service.db = SQLiteBackend()
+    db.insert_many('alerts', [{'id': 'saas', 'name': 'SaaS', 'industries': ['SaaS'], 'updated_at': '2024-01-01'}])
+    router = AlertRouter(db, [db.get_alert('saas')])
+    router.subscribe()
+    crm, shop = (db.store_listing(Listing.from_dict({'title': title, 'listing_url': f'https://example.com/{title}',
+                                                     'source_platform': 'Flippa', 'industry': industry,
+                                                     'asking_price': 200000}))
+                 for title, industry in (('CRM', 'Software/SaaS'), ('Shop', 'Ecommerce')))
+    router.flush()
+    db.refresh_newsletter_candidates()
+
+    # Added after the scrape: nothing was routed to it, its backlog is still read
+    db.insert_many('alerts', [{'id': 'shops', 'name': 'Shops', 'industries': ['E-commerce']}])
+    sections, pending_ids, _ = service.get_alert_matches(db.get_alert('shops'))
+    assert [row['id'] for row in sections['other_matches']] == [shop] and pending_ids == []
+
+    # Changed after the scrape: the match routed under the old criteria is not sent
+    db._write("UPDATE alerts SET industries = ?, updated_at = '2024-01-02' WHERE id = 'saas'", ['["E-commerce"]'])
+    sections, pending_ids, _ = service.get_alert_matches(db.get_alert('saas'))
+    assert [row['id'] for row in sections['other_matches']] == [shop] and pending_ids == [crm]
+
+
+def test_compiled_alerts_are_cached_by_version():
+    db = SQLiteBackend()
+    db.insert_many('alerts', [{'id': 'a1', 'name': 'SaaS', 'industries': ['SaaS'], 'min_price': 100000,
+                               'search_keywords': ['amazon fba'], 'updated_at': '2024-01-01T00:00:00+00:00'}])
+    compiled = compile_alert(db.get_alert('a1'))
+    assert compiled.industries == {'Software/SaaS', 'Technology'}
+    assert compiled.ranges == (('asking_price', 100000, None),)
+    assert compiled.keyword_score({'title': 'Amazon FBAs'}) == 2
+    assert compile_alert(db.get_alert('a1')) is compiled
+
+    # A send changes the cutoff; an edit changes updated_at
+    db.mark_alert_notified('a1')
+    sent = compile_alert(db.get_alert('a1'))
+    assert sent is not compiled and sent.last_sent is not None
+    assert db.get_alert('a1')['updated_at'] == '2024-01-01T00:00:00+00:00'
+    db._write("UPDATE alerts SET min_price = 200000 WHERE id = 'a1'")
+    edited = compile_alert(db.get_alert('a1'))
+    assert edited.version[0] > '2024-01-01T00:00:00+00:00'
+    assert edited.bounds('asking_price') == (200000, None)
+
+    # Without updated_at a change could not be detected, so nothing is reused
+    alert = {'id': 'memory', 'industries': []}
+    assert compile_alert(alert) is not compile_alert(alert)
+
+
+def test_compiled_alert_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(alert_index, 'COMPILED_ALERT_CACHE_SIZE', 2)
+    monkeypatch.setattr(alert_index, '_compiled_alerts', alert_index.OrderedDict())
+    alerts = {name: {'id': name, 'industries': [], 'search_keywords': ['saas'], 'updated_at': '2024-01-01'}
+              for name in ('a', 'b', 'c')}
+    first = compile_alert(alerts['a'])
+    compile_alert(alerts['b'])
+    assert compile_alert(alerts['a']) is first
+    # 'b' is now the least recently used, so 'c' pushes it out
+    compile_alert(alerts['c'])
+    assert list(alert_index._compiled_alerts) == ['a', 'c']
+    assert compile_alert(alerts['a']) is first
@@ -0,0 +1,84 @@
+import sys
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent.parent)
+sys.path.append(project_root)
+
+import resend
+
+from backend.src.database.sqlite_backend import SQLiteBackend
+from backend.src.services.email_delivery import BatchEmailDelivery
+from backend.src.services.newsletter_service import NewsletterService
+from backend.src.services.resend_stub import ResendStub
+from test_sqlite_backend import make_listing
+
+
+def email(i: int, domain: str = 'example.com') -> dict:
+    return {'from': 'alerts@dealsight.co', 'to': [f'buyer{i}@{domain}'], 'subject': 'Deals', 'html': '<p>hi</p>'}
+
+
+def test_batches_of_100_with_per_email_results(monkeypatch):
+    with ResendStub() as stub:
+        monkeypatch.setattr(resend, 'api_url', stub.url)
+        delivery = BatchEmailDelivery()
+        results = []
+        for i in range(250):
+            results.extend(delivery.add(email(i, 'invalid.test' if i == 150 else 'example.com'), context=i))
+        assert len(results) == 200 and len(delivery) == 50
+        results.extend(delivery.flush())
+
+        assert [result.context for result in results] == list(range(250))
+        failed = [result for result in results if not result.sent]
+        assert [result.context for result in failed] == [150]
+        assert 'invalid.test' in failed[0].error
+        # The rejected second batch is retried one email at a time
+        assert delivery.requests == stub.requests == 3 + 100
+        assert len(stub.emails) == 249
+        assert {e['id'] for e in stub.emails} == {result.email_id for result in results if result.sent}
+
+
+def test_batches_that_may_have_been_sent_are_not_resent(monkeypatch):
+    with ResendStub() as stub:
+        monkeypatch.setattr(resend, 'api_url', stub.url)
+        delivery = BatchEmailDelivery()
+        # A server error before the batch is accepted, then a response lost after it
+        stub.failures = 1
+        stub.lost_responses = 1
+        for _ in range(2):
+            for i in range(3):
+                delivery.add(email(i))
+            results = delivery.flush()
+            assert not any(result.sent for result in results)
+            assert all('may have been sent' in result.error for result in results)
+
+        assert delivery.requests == stub.requests == 2
+        assert len(stub.emails) == 3
+
+
+def test_newsletters_are_sent_in_one_batch_request(monkeypatch):
+    monkeypatch.setenv('STORAGE_BACKEND', 'sqlite')
+    monkeypatch.setenv('SQLITE_PATH', ':memory:')
+    monkeypatch.setenv('NEWSLETTER_OUTBOX', 'false')
+    service = NewsletterService()
+    db = service.db = SQLiteBackend()
+    for i in range(3):
+        db.store_listing(make_listing(i))
+    db.refresh_newsletter_candidates()
+    domains = ['example.com', 'invalid.test', 'example.com']
+    db.insert_many('users', [{'id': f'u{i}', 'email': f'buyer{i}@{d}'} for i, d in enumerate(domains)])
+    db.insert_many('alerts', [{'id': f'a{i}', 'user_id': f'u{i}', 'name': 'SaaS', 'industries': ['SaaS']}
+                              for i in range(3)])
+
+    with ResendStub() as stub:
+        monkeypatch.setattr(resend, 'api_url', stub.url)
+        service.send_personalized_newsletters()
+
+    assert sorted(e['to'][0] for e in stub.emails) == ['buyer0@example.com', 'buyer2@example.com']
+    # One rejected batch, then each email on its own
+    assert stub.requests == 4
+    logs = {row['alert_id']: row['status'] for row in db.stream_rows('newsletter_logs', 'alert_id,status')}
+    assert logs == {'a0': 'sent', 'a1': 'failed', 'a2': 'sent'}
+    newest = db.newest_candidate()
+    assert db.get_alert('a0')['listing_cursor_id'] == newest[1]
+    assert db.get_alert('a1')['listing_cursor_id'] is None
@@ -0,0 +1,117 @@
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent.parent)
+sys.path.append(project_root)
+
+import resend
+
+from backend.src.database.sqlite_backend import SQLiteBackend
+from backend.src.services.email_dispatcher import EmailDispatcher
+from backend.src.services.newsletter_service import NewsletterService
+from backend.src.services.resend_stub import ResendStub
+from test_sqlite_backend import make_listing
+
+
+def outbox_email(i: int, domain: str = 'example.com') -> dict:
+    return {
+        'idempotency_key': f'newsletter-{i}',
+        'params': {'from': 'alerts@dealsight.co', 'to': [f'buyer{i}@{domain}'], 'subject': 'Deals', 'html': '<p>hi</p>'},
+        'context': {'n': i},
+    }
+
+
+def outbox_statuses(db):
+    return {row['idempotency_key']: row['status'] for row in db.stream_rows('email_outbox', 'idempotency_key,status')}
+
+
+def test_outbox_is_drained_with_retries_and_idempotency_keys():
+    db = SQLiteBackend()
+    db.enqueue_emails([outbox_email(i) for i in range(4)])
+    # Queuing the same newsletter again is a no-op
+    db.enqueue_emails([outbox_email(0)])
+    sent, failed = [], []
+
+    with ResendStub() as stub:
+        dispatcher = EmailDispatcher(db, on_sent=lambda row, _: sent.append(row['context']['n']),
+                                     on_failed=lambda row, error: failed.append((row['context']['n'], error)),
+                                     rate_limit=100, batch_size=4, concurrency=1, retry_delay=0, api_url=stub.url)
+        # A lost response: the batch is accepted but answered with a server error. Its
+        # retry reuses the batch's idempotency key, so it is replayed, not sent again
+        stub.lost_responses = 1
+        stats = dispatcher.run()
+        assert sorted(sent) == [0, 1, 2, 3]
+        assert stats == {'sent': 4, 'retried': 4, 'failed': 0, 'requests': 2}
+        assert len(stub.emails) == 4 and stub.replayed == 1
+
+        # A server error before the batch is accepted, then a rejected email
+        db.enqueue_emails([outbox_email(4), outbox_email(5, 'invalid.test')])
+        stub.failures = 1
+        stats = dispatcher.run()
+        assert sorted(sent) == [0, 1, 2, 3, 4]
+        assert [n for n, _ in failed] == [5] and 'invalid.test' in failed[0][1]
+        # The failed batch, its retry (rejected as a whole), then each email on its own
+        assert stats == {'sent': 1, 'retried': 2, 'failed': 1, 'requests': 4}
+        assert len(stub.emails) == 5
+
+    assert set(outbox_statuses(db).values()) == {'sent', 'failed'}
+
+
+def test_retries_stop_after_max_attempts_and_respect_the_rate_limit():
+    db = SQLiteBackend()
+    db.enqueue_emails([outbox_email(0)])
+    with ResendStub(rate_limit=1) as stub:
+        stub.failures = 10
+        failed = []
+        dispatcher = EmailDispatcher(db, on_failed=lambda row, error: failed.append(error), rate_limit=50,
+                                     max_attempts=3, retry_delay=0, api_url=stub.url)
+        stats = dispatcher.run()
+    # The stub admits one request per second: the first retry gets a 429, and the
+    # dispatcher waits out its Retry-After before the next one
+    assert stats == {'sent': 0, 'retried': 2, 'failed': 1, 'requests': 3}
+    assert stub.rate_limited == 1 and stub.failures == 8
+    assert failed[0].startswith('Gave up after 3 attempts: 500')
+
+
+def test_claimed_emails_are_reclaimed_after_their_lease():
+    db = SQLiteBackend()
+    db.enqueue_emails([outbox_email(0)])
+    assert [row['attempts'] for row in db.claim_outbox_emails(10, timedelta(minutes=5))] == [1]
+    assert db.claim_outbox_emails(10, timedelta(minutes=5)) == []
+    db._write("UPDATE email_outbox SET next_attempt_at = '2000-01-01T00:00:00+00:00'")
+    assert [row['attempts'] for row in db.claim_outbox_emails(10, timedelta(minutes=5))] == [2]
+
+
+def test_newsletters_are_queued_then_dispatched(monkeypatch):
+    monkeypatch.setenv('STORAGE_BACKEND', 'sqlite')
+    monkeypatch.setenv('SQLITE_PATH', ':memory:')
+    monkeypatch.setenv('RESEND_RATE_LIMIT', '100')
+    service = NewsletterService()
+    db = service.db = SQLiteBackend()
+    for i in range(3):
+        db.store_listing(make_listing(i))
+    db.refresh_newsletter_candidates()
+    db.insert_many('users', [{'id': f'u{i}', 'email': f'buyer{i}@example.com'} for i in range(2)])
+    db.insert_many('alerts', [{'id': f'a{i}', 'user_id': f'u{i}', 'name': 'SaaS', 'industries': ['SaaS']}
+                              for i in range(2)])
+
+    # Without a provider the emails stay queued, and matching still completes
+    with ResendStub() as stub:
+        monkeypatch.setattr(resend, 'api_url', stub.url)
+        stub.failures = 100
+        service.send_personalized_newsletters()
+        assert stub.emails == []
+        logs = {row['alert_id']: row['status'] for row in db.stream_rows('newsletter_logs', 'alert_id,status')}
+        assert logs == {'a0': 'queued', 'a1': 'queued'}
+        assert db.get_alert('a0')['listing_cursor_id'] is None
+
+        stub.failures = 0
+        db._write("UPDATE email_outbox SET next_attempt_at = '2000-01-01T00:00:00+00:00'")
+        assert service.dispatch_outbox()['sent'] == 2
+
+    assert sorted(e['to'][0] for e in stub.emails) == ['buyer0@example.com', 'buyer1@example.com']
+    logs = {row['alert_id']: row['status'] for row in db.stream_rows('newsletter_logs', 'alert_id,status')}
+    assert logs == {'a0': 'sent', 'a1': 'sent'}
+    assert db.get_alert('a0')['listing_cursor_id'] == db.newest_candidate()[1]
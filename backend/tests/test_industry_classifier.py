@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent.parent)
+sys.path.append(project_root)
+
+from backend.src.services.industry_classifier import (
+    IndustryClassifier,
+    classify_industry,
+    classify_industries,
+    INDUSTRY_TAXONOMY
+)
+
+
+def test_taxonomy_categories():
+    assert classify_industry('B2B SaaS Platform') == 'Software/SaaS'
+    assert classify_industry('Amazon FBA Pet Brand') == 'Ecommerce'
+    assert classify_industry('Display Advertising, Affiliate') == 'Content/Media'
+    assert classify_industry('Industrial Parts Manufacturing Services') == 'Manufacturing'
+    assert classify_industry('Wholesale Coffee Distribution') == 'Wholesale/Distribution'
+    assert classify_industry('Managed IT Consulting') == 'Service'
+    assert classify_industry('Online Learning Academy') == 'Education'
+    assert classify_industry('Residential Solar Installer') == 'Renewable Energy'
+    assert classify_industry('Landscaping Company') == 'Other'
+    assert classify_industry('') == 'Other'
+    assert classify_industry(None) == 'Other'
+
+
+def test_priority_follows_taxonomy_order():
+    # Both Software/SaaS and Ecommerce terms present: the earlier category wins
+    assert classify_industry('Shopify App') == 'Software/SaaS'
+    assert classify_industry('Ecommerce Marketing Agency') == 'Ecommerce'
+
+
+def test_terms_match_whole_words():
+    assert classify_industry('Windows and Doors Installer') == 'Other'
+    assert classify_industry('Mobile Dog Grooming') == 'Other'
+    assert classify_industry('Apparel Brand') == 'Other'
+    assert classify_industry('Mobile Apps') == 'Software/SaaS'
+    assert classify_industry('Tech-enabled Staffing Services') == 'Software/SaaS'
+    assert classify_industry('EdTech Platform') == 'Education'
+    # Every category maps to itself
+    for category, _ in INDUSTRY_TAXONOMY:
+        assert classify_industry(category) == category, category
+
+
+def test_batch_and_memoization():
+    classifier = IndustryClassifier()
+    titles = ['SaaS Tool', 'Content Site', 'SaaS Tool', 'saas tool ']
+
+    assert classifier.classify_many(titles) == ['Software/SaaS', 'Content/Media', 'Software/SaaS', 'Software/SaaS']
+    assert classifier.cache_info().hits == 2
+    assert classify_industries(['Blog', 'Agency']) == ['Content/Media', 'Service']
@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent.parent)
+sys.path.append(project_root)
+
+from backend.src.database.keyword_query import KeywordQuery
+
+
+def test_compiles_match_types_to_tsquery():
+    alert = {'search_keywords': ['SaaS', 'Amazon FBA'], 'search_in': ['title', 'description']}
+    assert KeywordQuery.from_alert(alert).to_tsquery() == '(saas:*AB) | (amazon:AB <-> fba:*AB)'
+    assert KeywordQuery.from_alert({**alert, 'search_match_type': 'all'}).to_tsquery() == \
+        '(saas:*AB) & (amazon:AB <-> fba:*AB)'
+    assert KeywordQuery.from_alert({**alert, 'search_match_type': 'exact'}).to_tsquery() == \
+        '(saas:AB <-> amazon:AB <-> fba:*AB)'
+
+
+def test_fields_exclusions_and_fts5():
+    query = KeywordQuery.from_alert({'search_keywords': ['b2b'], 'search_in': ['location', 'title'],
+                                     'exclude_keywords': ["dropshipping!", '  ']})
+    assert query.fields == ('title', 'location')
+    assert query.exclude_tsquery() == '(dropshipping:*AC)'
+    assert query.to_fts5() == '{search_title search_location} : ("b2b"*)'
+    assert query.exclude_fts5() == '{search_title search_location} : ("dropshipping"*)'
+
+
+def test_alerts_without_searchable_keywords_have_no_query():
+    assert KeywordQuery.from_alert({'search_keywords': []}) is None
+    assert KeywordQuery.from_alert({'search_keywords': ['  ', '!!']}) is None
@@ -0,0 +1,52 @@
+import sys
+import random
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent.parent)
+sys.path.append(project_root)
+
+from backend.src.database.keyword_query import KeywordQuery
+from backend.src.services.keyword_scanner import KeywordScanner
+
+VOCABULARY = ['saas', 'saasy', 'amazon', 'amazonian', 'fba', 'b2b', 'dropship', 'dropshipping', 'shop', 'app']
+
+
+def test_scan_finds_overlapping_phrases_at_word_starts():
+    scanner = KeywordScanner()
+    fba = scanner.compile(KeywordQuery([['amazon', 'fba']]))
+    saas = scanner.compile(KeywordQuery([['saas']], exclude=[['drop']]))
+    hits = scanner.scan({'title': 'Amazon FBAs & SaaSy tools', 'description': 'Not a dropship store'})
+    assert KeywordScanner.score(fba, hits) == 2
+    # 'saas' is a prefix of 'SaaSy', and 'drop' of 'dropship'
+    assert KeywordScanner.score(saas, hits) is None
+    assert KeywordScanner.score(fba, scanner.scan({'title': 'Amazonian FBA'})) == 0
+    assert KeywordScanner.score(fba, scanner.scan({'title': 'pre-amazon fba'})) == 2
+
+
+def test_scores_agree_with_keyword_query():
+    rng = random.Random(3)
+
+    def phrases(count):
+        chosen = []
+        while len(chosen) < count:
+            phrase = rng.sample(VOCABULARY, rng.randint(1, 2))
+            if phrase not in chosen:
+                chosen.append(phrase)
+        return chosen
+
+    queries = [
+        KeywordQuery(phrases(rng.randint(1, 3)), match_type=rng.choice(['any', 'all', 'exact']),
+                     fields=rng.choice([('title',), ('title', 'description'), ('description', 'location')]),
+                     exclude=phrases(rng.randint(0, 1)))
+        for _ in range(200)
+    ]
+    scanner = KeywordScanner()
+    compiled = [scanner.compile(query) for query in queries]
+
+    for _ in range(100):
+        texts = {f: ' '.join(rng.choices(VOCABULARY + ['the', 'best'], k=rng.randint(0, 8)))
+                 for f in ('title', 'description', 'location')}
+        hits = scanner.scan(texts)
+        for query, compiled_query in zip(queries, compiled):
+            assert KeywordScanner.score(compiled_query, hits) == query.score(texts)
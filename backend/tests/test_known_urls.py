@@ -0,0 +1,69 @@
+import sys
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent.parent)
+sys.path.append(project_root)
+
+from backend.src.database.known_urls import BloomFilter, KnownListingUrls
+from backend.src.database.supabase_db import SupabaseClient
+
+STORED = [f'https://flippa.com/{i}-profitable-ecommerce-business-for-sale' for i in range(2000)]
+
+
+class ListingsTable:
+    """Stands in for SupabaseClient.stream_rows over the listings table"""
+    LISTING_DEDUP_COLUMNS = SupabaseClient.LISTING_DEDUP_COLUMNS
+
+    def __init__(self, urls):
+        self.rows = [{'id': str(i), 'listing_url': url, 'created_at': f'2024-01-01T00:00:{i:05d}'}
+                     for i, url in enumerate(urls)]
+        self.scans = []
+
+    def stream_rows(self, table, columns, filters=()):
+        self.scans.append(list(filters))
+        for row in self.rows:
+            if all(row['created_at'] >= value for _, _, value in filters):
+                yield row
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=len(STORED), error_rate=0.01)
+    for url in STORED:
+        bloom.add(url)
+
+    assert all(url in bloom for url in STORED)
+    false_positives = sum(f'https://transworld.com/listing/{i}' in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_filter_persists_and_refreshes_incrementally(tmp_path):
+    path = str(tmp_path / 'known.bloom')
+    table = ListingsTable(STORED[:1500])
+    KnownListingUrls(table, path=path, capacity=5000).refresh()
+
+    table.rows += ListingsTable(STORED).rows[1500:]
+    known = KnownListingUrls(table, path=path, capacity=5000)
+    new_urls = ['https://example.com/new-1', 'https://example.com/new-2']
+
+    maybe = known.maybe_known(STORED[1400:1600] + new_urls)
+    assert maybe[:200] == STORED[1400:1600]
+    assert table.scans[-1] == [('gte', 'created_at', '2024-01-01T00:00:01499')]
+
+
+def test_grows_when_over_capacity(tmp_path):
+    table = ListingsTable(STORED)
+    known = KnownListingUrls(table, path=str(tmp_path / 'known.bloom'), capacity=500)
+    known.refresh()
+
+    assert known.bloom.capacity >= len(STORED)
+    assert all(url in known.bloom for url in STORED)
+
+
+def test_url_chunks_are_bounded():
+    db = SupabaseClient.__new__(SupabaseClient)
+    chunks = list(db._url_chunks(STORED + STORED[:10]))
+
+    assert sum(len(chunk) for chunk in chunks) == len(STORED)
+    assert all(sum(len(url) + 3 for url in chunk) <= db.URL_CHECK_MAX_CHARS for chunk in chunks)
+    assert all(len(chunk) <= db.URL_CHECK_MAX_URLS for chunk in chunks)
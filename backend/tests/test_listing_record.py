@@ -0,0 +1,59 @@
+import json
+import sys
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent.parent)
+sys.path.append(project_root)
+
+from backend.src.database.listing_record import Listing
+
+
+def make_listing() -> Listing:
+    return Listing.from_dict({
+        'title': 'Premium Pet Supplies Brand',
+        'listing_url': 'https://example.com/listing/1',
+        'source_platform': 'Flippa',
+        'asking_price': 3200000,
+        'revenue': 4100000,
+        'ebitda': None,
+        'full_description': 'Shopify brand selling pet supplies',
+        'business_highlights': ['45,000 repeat customers'],
+        'financial_details': {'revenue_multiple': 0.78},
+        'business_details': {'location': 'Denver, CO'},
+        'raw_data': {'listing_data': {'id': 1}},
+        'created_at': '2024-01-01T00:00:00'
+    })
+
+
+def test_nested_fields_stay_as_objects():
+    listing = make_listing()
+
+    assert listing.financial_details['revenue_multiple'] == 0.78
+    assert listing['business_details']['location'] == 'Denver, CO'
+    assert listing.get('ebitda') == 0
+    assert listing['created_at'] == '2024-01-01T00:00:00'
+    assert 'created_at' in listing and 'missing' not in listing
+
+
+def test_to_row_serializes_once():
+    row = make_listing().to_row()
+
+    assert json.loads(row['financial_details']) == {'revenue_multiple': 0.78}
+    assert json.loads(row['raw_data']) == {'listing_data': {'id': 1}}
+    assert row['description'] == 'Shopify brand selling pet supplies'
+    assert row['term_frequencies']['title'] == {'premium': 1, 'pet': 1, 'supplies': 1, 'brand': 1}
+    assert 'created_at' not in row
+
+
+def test_accepts_legacy_json_strings():
+    listing = Listing.from_dict({
+        'title': 'Legacy',
+        'listing_url': 'https://example.com/legacy',
+        'financial_details': '{"annual_profit": 120000}',
+        'business_highlights': '[]'
+    })
+
+    assert listing.financial_details == {'annual_profit': 120000}
+    assert listing.business_highlights == []
+    assert Listing.from_dict(listing) is listing
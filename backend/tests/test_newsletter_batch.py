@@ -0,0 +1,215 @@
+import json
+import sys
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent.parent)
+sys.path.append(project_root)
+
+from backend.src.database.sqlite_backend import SQLiteBackend
+from backend.src.services.alert_index import AlertRouter
+from backend.src.services.newsletter_batch import NewsletterBatch
+from backend.src.services.newsletter_service import MAX_LISTINGS_PER_SECTION, NewsletterService
+from test_sqlite_backend import make_listing
+
+ALERTS = [
+    {'id': 'all', 'industries': []},
+    {'id': 'saas', 'industries': ['SaaS'], 'min_price': 200000, 'max_price': 600000},
+    {'id': 'fba', 'industries': [], 'search_keywords': ['amazon fba'], 'exclude_keywords': ['kitchen']},
+    {'id': 'both', 'industries': [], 'search_keywords': ['pet', 'amazon'], 'search_match_type': 'all',
+     'search_in': ['title']},
+    {'id': 'margin', 'industries': ['E-commerce'], 'min_profit_margin': 20, 'min_annual_revenue': 100000},
+    {'id': 'employees', 'industries': [], 'min_employees': 3},
+]
+
+
+def test_batch_matches_equal_per_alert_queries(monkeypatch):
+    monkeypatch.setenv('STORAGE_BACKEND', 'sqlite')
+    monkeypatch.setenv('SQLITE_PATH', ':memory:')
+    service = NewsletterService()
+    db = service.db = SQLiteBackend()
+    titles = ['Amazon FBA brand', 'Pet store', 'Amazon FBA kitchen', 'Agency', 'Amazon pet toys', 'Newsletter']
+    for i, title in enumerate(titles):
+        db.store_listing(make_listing(i, title=title, industry='Ecommerce' if i % 2 else 'Software/SaaS',
+                                      full_description=f'Business {i} with Amazon FBA listings' if i == 1 else None))
+    db._write("UPDATE listings SET number_of_employees = 5 WHERE title = 'Agency'")
+    db._write("UPDATE listings SET number_of_employees = 2 WHERE title = 'Newsletter'")
+    db.refresh_newsletter_candidates()
+
+    batch = NewsletterBatch(db, ALERTS)
+    matches = batch.matches()
+    for alert in ALERTS:
+        assert matches[alert['id']] == service.get_matching_listings(alert), alert['id']
+    assert [row['title'] for row in matches['fba']['exact_matches']] == ['Pet store', 'Amazon FBA brand']
+    assert [row['title'] for row in matches['employees']['other_matches']] == ['Agency']
+    newest = db.newest_candidate()
+    assert batch.high_water == newest
+    assert service.get_alert_matches(ALERTS[0], (matches, batch.high_water)) == (matches['all'], [], newest)
+
+
+def test_keyword_alerts_rank_the_same_in_batch_and_per_alert_queries(monkeypatch):
+    monkeypatch.setenv('STORAGE_BACKEND', 'sqlite')
+    monkeypatch.setenv('SQLITE_PATH', ':memory:')
+    service = NewsletterService()
+    db = service.db = SQLiteBackend()
+    # More matches than fit a section, with the heaviest term use on the older listings
+    for i in range(3 * MAX_LISTINGS_PER_SECTION):
+        title = ' '.join(['Amazon FBA'] * (3 - i % 3)) + f' brand {i}' if i % 4 else f'Agency {i}'
+        db.store_listing(make_listing(i, title=title, full_description='Amazon store' if i % 5 == 0 else None))
+        db._write("UPDATE listings SET created_at = ? WHERE listing_url = ?",
+                  [f'2030-01-01T00:{i:02d}:00+00:00', f'https://example.com/listing/{i}'])
+    db.refresh_newsletter_candidates()
+
+    alerts = [
+        {'id': 'fba', 'industries': [], 'search_keywords': ['amazon fba']},
+        {'id': 'both', 'industries': [], 'search_keywords': ['amazon', 'fba'], 'search_match_type': 'all',
+         'search_in': ['title']},
+        # Sent halfway through: older candidates still count towards the corpus
+        {'id': 'recent', 'industries': [], 'search_keywords': ['amazon'],
+         'last_notification_sent': '2030-01-01T00:15:00+00:00', 'newsletter_frequency': 'monthly'},
+    ]
+    for batch_alerts in (alerts, alerts[2:]):
+        matches = NewsletterBatch(db, batch_alerts, limit=MAX_LISTINGS_PER_SECTION).matches()
+        for alert in batch_alerts:
+            assert matches[alert['id']] == service.get_matching_listings(alert, until=db.newest_candidate()), alert['id']
+
+    exact = service.get_matching_listings(alerts[0])['exact_matches']
+    assert len(exact) == MAX_LISTINGS_PER_SECTION
+    # The listings repeating the keywords most are chosen, not just the newest ones
+    assert all(row['title'].startswith('Amazon FBA Amazon FBA') for row in exact)
+    assert [row['created_at'] for row in exact] == sorted((row['created_at'] for row in exact), reverse=True)
+
+
+def test_pending_matches_do_not_change_keyword_ranking(monkeypatch):
+    monkeypatch.setenv('STORAGE_BACKEND', 'sqlite')
+    monkeypatch.setenv('SQLITE_PATH', ':memory:')
+    service = NewsletterService()
+    db = service.db = SQLiteBackend()
+    alert = {'id': 'fba', 'name': 'FBA', 'industries': [], 'search_keywords': ['amazon fba']}
+    db.insert_many('alerts', [alert])
+    router = AlertRouter(db, [db.get_alert('fba')])
+    router.subscribe()
+    for i in range(2 * MAX_LISTINGS_PER_SECTION):
+        title = ' '.join(['Amazon FBA'] * (i % 3)) + f' brand {i}'
+        db.store_listing(make_listing(i, title=title, full_description='Amazon FBA store' if i % 3 == 0 else None))
+    router.flush()
+    db.refresh_newsletter_candidates()
+    alert = db.get_alert('fba')
+
+    # Routed scores count title hits double but not repeats; no path ranks by them
+    routed = db.get_pending_alert_matches('fba')
+    assert len({row['score'] for row in routed}) > 1
+    batch = service.get_matching_listings_batch([alert])
+    expected = service.get_matching_listings(alert, until=db.newest_candidate())
+    assert batch[0]['fba'] == expected
+    for alert_batch in (None, batch):
+        sections, pending_ids, _ = service.get_alert_matches(alert, alert_batch)
+        assert sections == expected and len(pending_ids) == len(routed)
+
+
+def test_identical_criteria_are_evaluated_once_per_run():
+    db = SQLiteBackend()
+    for i, title in enumerate(['Amazon FBA brand', 'Pet store', 'Agency']):
+        db.store_listing(make_listing(i, title=title))
+    db.refresh_newsletter_candidates()
+    newest = db.stream_rows(db.NEWSLETTER_CANDIDATES, 'id,created_at', descending=True)
+    second_created = [row['created_at'] for row in newest][1]
+
+    alerts = [
+        {'id': 'a', 'industries': ['SaaS'], 'search_keywords': ['Amazon FBA']},
+        # Same criteria in another order, match type and case; sent after the second listing
+        {'id': 'b', 'industries': ['Mobile Apps', 'SaaS'], 'search_keywords': ['amazon fba'],
+         'search_match_type': 'all', 'last_notification_sent': second_created},
+        {'id': 'c', 'industries': ['SaaS'], 'search_keywords': ['pet']},
+    ]
+    batch = NewsletterBatch(db, alerts)
+    matches = batch.matches()
+    assert batch.distinct_criteria == 2 and batch.sharing_ratio == 1.5
+    assert [row['title'] for row in matches['a']['exact_matches']] == ['Amazon FBA brand']
+    assert [row['title'] for row in matches['a']['other_matches']] == ['Agency', 'Pet store']
+    # b only sees the listing created after its last send
+    assert matches['b'] == {'exact_matches': [], 'other_matches': [matches['a']['other_matches'][0]]}
+
+
+def test_term_frequencies_stored_as_json_text_are_decoded():
+    db = SQLiteBackend()
+    for i, title in enumerate(['Amazon FBA brand', 'Amazon FBA Amazon FBA store', 'Agency']):
+        db.store_listing(make_listing(i, title=title))
+    db.refresh_newsletter_candidates()
+    alerts = [{'id': 'fba', 'industries': [], 'search_keywords': ['amazon fba']}]
+    expected = NewsletterBatch(db, alerts).matches()
+
+    # jsonb columns written with JSON text hold a JSON string, which PostgREST returns as a str
+    for row in list(db.stream_rows('listings', 'id,term_frequencies')):
+        db._write("UPDATE listings SET term_frequencies = ? WHERE id = ?",
+                  [json.dumps(json.dumps(row['term_frequencies'])), row['id']])
+    db.refresh_newsletter_candidates()
+    assert all(isinstance(row['term_frequencies'], str)
+               for row in db.stream_rows(db.NEWSLETTER_CANDIDATES, 'id,term_frequencies'))
+
+    batch = NewsletterBatch(db, alerts).load()
+    assert batch.corpus.term_index.scores(batch.keyword_queries['fba']).any()
+    assert batch.matches() == expected
+    assert [row['title'] for row in expected['fba']['exact_matches']] == ['Amazon FBA Amazon FBA store',
+                                                                          'Amazon FBA brand']
+
+
+def test_alerts_read_only_listings_past_their_cursor(monkeypatch):
+    monkeypatch.setenv('STORAGE_BACKEND', 'sqlite')
+    monkeypatch.setenv('SQLITE_PATH', ':memory:')
+    service = NewsletterService()
+    db = service.db = SQLiteBackend()
+    db.insert_many('users', [{'id': 'u1', 'email': 'buyer@example.com'}])
+    db.insert_many('alerts', [{'id': 'a1', 'user_id': 'u1', 'name': 'Everything', 'industries': []}])
+    ids = [db.store_listing(make_listing(i)) for i in range(4)]
+    # Two listings share a created_at, so only the id tells them apart
+    tied = sorted(ids[1:3])
+    created = {ids[0]: '2030-01-01T01:00:00+00:00', tied[0]: '2030-01-01T02:00:00+00:00',
+               tied[1]: '2030-01-01T02:00:00+00:00', ids[3]: '2030-01-01T03:00:00+00:00'}
+    for listing_id, created_at in created.items():
+        db._write("UPDATE listings SET created_at = ? WHERE id = ?", [created_at, listing_id])
+    db.refresh_newsletter_candidates()
+
+    db.mark_alert_notified('a1', cursor=(created[tied[0]], tied[0]))
+    # The cursor never moves back
+    db.mark_alert_notified('a1', cursor=(created[ids[0]], ids[0]))
+    alert = db.get_alert('a1')
+    assert (alert['listing_cursor_created_at'], alert['listing_cursor_id']) == (created[tied[0]], tied[0])
+
+    def listing_ids(sections):
+        return [row['id'] for row in sections['other_matches']]
+
+    assert listing_ids(service.get_matching_listings(alert)) == [ids[3], tied[1]]
+    assert listing_ids(NewsletterBatch(db, [alert]).matches()['a1']) == [ids[3], tied[1]]
+    assert listing_ids(service.get_matching_listings(alert, until=(created[tied[1]], tied[1]))) == [tied[1]]
+
+    sections, _, cursor = service.get_alert_matches(alert)
+    assert cursor == (created[ids[3]], ids[3])
+    db.mark_alert_notified('a1', cursor=cursor)
+    alert = db.get_alert('a1')
+    assert listing_ids(service.get_matching_listings(alert)) == []
+    assert listing_ids(NewsletterBatch(db, [alert]).matches()['a1']) == []
+
+
+def test_pending_matches_do_not_skip_older_listings_the_router_missed(monkeypatch):
+    monkeypatch.setenv('STORAGE_BACKEND', 'sqlite')
+    monkeypatch.setenv('SQLITE_PATH', ':memory:')
+    service = NewsletterService()
+    db = service.db = SQLiteBackend()
+    db.insert_many('alerts', [{'id': 'a1', 'name': 'Everything', 'industries': []}])
+    missed, routed = db.store_listing(make_listing(0)), db.store_listing(make_listing(1))
+    db._write("UPDATE listings SET created_at = ? WHERE id = ?", ['2030-01-01T01:00:00+00:00', missed])
+    db._write("UPDATE listings SET created_at = ? WHERE id = ?", ['2030-01-01T02:00:00+00:00', routed])
+    db.refresh_newsletter_candidates()
+    # Only the newer listing was routed, as if the router had not seen the older one
+    db.insert_many('alert_matches', [{'alert_id': 'a1', 'listing_id': routed, 'matched_at': '2030-01-01'}])
+
+    for alert_batch in (None, service.get_matching_listings_batch([db.get_alert('a1')])):
+        sections, pending_ids, cursor = service.get_alert_matches(db.get_alert('a1'), alert_batch)
+        assert [row['id'] for row in sections['other_matches']] == [routed, missed]
+        assert pending_ids == [routed] and cursor == db.newest_candidate()
+
+    service.mark_matches_sent(db.get_alert('a1'), pending_ids)
+    db.mark_alert_notified('a1', cursor=cursor)
+    sections, pending_ids, _ = service.get_alert_matches(db.get_alert('a1'))
+    assert sections == {'exact_matches': [], 'other_matches': []} and pending_ids == []
@@ -0,0 +1,38 @@
+import sys
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent.parent)
+sys.path.append(project_root)
+
+from backend.src.database.payload_store import (
+    decode_payload,
+    encode_payload,
+    _from_bytea,
+    _to_bytea,
+    IDENTITY
+)
+
+RAW_HTML = '<div class="listing"><h2>Premium Pet Supplies</h2>' + '<p>Repeat customers</p>' * 400 + '</div>'
+
+
+def test_round_trip_is_compressed():
+    raw_data = {'raw_html': RAW_HTML, 'raw_text': 'Premium Pet Supplies', 'parsed_data': {'revenue': 4100000}}
+    payload_hash, compressed, raw_size = encode_payload(raw_data)
+
+    assert len(compressed) < raw_size / 10
+    assert decode_payload(_from_bytea(_to_bytea(compressed))) == raw_data
+    assert len(payload_hash) == 64
+
+
+def test_identical_payloads_share_a_hash():
+    first, _, _ = encode_payload({'raw_html': RAW_HTML})
+    second, _, _ = encode_payload({'raw_html': RAW_HTML})
+    other, _, _ = encode_payload({'raw_html': RAW_HTML + ' '})
+
+    assert first == second
+    assert first != other
+
+
+def test_backfilled_identity_payloads_decode():
+    assert decode_payload(b'{"raw_text": "legacy"}', IDENTITY) == {'raw_text': 'legacy'}
@@ -0,0 +1,55 @@
+import sys
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent.parent)
+sys.path.append(project_root)
+
+from backend.src.services.prompt_builder import PromptBuilder, clean_listing_text, estimate_tokens
+
+# Text as scraped from a BusinessExits detail page with get_text(separator=' ')
+SAVED_DETAIL_PAGE = (
+    "Skip to content | Home | About | Listings | Sell | Contact | "
+    "Premium Pet Supplies Ecommerce Brand | Listing Price: $3,200,000 | Revenue: $4,100,000 | Income: $890,000 | "
+    "This Shopify-based brand sells premium pet supplies direct to consumers across the United States. "
+    "The business has grown revenue 28% year over year and has 45,000 repeat customers. "
+    "Operations are run by 4 employees from a leased warehouse in Denver, CO. "
+    "Listing Price: $3,200,000 | "
+    "This Shopify-based brand sells premium pet supplies direct to consumers across the United States. "
+    "Download NDA | Request Info | Subscribe to our newsletter | "
+    "© 2024 Business Exits. All rights reserved. Privacy Policy | Terms of Service"
+)
+
+
+def test_boilerplate_and_duplicates_are_removed():
+    segments = clean_listing_text(SAVED_DETAIL_PAGE)
+    text = ' '.join(segments)
+
+    assert 'Skip to content' not in text
+    assert 'Privacy Policy' not in text
+    assert 'Subscribe' not in text
+    assert text.count('premium pet supplies direct to consumers') == 1
+
+
+def test_financial_figures_survive_trimming():
+    section = PromptBuilder(token_budget=1500)\
+        .add_field('Title', 'Premium Pet Supplies Ecommerce Brand')\
+        .add_field('Price', 'Listing Price: $3,200,000')\
+        .add_field('Revenue', 'Revenue: $4,100,000')\
+        .add_field('Income', 'Income: $890,000')\
+        .add_text('Full Text', SAVED_DETAIL_PAGE)\
+        .build()
+
+    for figure in ['$3,200,000', '$4,100,000', '$890,000', '28%', '45,000 repeat customers', 'Denver, CO']:
+        assert figure in section
+    # Card fields are not repeated in the full text
+    assert section.count('$3,200,000') == 1
+    assert estimate_tokens(section) < estimate_tokens(SAVED_DETAIL_PAGE)
+
+
+def test_token_budget_is_enforced():
+    long_text = ' '.join(f"Sentence number {i} describes another distinct part of the business." for i in range(500))
+    section = PromptBuilder(token_budget=200).add_field('Title', 'Test').add_text('Full Text', long_text).build()
+
+    assert estimate_tokens(section) <= 200
+    assert 'Sentence number 0 ' in section
@@ -0,0 +1,184 @@
+import sys
+from pathlib import Path
+from bs4 import BeautifulSoup
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent.parent)
+sys.path.append(project_root)
+
+from backend.src.services.rule_based_parser import (
+    CONFIDENCE_THRESHOLD,
+    RuleBasedListingParser,
+    ParsePathStats,
+    parse_amount,
+    extract_location,
+    extract_revenue
+)
+
+WEBSITE_CLOSERS_CARD = """
+<div class="post_content">
+    <a class="post_title" href="https://www.websiteclosers.com/businesses/b2b-saas-platform/">B2B SaaS Platform for Dental Clinics</a>
+    <div class="asking_price">Asking Price: <strong>$2.4M</strong></div>
+    <div class="cash_flow">Cash Flow: <strong>$650,000</strong></div>
+    <div class="revenue">Revenue: <strong>$1.8M</strong></div>
+    <div class="the_content">
+        This subscription software business serves over 400 dental clinics across North America.
+        Revenue grew 32% year over year with 95% of revenue being recurring.
+        The company has been established for 8 years in business and runs with 6 employees.
+        The business is located in Austin, TX and the owner is moving on to a new venture.
+    </div>
+</div>
+"""
+
+
+BUSINESS_EXITS_CARD = """
+<div class="listing_details">
+    <div class="listing_title">Profitable SaaS Platform for Property Managers</div>
+    <div class="listing_price">Listing Price: $3.2M</div>
+    <div class="listing_revenue">Revenue: $1,450,000</div>
+    <div class="listing_income">Income: $720K</div>
+</div>
+"""
+
+BUSINESS_EXITS_DETAILS = (
+    "This software business provides leasing and maintenance tools to property managers. "
+    "Revenue grew 28% last year and 90% of revenue is recurring subscriptions. "
+    "The team of 9 employees runs operations remotely, and the business is located in Denver, CO. "
+    "The founder is selling to focus on a new venture."
+)
+
+
+def simple_industry(title: str) -> str:
+    return 'Software/SaaS' if 'saas' in title.lower() else 'Other'
+
+
+def website_closers_listing_data(html: str) -> dict:
+    div = BeautifulSoup(html, 'html.parser').find('div', class_='post_content')
+    title_elem = div.find('a', class_='post_title')
+    return {
+        'raw_html': str(div),
+        'raw_text': div.get_text(separator=' ', strip=True),
+        'title_elem': title_elem,
+        'price_elem': div.find('div', class_='asking_price'),
+        'cash_flow_elem': div.find('div', class_='cash_flow'),
+        'revenue_elem': div.find('div', class_='revenue'),
+        'description_elem': div.find('div', class_='the_content'),
+        'source_platform': 'WebsiteClosers',
+        'listing_url': title_elem['href']
+    }
+
+
+def business_exits_listing(parser: RuleBasedListingParser, card: str, details: str = BUSINESS_EXITS_DETAILS):
+    """Parse a card the way BusinessExitsListingParser does, amounts read from its labelled divs"""
+    div = BeautifulSoup(card, 'html.parser').find('div', class_='listing_details')
+    elems = {name: div.find('div', class_=f'listing_{name}') for name in ('title', 'price', 'revenue', 'income')}
+    listing_data = {
+        'raw_html': str(div),
+        'raw_text': details,
+        'title_elem': elems['title'],
+        'price_elem': elems['price'],
+        'revenue_elem': elems['revenue'],
+        'income_elem': elems['income'],
+        'source_platform': 'BusinessExits',
+        'listing_url': 'https://businessexits.com/listing/saas-property-managers/'
+    }
+
+    def amount(name: str) -> int:
+        return parse_amount(elems[name].text.split(':')[-1]) if elems[name] else 0
+
+    return parser.parse_business_exits(listing_data, elems['title'].text.strip(),
+                                       amount('price'), amount('revenue'), amount('income'))
+
+
+def test_parse_amount():
+    assert parse_amount('$2.4M') == 2400000
+    assert parse_amount('Asking Price: $1,250,000') == 1250000
+    assert parse_amount('$500K - $750K') == 500000
+    assert parse_amount('1.5 million') == 1500000
+    assert parse_amount('Call for price') == 0
+
+
+def test_extract_revenue():
+    assert extract_revenue('Annual revenue of $850,000 and growing') == 850000
+    assert extract_revenue('The store did $3.2M in gross sales last year') == 3200000
+    assert extract_revenue('Revenue: $1.1 million') == 1100000
+    assert extract_revenue('Revenue grew 32% year over year') == 0
+
+
+def test_extract_location():
+    assert extract_location('The business is located in Austin, TX today') == 'Austin, TX'
+    assert extract_location('No location given') == 'United States'
+
+
+def test_recognized_website_closers_card_skips_llm():
+    parser = RuleBasedListingParser(simple_industry)
+    listing, confidence = parser.parse_website_closers(website_closers_listing_data(WEBSITE_CLOSERS_CARD))
+
+    assert parser.is_confident(confidence)
+    assert listing['asking_price'] == 2400000
+    assert listing['ebitda'] == 650000
+    assert listing['revenue'] == 1800000
+    assert listing['industry'] == 'Software/SaaS'
+    assert listing['location'] == 'Austin, TX'
+    assert any('recurring' in highlight for highlight in listing['business_highlights'].values())
+
+
+def test_unrecognized_card_is_low_confidence():
+    card = WEBSITE_CLOSERS_CARD.replace('$2.4M', 'Contact broker').replace('$650,000', 'N/A')
+    card = card.replace('B2B SaaS Platform', 'Established Business')
+    parser = RuleBasedListingParser(simple_industry)
+    _, confidence = parser.parse_website_closers(website_closers_listing_data(card))
+
+    assert not parser.is_confident(confidence)
+
+
+def test_recognized_business_exits_card_skips_llm():
+    parser = RuleBasedListingParser(simple_industry)
+    listing, confidence = business_exits_listing(parser, BUSINESS_EXITS_CARD)
+
+    assert confidence >= CONFIDENCE_THRESHOLD and parser.is_confident(confidence)
+    assert (listing['asking_price'], listing['revenue'], listing['ebitda']) == (3200000, 1450000, 720000)
+    assert listing['industry'] == 'Software/SaaS'
+    assert listing['location'] == 'Denver, CO'
+    assert listing['raw_data']['parsed_data']['parser'] == 'rules'
+
+
+def test_business_exits_card_without_price_or_revenue_falls_back_to_llm():
+    parser = RuleBasedListingParser(simple_industry)
+    for missing in ('Listing Price: $3.2M', 'Revenue: $1,450,000'):
+        card = BUSINESS_EXITS_CARD.replace(missing, missing.split(':')[0] + ': Contact broker')
+        listing, confidence = business_exits_listing(parser, card)
+        assert listing is not None
+        assert confidence < CONFIDENCE_THRESHOLD and not parser.is_confident(confidence), missing
+
+    # Income alone missing is still parsed without the LLM
+    _, confidence = business_exits_listing(parser, BUSINESS_EXITS_CARD.replace('$720K', 'N/A'))
+    assert parser.is_confident(confidence)
+
+    # Without a price element the card is not recognized at all
+    card = BUSINESS_EXITS_CARD.replace('<div class="listing_price">Listing Price: $3.2M</div>', '')
+    assert business_exits_listing(parser, card) == (None, 0.0)
+
+
+def test_revenue_from_card_text_or_llm_fallback():
+    parser = RuleBasedListingParser(simple_industry)
+    without_div = WEBSITE_CLOSERS_CARD.replace('<div class="revenue">Revenue: <strong>$1.8M</strong></div>', '')
+    listing, _ = parser.parse_website_closers(website_closers_listing_data(
+        without_div.replace('Revenue grew 32%', 'Annual revenue of $1.5M grew 32%')))
+    assert listing['revenue'] == 1500000
+
+    # Without any revenue figure the LLM gets a chance to find one
+    _, confidence = parser.parse_website_closers(website_closers_listing_data(without_div))
+    assert not parser.is_confident(confidence)
+
+
+def test_parse_path_stats():
+    stats = ParsePathStats('WebsiteClosers')
+    stats.record('rules')
+    stats.record('rules')
+    stats.record('rules')
+    stats.record('llm')
+
+    assert stats.total == 4
+    assert stats.fraction('rules') == 0.75
+    assert stats.fraction('llm') == 0.25
@@ -0,0 +1,257 @@
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta, UTC
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent.parent)
+sys.path.append(project_root)
+
+from backend.src.database.listing_record import Listing
+from backend.src.database.keyword_query import KeywordQuery
+from backend.src.database.sqlite_backend import SQLiteBackend
+
+
+def make_listing(i: int, **overrides) -> Listing:
+    data = {
+        'title': f'SaaS Business {i}',
+        'listing_url': f'https://example.com/listing/{i}',
+        'source_platform': 'Flippa',
+        'asking_price': 100000 * (i + 1),
+        'revenue': 200000,
+        'ebitda': 50000,
+        'industry': 'Software/SaaS',
+        'full_description': f'Recurring revenue software business number {i}',
+        'raw_data': {'raw_html': '<div>' * 100}
+    }
+    data.update(overrides)
+    return Listing.from_dict(data)
+
+
+def test_listings_round_trip():
+    db = SQLiteBackend()
+    listing_id = db.store_listing(make_listing(1))
+
+    assert db.store_listing(make_listing(1, asking_price=1)) == listing_id
+    assert db.get_existing_listing_urls(['https://example.com/listing/1', 'https://example.com/new']) == [
+        'https://example.com/listing/1'
+    ]
+    assert db.get_listing_raw_data(listing_id) == {'raw_html': '<div>' * 100}
+
+    row = next(db.stream_rows('listings', db.LISTING_CARD_COLUMNS))
+    assert row['asking_price'] == 1
+    assert row['profit_margin'] == 25.0
+    assert row['selling_multiple'] == 1 / 50000
+
+
+def test_stream_rows_filters_and_pages():
+    db = SQLiteBackend()
+    for i in range(12):
+        db.store_listing(make_listing(i))
+
+    rows = list(db.stream_rows('listings', 'asking_price', filters=[('gte', 'asking_price', 500000)],
+                               page_size=3, cursor_column='asking_price', descending=True))
+    assert [row['asking_price'] for row in rows] == [100000 * n for n in range(12, 4, -1)]
+
+
+def test_alerts_users_and_newsletter_logs():
+    db = SQLiteBackend()
+    db.insert_many('users', [{'id': 'u1', 'email': 'buyer@example.com', 'created_at': '2024-01-01T00:00:00+00:00'}])
+    db.insert_many('alerts', [{'id': 'a1', 'user_id': 'u1', 'name': 'SaaS', 'industries': ['SaaS'],
+                               'newsletter_frequency': 'instantly'}])
+
+    alerts = db.get_alerts_with_users(frequency='instantly')
+    assert alerts[0]['users'] == {'id': 'u1', 'email': 'buyer@example.com'}
+    assert alerts[0]['industries'] == ['SaaS']
+    assert db.get_alerts_with_users(frequency='daily') == []
+
+    log_id = db.create_newsletter_log('u1', datetime.now(UTC) - timedelta(minutes=1), alert_id='a1')
+    assert db.has_pending_newsletter('a1')
+    assert [log['id'] for log in db.get_pending_newsletters()] == [log_id]
+
+    db.update_newsletter_status(log_id, 'sent')
+    db.mark_alert_notified('a1')
+    assert db.get_newsletter_state(log_id)['status'] == 'sent'
+    assert not db.has_pending_newsletter('a1')
+    assert db.get_alert('a1')['last_notification_sent'] is not None
+
+
+def test_store_listing_writes_only_changes():
+    db = SQLiteBackend()
+    listing_id = db.store_listing(make_listing(1))
+    first = db._rows('listings', "SELECT * FROM listings WHERE id = ?", [listing_id])[0]
+    db._write("UPDATE listings SET last_seen_at = '2000-01-01', first_seen_at = '2000-01-01' WHERE id = ?",
+              [listing_id])
+
+    # Unchanged: nothing is written until the seen buffer is flushed
+    assert db.store_listing(make_listing(1)) == listing_id
+    row = db._rows('listings', "SELECT * FROM listings WHERE id = ?", [listing_id])[0]
+    assert row['last_seen_at'] == '2000-01-01'
+    assert db.flush_seen_listings() == 1
+    row = db._rows('listings', "SELECT * FROM listings WHERE id = ?", [listing_id])[0]
+    assert row['last_seen_at'] > '2000-01-01'
+    assert row['first_seen_at'] == '2000-01-01'
+    assert row['content_hash'] == first['content_hash']
+
+    # Changed: the new value and fingerprint are written, first_seen_at is kept
+    db.store_listing(make_listing(1, revenue=300000))
+    row = db._rows('listings', "SELECT * FROM listings WHERE id = ?", [listing_id])[0]
+    assert row['revenue'] == 300000
+    assert row['content_hash'] != first['content_hash']
+    assert row['first_seen_at'] == '2000-01-01'
+    assert db.flush_seen_listings() == 0
+
+
+def test_known_urls_skipped_by_scrapers_are_marked_seen(tmp_path):
+    path = str(tmp_path / 'listings.db')
+    db = SQLiteBackend(path)
+    listing_id = db.store_listing(make_listing(1))
+    db._write("UPDATE listings SET last_seen_at = '2000-01-01', status = 'inactive' WHERE id = ?", [listing_id])
+
+    # Each scraper opens its own backend; the run flushes the shared buffer from another
+    scraper_db = SQLiteBackend(path)
+    assert scraper_db.get_existing_listing_urls(['https://example.com/listing/1']) == [
+        'https://example.com/listing/1'
+    ]
+    assert db.flush_seen_listings() == 1
+    row = db._rows('listings', "SELECT last_seen_at, status FROM listings WHERE id = ?", [listing_id])[0]
+    assert row['last_seen_at'] > '2000-01-01'
+    assert row['status'] == 'active'
+    # In-memory databases keep their own buffers
+    assert SQLiteBackend().flush_seen_listings() == 0
+
+
+def test_sweep_marks_listings_missed_by_recent_runs_inactive():
+    db = SQLiteBackend()
+    stale_id = db.store_listing(make_listing(1))
+    fresh_id = db.store_listing(make_listing(2))
+    other_id = db.store_listing(make_listing(3, source_platform='BizBuySell'))
+    db._write("UPDATE listings SET last_seen_at = '2000-01-01' WHERE id IN (?, ?)", [stale_id, other_id])
+
+    for days_ago in (3, 2):
+        db.record_scraper_run('Flippa', datetime.now(UTC) - timedelta(days=days_ago), 2)
+    db.record_scraper_run('Flippa', datetime.now(UTC) - timedelta(days=1), 0, succeeded=False)
+    # BizBuySell has too few successful runs to judge
+    db.record_scraper_run('BizBuySell', datetime.now(UTC) - timedelta(days=3), 1)
+
+    assert db.sweep_stale_listings(missed_runs=2) == {'Flippa': 1}
+    statuses = {row['id']: row['status'] for row in db.stream_rows('listings', 'id,status')}
+    assert statuses == {stale_id: 'inactive', fresh_id: 'active', other_id: 'active'}
+
+    # Seen again: reactivated even though its content did not change
+    db.store_listing(make_listing(1))
+    assert db._rows('listings', "SELECT status FROM listings WHERE id = ?", [stale_id])[0]['status'] == 'active'
+
+
+def test_listings_skipped_as_known_survive_the_sweep(tmp_path):
+    path = str(tmp_path / 'listings.db')
+    db = SQLiteBackend(path)
+    kept_id = db.store_listing(make_listing(1))
+    gone_id = db.store_listing(make_listing(2))
+    db._write("UPDATE listings SET last_seen_at = '2000-01-01'")
+
+    swept = []
+    for _ in range(3):
+        started_at = db.start_scraper_run()
+        # The scraper finds listing 1 already stored and never passes it to store_listing
+        scraper_db = SQLiteBackend(path)
+        scraper_db.get_existing_listing_urls(['https://example.com/listing/1'])
+        assert db.finish_scraper_run(started_at) == {'Flippa': 1}
+        swept.append(db.sweep_stale_listings(missed_runs=3))
+
+    assert swept == [{}, {}, {'Flippa': 1}]
+    statuses = {row['id']: row['status'] for row in db.stream_rows('listings', 'id,status')}
+    assert statuses == {kept_id: 'active', gone_id: 'inactive'}
+    runs = db._rows('scraper_runs', "SELECT listings_seen, status FROM scraper_runs")
+    assert runs == [{'listings_seen': 1, 'status': 'succeeded'}] * 3
+
+
+def test_finish_scraper_run_counts_stored_and_failed_sources():
+    db = SQLiteBackend()
+    db.store_listing(make_listing(1))
+    started_at = db.start_scraper_run()
+    db.store_listing(make_listing(1))
+    db.store_listing(make_listing(2))
+    db.store_listing(make_listing(3, source_platform='BizBuySell'))
+
+    assert db.finish_scraper_run(started_at, failed_sources={'BizBuySell'}) == {'Flippa': 2, 'BizBuySell': 1}
+    runs = db._rows('scraper_runs', "SELECT source_platform, listings_seen, status FROM scraper_runs "
+                                    "ORDER BY source_platform")
+    assert runs == [{'source_platform': 'BizBuySell', 'listings_seen': 1, 'status': 'failed'},
+                    {'source_platform': 'Flippa', 'listings_seen': 2, 'status': 'succeeded'}]
+
+
+def test_metric_changes_are_snapshotted_and_published():
+    db = SQLiteBackend()
+    events = []
+    db.subscribe_listing_changes(events.append)
+    listing_id = db.store_listing(make_listing(1, asking_price=500000))
+
+    # New listings and content-only edits do not create snapshots
+    db.store_listing(make_listing(1, asking_price=500000, title='Renamed'))
+    assert events == []
+
+    db.store_listing(make_listing(1, asking_price=450000, title='Renamed'))
+    db.store_listing(make_listing(2))
+    db.store_listing(make_listing(2, asking_price=900000))
+
+    assert [(e.listing_id, e.changes, e.price_dropped) for e in events[:1]] == [
+        (listing_id, {'asking_price': (500000, 450000)}, True)
+    ]
+    assert events[1].price_change == 600000
+
+    drops = db.get_price_drops(datetime.now(UTC) - timedelta(days=7))
+    assert [(d['listing_id'], d['previous_asking_price'], d['asking_price'], d['price_change']) for d in drops] == [
+        (listing_id, 500000, 450000, -50000)
+    ]
+    assert drops[0]['revenue'] == 200000 and drops[0]['previous_revenue'] == 200000
+
+
+def test_newsletter_candidates_hold_recent_active_listings():
+    db = SQLiteBackend()
+    recent_id = db.store_listing(make_listing(1, title='Profitable SaaS', industry=' '))
+    old_id = db.store_listing(make_listing(2))
+    inactive_id = db.store_listing(make_listing(3))
+    db._write("UPDATE listings SET created_at = '2000-01-01' WHERE id = ?", [old_id])
+    db._write("UPDATE listings SET status = 'inactive' WHERE id = ?", [inactive_id])
+
+    db.refresh_newsletter_candidates()
+    rows = list(db.stream_rows(db.NEWSLETTER_CANDIDATES,
+                                'id,industry,search_title,search_description,search_location'))
+    assert [{k: v for k, v in row.items() if k != 'created_at'} for row in rows] == [
+        {'id': recent_id, 'industry': 'Other', 'search_title': 'profitable saas',
+         'search_description': 'recurring revenue software business number 1',
+         'search_location': 'united states'}
+    ]
+
+
+def test_sale_pending_listings_stay_live():
+    db = SQLiteBackend()
+    db.insert_many('alerts', [{'id': 'a1', 'name': 'SaaS', 'industries': []}])
+    pending_id = db.store_listing(make_listing(1, source_platform='BusinessExits', status='pending'))
+    db.insert_many('alert_matches', [{'alert_id': 'a1', 'listing_id': pending_id, 'matched_at': '2024-01-01'}])
+
+    db.refresh_newsletter_candidates()
+    assert [row['id'] for row in db.stream_rows(db.NEWSLETTER_CANDIDATES, 'id')] == [pending_id]
+    assert [row['id'] for row in db.get_pending_alert_matches('a1')] == [pending_id]
+
+    db._write("UPDATE listings SET last_seen_at = '2000-01-01'")
+    db.record_scraper_run('BusinessExits', datetime.now(UTC) - timedelta(days=1), 0)
+    assert db.sweep_stale_listings(missed_runs=1) == {'BusinessExits': 1}
+
+
+def test_search_candidates_matches_ranks_and_excludes():
+    db = SQLiteBackend()
+    db.store_listing(make_listing(1, title='Amazon FBA brand', full_description='Pet supplies'))
+    db.store_listing(make_listing(2, title='Pet store', full_description='Amazon FBA listings and pet toys'))
+    db.store_listing(make_listing(3, title='Amazon FBA kitchen', full_description='Kitchen gadgets'))
+    db.store_listing(make_listing(4, title='Agency', full_description='Marketing services'))
+    db.refresh_newsletter_candidates()
+
+    query = KeywordQuery.from_alert({'search_keywords': ['amazon fba'], 'exclude_keywords': ['kitchen']})
+    matched = db.search_candidates('title', [], query)
+    # Title hits rank above description hits; excluded listings never come back
+    assert [row['title'] for row in matched] == ['Amazon FBA brand', 'Pet store']
+    assert [row['title'] for row in db.search_candidates('title', [], query, matching=False)] == ['Agency']
+
+    filtered = db.search_candidates('title', [('gte', 'asking_price', 300000)], query)
+    assert [row['title'] for row in filtered] == ['Pet store']
@@ -0,0 +1,87 @@
+import re
+import sys
+import json
+from pathlib import Path
+
+import httpx
+from postgrest import SyncPostgrestClient
+from postgrest.utils import SyncClient
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent.parent)
+sys.path.append(project_root)
+
+from backend.src.database.supabase_db import SupabaseClient
+
+# Several rows share a created_at so pages have to break ties on id
+ROWS = [
+    {'id': f'{i:04d}', 'created_at': f'2024-03-{1 + i // 3:02d}T00:00:00+00:00', 'asking_price': i * 1000}
+    for i in range(25)
+]
+
+
+class LocalPostgrest:
+    """Serves ROWS over PostgREST's query syntax for the filters stream_rows sends"""
+
+    def __init__(self):
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        self.requests.append(params)
+        rows = list(ROWS)
+
+        if 'asking_price' in params:
+            minimum = int(params['asking_price'].split('.', 1)[1])
+            rows = [row for row in rows if row['asking_price'] >= minimum]
+
+        descending = params['order'].startswith('created_at.desc')
+        if 'or' in params:
+            op, value, row_id = re.match(r'\(created_at\.(gt|lt)\."([^"]+)",and\(.*id\.\w+\."([^"]+)"\)\)',
+                                         params['or']).groups()
+            key = (value, row_id)
+            rows = [row for row in rows if ((row['created_at'], row['id']) > key) == (op == 'gt')
+                    and (row['created_at'], row['id']) != key]
+
+        rows.sort(key=lambda row: (row['created_at'], row['id']), reverse=descending)
+        rows = rows[:int(params['limit'])]
+        return httpx.Response(200, json=rows, headers={'Content-Range': f'0-{len(rows)}/*'})
+
+
+def make_client(server: LocalPostgrest) -> SupabaseClient:
+    class Postgrest(SyncPostgrestClient):
+        def create_session(self, base_url, headers, timeout):
+            return SyncClient(base_url=base_url, headers=headers, transport=httpx.MockTransport(server))
+
+    db = SupabaseClient.__new__(SupabaseClient)
+    db.client = Postgrest('http://localhost/rest/v1')
+    db.client.table = db.client.from_
+    return db
+
+
+def test_streams_every_row_in_keyset_order():
+    server = LocalPostgrest()
+    rows = list(make_client(server).stream_rows('listings', 'asking_price', page_size=4))
+
+    assert [row['id'] for row in rows] == [row['id'] for row in ROWS]
+    assert len(server.requests) == 7
+    assert server.requests[0]['select'] == 'asking_price,created_at,id'
+
+
+def test_descending_with_filters():
+    server = LocalPostgrest()
+    db = make_client(server)
+    rows = list(db.stream_rows('listings', 'id,created_at', filters=[('gte', 'asking_price', 10000)],
+                               page_size=5, descending=True))
+
+    assert [row['id'] for row in rows] == [row['id'] for row in reversed(ROWS[10:])]
+    assert all(params['asking_price'] == 'gte.10000' for params in server.requests)
+
+
+def test_is_lazy():
+    server = LocalPostgrest()
+    stream = make_client(server).stream_rows('listings', page_size=10)
+
+    assert server.requests == []
+    next(stream)
+    assert len(server.requests) == 1
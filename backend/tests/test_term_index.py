@@ -0,0 +1,51 @@
+import sys
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent.parent)
+sys.path.append(project_root)
+
+from backend.src.database.keyword_query import KeywordQuery, term_frequencies
+from backend.src.services.term_index import TermIndex
+
+LISTINGS = [
+    {'title': 'Amazon FBA brand', 'description': 'Pet supplies sold on Amazon'},
+    {'title': 'Pet store', 'description': 'Amazon FBA listings and pet toys'},
+    {'title': 'Agency', 'description': 'Marketing services for SaaS founders'},
+    {'title': 'SaaSy tools', 'description': 'Subscription software'},
+]
+
+
+def build():
+    index = TermIndex()
+    for doc, listing in enumerate(LISTINGS):
+        index.add(doc, term_frequencies(listing))
+    return index
+
+
+def test_bm25_boosts_title_hits_and_expands_prefixes():
+    index = build()
+    scores = index.scores(KeywordQuery([['amazon', 'fba']]))
+    assert scores[0] > scores[1] > 0
+    assert scores[2] == scores[3] == 0
+
+    assert index.expand('saas', prefix=True) == ('saas', 'saasy')
+    assert index.expand('saas') == ('saas',)
+    scores = index.scores(KeywordQuery([['saas']]))
+    assert scores[3] > scores[2] > 0
+    # Only the alert's search fields count
+    assert index.scores(KeywordQuery([['saas']], fields=('description',)))[3] == 0
+
+
+def test_documents_are_replaced_and_removed_incrementally():
+    index = build()
+    index.add(2, term_frequencies({'title': 'Amazon FBA agency'}))
+    scores = index.scores(KeywordQuery([['amazon', 'fba']]))
+    assert scores[2] > scores[1]
+
+    index.remove(2)
+    index.remove(3)
+    assert len(index) == 2
+    assert index.expand('saas', prefix=True) == ()
+    assert index.scores(KeywordQuery([['amazon']]))[2] == 0
+    assert index.scores(KeywordQuery([['agency']])).sum() == 0
@@ -1,7 +1,6 @@
 import os
 import sys
 import traceback
-import json
 from dotenv import load_dotenv
 
 # Add the project root directory to Python path
@@ -25,14 +24,11 @@ def print_listing_summary(listing):
     print(f"EBITDA: ${listing.get('ebitda', 0):,}")
     
     # Print raw financial details for debugging
-    try:
-        financial_details = json.loads(listing.get('financial_details', '{}'))
-        print(f"\nDetailed Financial Info:")
-        print(f"Revenue Multiple: {financial_details.get('revenue_multiple', 0):.2f}x")
-        print(f"Monthly Profit: ${financial_details.get('monthly_profit', 0):,}")
-        print(f"Annual Profit: ${financial_details.get('annual_profit', 0):,}")
-    except json.JSONDecodeError:
-        print("Could not parse financial details")
+    financial_details = listing.get('financial_details', {})
+    print(f"\nDetailed Financial Info:")
+    print(f"Revenue Multiple: {financial_details.get('revenue_multiple', 0):.2f}x")
+    print(f"Monthly Profit: ${financial_details.get('monthly_profit', 0):,}")
+    print(f"Annual Profit: ${financial_details.get('annual_profit', 0):,}")
     print(f"{'='*80}\n")
 
 def main():
@@ -0,0 +1,36 @@
+-- Content-addressed store for bulky listing payloads (raw HTML, AgentQL dumps)
+CREATE TABLE IF NOT EXISTS listing_payloads (
+    hash TEXT PRIMARY KEY,                  -- sha256 of the payload's JSON text
+    encoding TEXT NOT NULL DEFAULT 'zlib',  -- 'zlib' from the backend, 'identity' from the backfill below
+    payload BYTEA NOT NULL,
+    raw_bytes INTEGER,
+    stored_bytes INTEGER,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    CONSTRAINT check_payload_encoding CHECK (encoding IN ('zlib', 'identity'))
+);
+
+-- Listings reference their payload by hash instead of carrying it in the row
+ALTER TABLE public.listings
+ADD COLUMN IF NOT EXISTS raw_data_hash TEXT REFERENCES listing_payloads(hash);
+
+ALTER TABLE public.listings
+ALTER COLUMN raw_data DROP NOT NULL;
+
+-- Move existing raw_data out of listings. Postgres cannot zlib-compress, so these rows
+-- are stored uncompressed; the backend compresses everything it writes from now on.
+INSERT INTO listing_payloads (hash, encoding, payload, raw_bytes, stored_bytes)
+SELECT DISTINCT ON (hash) hash, 'identity', payload, octet_length(payload), octet_length(payload)
+FROM (
+    SELECT encode(sha256(convert_to(raw_data::text, 'UTF8')), 'hex') AS hash,
+           convert_to(raw_data::text, 'UTF8') AS payload
+    FROM listings
+    WHERE raw_data IS NOT NULL AND raw_data_hash IS NULL
+) existing
+ON CONFLICT (hash) DO NOTHING;
+
+UPDATE listings
+SET raw_data_hash = encode(sha256(convert_to(raw_data::text, 'UTF8')), 'hex'),
+    raw_data = NULL
+WHERE raw_data IS NOT NULL AND raw_data_hash IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_listings_raw_data_hash ON listings(raw_data_hash);
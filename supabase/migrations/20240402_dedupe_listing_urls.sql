@@ -0,0 +1,45 @@
+-- Merge duplicate listing_url rows before 20240402_index_listings_for_alerts builds
+-- the unique index store_listing relies on. For each URL the most recently seen copy
+-- is kept; every other copy is moved to listings_duplicates_archive, together with the
+-- id of the row that replaced it, so the cleanup can be audited or undone.
+
+CREATE TABLE IF NOT EXISTS listings_duplicates_archive (LIKE listings);
+ALTER TABLE listings_duplicates_archive
+    ADD COLUMN IF NOT EXISTS kept_listing_id UUID,
+    ADD COLUMN IF NOT EXISTS archived_at TIMESTAMPTZ NOT NULL DEFAULT now();
+
+DO $$
+DECLARE
+    archived INTEGER;
+BEGIN
+    -- Rows in tables referencing listings(id) with ON DELETE CASCADE would go with the
+    -- dropped copies without being archived. Nothing references listings when this
+    -- migration first runs; if something does, stop instead of deleting.
+    IF EXISTS (SELECT 1 FROM pg_constraint WHERE confrelid = 'listings'::regclass AND contype = 'f')
+       AND EXISTS (SELECT 1 FROM listings GROUP BY listing_url HAVING count(*) > 1) THEN
+        RAISE EXCEPTION 'listings has duplicate listing_url rows and is referenced by other tables: '
+                        'merge the duplicates before building idx_listings_listing_url';
+    END IF;
+
+    WITH ranked AS (
+        SELECT id,
+               first_value(id) OVER newest_first AS kept_listing_id,
+               row_number() OVER newest_first AS copy
+        FROM listings
+        WINDOW newest_first AS (
+            PARTITION BY listing_url
+            ORDER BY COALESCE(last_seen_at, created_at, '-infinity') DESC, id::text DESC
+        )
+    ),
+    removed AS (
+        DELETE FROM listings l
+        USING ranked r
+        WHERE l.id = r.id AND r.copy > 1
+        RETURNING l.*, r.kept_listing_id
+    )
+    INSERT INTO listings_duplicates_archive
+    SELECT * FROM removed;
+
+    GET DIAGNOSTICS archived = ROW_COUNT;
+    RAISE NOTICE 'Archived % duplicate listing rows to listings_duplicates_archive', archived;
+END $$;
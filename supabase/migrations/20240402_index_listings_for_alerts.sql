@@ -0,0 +1,36 @@
+-- Indexes for the listings query shapes used by store_listing and alert matching.
+-- Table names are unqualified so backend/benchmarks/listings_index_explain.py can
+-- apply this file to a scratch schema.
+
+-- store_listing looks listings up by URL. Duplicate rows are merged beforehand by
+-- 20240402_dedupe_listing_urls.sql; nothing is deleted here.
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM listings GROUP BY listing_url HAVING count(*) > 1) THEN
+        RAISE EXCEPTION 'listings has duplicate listing_url rows: apply 20240402_dedupe_listing_urls.sql '
+                        'before building idx_listings_listing_url';
+    END IF;
+END $$;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_listings_listing_url ON listings(listing_url);
+
+-- get_matching_listings: live listings (status 'active', or 'pending' for a sale
+-- pending on BusinessExits) created after the cutoff, plus optional asking_price /
+-- revenue / ebitda ranges. The price columns are carried in the index so range
+-- filters are checked without visiting the heap.
+CREATE INDEX IF NOT EXISTS idx_listings_active_created_at
+ON listings(created_at DESC)
+INCLUDE (asking_price, revenue, ebitda)
+WHERE status IN ('active', 'pending');
+
+-- Same shape with industry IN (...): one index range per industry, newest first
+CREATE INDEX IF NOT EXISTS idx_listings_active_industry_created_at
+ON listings(industry, created_at DESC)
+WHERE status IN ('active', 'pending');
+
+-- Narrow price bands over a long window (monthly alerts, first newsletter)
+CREATE INDEX IF NOT EXISTS idx_listings_active_asking_price
+ON listings(asking_price, created_at)
+WHERE status IN ('active', 'pending');
+
+ANALYZE listings;
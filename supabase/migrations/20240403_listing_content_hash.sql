@@ -0,0 +1,3 @@
+-- Fingerprint of a listing's scraped content. store_listing compares it before writing,
+-- so unchanged re-scrapes only bump last_seen_at and changed ones write just the diff.
+ALTER TABLE listings ADD COLUMN IF NOT EXISTS content_hash TEXT;
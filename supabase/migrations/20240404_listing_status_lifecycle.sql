@@ -0,0 +1,54 @@
+-- Listing status lifecycle. Each scraper run records one row per platform. After a run,
+-- live listings ('active', or 'pending' while a sale is pending) that were not seen in a
+-- platform's last N successful runs are marked inactive, so alert queries (all
+-- restricted to live listings) only scan the live market. A listing that shows up
+-- again is reactivated by store_listing.
+
+CREATE TABLE IF NOT EXISTS scraper_runs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    source_platform TEXT NOT NULL,
+    started_at TIMESTAMPTZ NOT NULL,
+    finished_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    listings_seen INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL CHECK (status IN ('succeeded', 'failed'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_scraper_runs_succeeded
+ON scraper_runs(source_platform, started_at DESC)
+WHERE status = 'succeeded';
+
+-- The sweeper's scan: live listings of one platform, oldest sighting first
+CREATE INDEX IF NOT EXISTS idx_listings_active_platform_last_seen
+ON listings(source_platform, last_seen_at)
+WHERE status IN ('active', 'pending');
+
+-- Marks stale listings inactive in one set-based UPDATE across all platforms. A platform's
+-- cutoff is the start of its missed_runs-th most recent successful run. Platforms with
+-- fewer successful runs than that are left alone. content_hash is cleared so the next
+-- sighting writes its status back instead of being skipped as unchanged.
+CREATE OR REPLACE FUNCTION sweep_stale_listings(missed_runs INTEGER DEFAULT 3)
+RETURNS TABLE (platform TEXT, swept BIGINT)
+LANGUAGE sql
+AS $$
+    WITH ranked AS (
+        SELECT r.source_platform, r.started_at,
+               row_number() OVER (PARTITION BY r.source_platform ORDER BY r.started_at DESC) AS run_number
+        FROM scraper_runs r
+        WHERE r.status = 'succeeded'
+    ),
+    cutoffs AS (
+        SELECT ranked.source_platform, ranked.started_at AS cutoff
+        FROM ranked
+        WHERE ranked.run_number = missed_runs
+    ),
+    deactivated AS (
+        UPDATE listings l
+        SET status = 'inactive', content_hash = NULL
+        FROM cutoffs c
+        WHERE l.source_platform = c.source_platform
+          AND l.status IN ('active', 'pending')
+          AND COALESCE(l.last_seen_at, l.created_at) < c.cutoff
+        RETURNING l.source_platform
+    )
+    SELECT d.source_platform, count(*) FROM deactivated d GROUP BY d.source_platform;
+$$;
@@ -0,0 +1,26 @@
+-- Append-only price/metric history. store_listing writes one compact row when a
+-- listing's asking_price, revenue or ebitda changes, with the previous values
+-- alongside, so "price dropped in the last 7 days" is an index range scan.
+
+CREATE TABLE IF NOT EXISTS listing_snapshots (
+    id BIGSERIAL PRIMARY KEY,
+    listing_id UUID NOT NULL REFERENCES listings(id) ON DELETE CASCADE,
+    source_platform TEXT,
+    observed_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    asking_price BIGINT,
+    revenue BIGINT,
+    ebitda BIGINT,
+    previous_asking_price BIGINT,
+    previous_revenue BIGINT,
+    previous_ebitda BIGINT,
+    price_change BIGINT GENERATED ALWAYS AS (asking_price - previous_asking_price) STORED
+);
+
+-- A listing's history, newest first
+CREATE INDEX IF NOT EXISTS idx_listing_snapshots_listing
+ON listing_snapshots(listing_id, observed_at DESC);
+
+-- get_price_drops: price_change < 0 AND observed_at >= since
+CREATE INDEX IF NOT EXISTS idx_listing_snapshots_price_drops
+ON listing_snapshots(observed_at DESC, id DESC)
+WHERE price_change < 0;
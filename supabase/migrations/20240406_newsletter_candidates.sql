@@ -0,0 +1,49 @@
+-- Newsletter matching reads from a small materialized copy of recent active listings
+-- instead of re-querying listings once per alert. It has only the card columns plus
+-- pre-normalized industry and pre-lowercased search fields. run_scrapers refreshes it
+-- after every scrape through refresh_newsletter_candidates(). The window is one day
+-- longer than the longest alert lookback (30 days) so the edge is always covered.
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS newsletter_candidates AS
+SELECT
+    id,
+    title,
+    listing_url,
+    source_platform,
+    asking_price,
+    revenue,
+    ebitda,
+    profit_margin,
+    selling_multiple,
+    COALESCE(NULLIF(btrim(industry), ''), 'Other') AS industry,
+    location,
+    description,
+    business_age,
+    number_of_employees,
+    created_at,
+    lower(COALESCE(title, '')) AS search_title,
+    lower(COALESCE(description, '')) AS search_description,
+    lower(COALESCE(location, '')) AS search_location
+FROM listings
+WHERE status IN ('active', 'pending')
+  AND created_at > now() - interval '31 days';
+
+-- Required for REFRESH ... CONCURRENTLY, and the stream_rows keyset tiebreak
+CREATE UNIQUE INDEX IF NOT EXISTS idx_newsletter_candidates_id ON newsletter_candidates(id);
+CREATE INDEX IF NOT EXISTS idx_newsletter_candidates_created_at
+ON newsletter_candidates(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_newsletter_candidates_industry_created_at
+ON newsletter_candidates(industry, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_newsletter_candidates_asking_price
+ON newsletter_candidates(asking_price, created_at);
+
+-- Concurrent refresh keeps the view readable while newsletters are being matched
+CREATE OR REPLACE FUNCTION refresh_newsletter_candidates()
+RETURNS void
+LANGUAGE sql
+SECURITY DEFINER
+AS $$
+    REFRESH MATERIALIZED VIEW CONCURRENTLY newsletter_candidates;
+$$;
+
+GRANT SELECT ON newsletter_candidates TO anon, authenticated, service_role;
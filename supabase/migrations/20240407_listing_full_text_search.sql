@@ -0,0 +1,94 @@
+-- Full-text search for alert keywords. listings gets a generated, weighted tsvector
+-- (title A, description B, location C) with a GIN index. newsletter_candidates carries
+-- it instead of the lowercased text copies. search_newsletter_candidates() matches a
+-- compiled alert tsquery against it and ranks server-side, so only matched rows are
+-- returned. description already holds the full description when one was scraped
+-- (see Listing.to_row), so it is the only body text indexed.
+
+ALTER TABLE listings ADD COLUMN IF NOT EXISTS search_vector tsvector
+GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', COALESCE(title, '')), 'A') ||
+    setweight(to_tsvector('english', COALESCE(description, '')), 'B') ||
+    setweight(to_tsvector('english', COALESCE(location, '')), 'C')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_listings_search_vector ON listings USING GIN (search_vector);
+
+DROP MATERIALIZED VIEW IF EXISTS newsletter_candidates;
+
+CREATE MATERIALIZED VIEW newsletter_candidates AS
+SELECT
+    id,
+    title,
+    listing_url,
+    source_platform,
+    asking_price,
+    revenue,
+    ebitda,
+    profit_margin,
+    selling_multiple,
+    COALESCE(NULLIF(btrim(industry), ''), 'Other') AS industry,
+    location,
+    description,
+    business_age,
+    number_of_employees,
+    created_at,
+    search_vector
+FROM listings
+WHERE status IN ('active', 'pending')
+  AND created_at > now() - interval '31 days';
+
+CREATE UNIQUE INDEX idx_newsletter_candidates_id ON newsletter_candidates(id);
+CREATE INDEX idx_newsletter_candidates_created_at ON newsletter_candidates(created_at DESC, id DESC);
+CREATE INDEX idx_newsletter_candidates_industry_created_at ON newsletter_candidates(industry, created_at DESC);
+CREATE INDEX idx_newsletter_candidates_asking_price ON newsletter_candidates(asking_price, created_at);
+CREATE INDEX idx_newsletter_candidates_search_vector ON newsletter_candidates USING GIN (search_vector);
+
+GRANT SELECT ON newsletter_candidates TO anon, authenticated, service_role;
+
+CREATE OR REPLACE FUNCTION refresh_newsletter_candidates()
+RETURNS void
+LANGUAGE sql
+SECURITY DEFINER
+AS $$
+    REFRESH MATERIALIZED VIEW CONCURRENTLY newsletter_candidates;
+$$;
+
+-- Candidates matching search_query (matching = true), or the ones that don't
+-- (matching = false), never those matching exclude_query. PostgREST applies the
+-- alert's numeric filters, ordering and limit on top of the result.
+CREATE OR REPLACE FUNCTION search_newsletter_candidates(
+    search_query TEXT,
+    exclude_query TEXT DEFAULT NULL,
+    matching BOOLEAN DEFAULT TRUE
+)
+RETURNS TABLE (
+    id newsletter_candidates.id%TYPE,
+    title newsletter_candidates.title%TYPE,
+    listing_url newsletter_candidates.listing_url%TYPE,
+    source_platform newsletter_candidates.source_platform%TYPE,
+    asking_price newsletter_candidates.asking_price%TYPE,
+    revenue newsletter_candidates.revenue%TYPE,
+    ebitda newsletter_candidates.ebitda%TYPE,
+    profit_margin newsletter_candidates.profit_margin%TYPE,
+    selling_multiple newsletter_candidates.selling_multiple%TYPE,
+    industry newsletter_candidates.industry%TYPE,
+    location newsletter_candidates.location%TYPE,
+    description newsletter_candidates.description%TYPE,
+    business_age newsletter_candidates.business_age%TYPE,
+    number_of_employees newsletter_candidates.number_of_employees%TYPE,
+    created_at newsletter_candidates.created_at%TYPE,
+    search_rank REAL
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT c.id, c.title, c.listing_url, c.source_platform, c.asking_price, c.revenue, c.ebitda,
+           c.profit_margin, c.selling_multiple, c.industry, c.location, c.description,
+           c.business_age, c.number_of_employees, c.created_at,
+           CASE WHEN matching THEN ts_rank(c.search_vector, q.search) ELSE 0 END
+    FROM newsletter_candidates c,
+         LATERAL (SELECT to_tsquery('english', search_query) AS search) q
+    WHERE (c.search_vector @@ q.search) = matching
+      AND (exclude_query IS NULL OR NOT c.search_vector @@ to_tsquery('english', exclude_query));
+$$;
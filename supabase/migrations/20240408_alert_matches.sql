@@ -0,0 +1,21 @@
+-- Per-alert pending matches. Newly stored listings are routed to the alerts they
+-- satisfy by the in-memory alert index during the scraper run. Newsletters read an
+-- alert's unsent matches from here and mark them sent afterwards.
+
+CREATE TABLE IF NOT EXISTS alert_matches (
+    alert_id UUID NOT NULL REFERENCES alerts(id) ON DELETE CASCADE,
+    listing_id UUID NOT NULL REFERENCES listings(id) ON DELETE CASCADE,
+    exact BOOLEAN NOT NULL DEFAULT FALSE,
+    score INTEGER NOT NULL DEFAULT 0,
+    matched_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    sent_at TIMESTAMPTZ,
+    PRIMARY KEY (alert_id, listing_id)
+);
+
+-- get_pending_alert_matches: one alert's unsent matches, newest first
+CREATE INDEX IF NOT EXISTS idx_alert_matches_pending
+ON alert_matches(alert_id, matched_at DESC)
+WHERE sent_at IS NULL;
+
+-- Cascading deletes from listings
+CREATE INDEX IF NOT EXISTS idx_alert_matches_listing_id ON alert_matches(listing_id);
@@ -0,0 +1,40 @@
+-- Per-field word counts for BM25 ranking of keyword matches. store_listing computes
+-- them from the listing text (Listing.to_row) and writes them only when the text
+-- changes. Listings stored before this migration are filled in when they are next
+-- scraped, since the new column changes their content hash. newsletter_candidates
+-- carries the counts, so a newsletter run builds its term index without rescanning text.
+
+ALTER TABLE listings ADD COLUMN IF NOT EXISTS term_frequencies JSONB;
+
+DROP MATERIALIZED VIEW IF EXISTS newsletter_candidates;
+
+CREATE MATERIALIZED VIEW newsletter_candidates AS
+SELECT
+    id,
+    title,
+    listing_url,
+    source_platform,
+    asking_price,
+    revenue,
+    ebitda,
+    profit_margin,
+    selling_multiple,
+    COALESCE(NULLIF(btrim(industry), ''), 'Other') AS industry,
+    location,
+    description,
+    business_age,
+    number_of_employees,
+    created_at,
+    search_vector,
+    term_frequencies
+FROM listings
+WHERE status IN ('active', 'pending')
+  AND created_at > now() - interval '31 days';
+
+CREATE UNIQUE INDEX idx_newsletter_candidates_id ON newsletter_candidates(id);
+CREATE INDEX idx_newsletter_candidates_created_at ON newsletter_candidates(created_at DESC, id DESC);
+CREATE INDEX idx_newsletter_candidates_industry_created_at ON newsletter_candidates(industry, created_at DESC);
+CREATE INDEX idx_newsletter_candidates_asking_price ON newsletter_candidates(asking_price, created_at);
+CREATE INDEX idx_newsletter_candidates_search_vector ON newsletter_candidates USING GIN (search_vector);
+
+GRANT SELECT ON newsletter_candidates TO anon, authenticated, service_role;
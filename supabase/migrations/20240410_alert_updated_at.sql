@@ -0,0 +1,25 @@
+-- Alerts are compiled once into predicate objects and cached by (id, updated_at), so
+-- updated_at has to move whenever an alert's criteria change. Sends only touch
+-- last_notification_sent, which is part of the cache key on its own, so they leave
+-- updated_at alone.
+
+ALTER TABLE alerts ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+
+CREATE OR REPLACE FUNCTION set_alert_updated_at()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF (to_jsonb(NEW) - 'last_notification_sent' - 'updated_at')
+       IS DISTINCT FROM (to_jsonb(OLD) - 'last_notification_sent' - 'updated_at') THEN
+        NEW.updated_at := now();
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS alerts_set_updated_at ON alerts;
+CREATE TRIGGER alerts_set_updated_at
+BEFORE UPDATE ON alerts
+FOR EACH ROW
+EXECUTE FUNCTION set_alert_updated_at();
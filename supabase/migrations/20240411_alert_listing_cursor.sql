@@ -0,0 +1,56 @@
+-- Each alert keeps a (created_at, id) high-water mark of the newsletter candidates its
+-- last newsletter covered. Matching reads only the candidates past the cursor, up to the
+-- newest candidate at the start of the run, as an index range scan on
+-- idx_newsletter_candidates_created_at (created_at DESC, id DESC), so consecutive sends
+-- neither overlap nor leave gaps. Alerts without a cursor (never sent since this
+-- migration) fall back to their frequency's lookback window.
+
+ALTER TABLE alerts ADD COLUMN IF NOT EXISTS listing_cursor_created_at TIMESTAMPTZ;
+ALTER TABLE alerts ADD COLUMN IF NOT EXISTS listing_cursor_id UUID;
+
+-- Record a send and advance the cursor in one statement. The cursor only moves forward,
+-- so a slower concurrent send for the same alert cannot move it back.
+CREATE OR REPLACE FUNCTION mark_alert_notified(
+    target_alert_id UUID,
+    sent_at TIMESTAMPTZ,
+    cursor_created_at TIMESTAMPTZ DEFAULT NULL,
+    cursor_listing_id UUID DEFAULT NULL
+)
+RETURNS void
+LANGUAGE sql
+AS $$
+    UPDATE alerts a
+    SET last_notification_sent = mark_alert_notified.sent_at,
+        listing_cursor_created_at = CASE
+            WHEN mark_alert_notified.cursor_created_at IS NOT NULL
+             AND (a.listing_cursor_created_at IS NULL
+                  OR (a.listing_cursor_created_at, a.listing_cursor_id)
+                     < (mark_alert_notified.cursor_created_at, mark_alert_notified.cursor_listing_id))
+            THEN mark_alert_notified.cursor_created_at
+            ELSE a.listing_cursor_created_at
+        END,
+        listing_cursor_id = CASE
+            WHEN mark_alert_notified.cursor_created_at IS NOT NULL
+             AND (a.listing_cursor_created_at IS NULL
+                  OR (a.listing_cursor_created_at, a.listing_cursor_id)
+                     < (mark_alert_notified.cursor_created_at, mark_alert_notified.cursor_listing_id))
+            THEN mark_alert_notified.cursor_listing_id
+            ELSE a.listing_cursor_id
+        END
+    WHERE a.id = target_alert_id;
+$$;
+
+-- Sends (last_notification_sent and the cursor) do not change an alert's criteria
+CREATE OR REPLACE FUNCTION set_alert_updated_at()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF (to_jsonb(NEW) - 'last_notification_sent' - 'listing_cursor_created_at' - 'listing_cursor_id' - 'updated_at')
+       IS DISTINCT FROM
+       (to_jsonb(OLD) - 'last_notification_sent' - 'listing_cursor_created_at' - 'listing_cursor_id' - 'updated_at') THEN
+        NEW.updated_at := now();
+    END IF;
+    RETURN NEW;
+END;
+$$;
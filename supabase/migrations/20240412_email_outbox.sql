@@ -0,0 +1,53 @@
+-- Rendered emails waiting for delivery. Newsletter runs enqueue them instead of calling
+-- Resend inline, and the email dispatcher drains the outbox separately under the
+-- provider's rate limit, retrying failed sends with backoff. The idempotency key is sent
+-- with every attempt, so a retry after a lost response is not delivered twice. Emails of
+-- a batch request that failed without an answer keep its key in batch_key and are
+-- retried together, under the same key.
+
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    idempotency_key TEXT NOT NULL UNIQUE,
+    params JSONB NOT NULL,
+    context JSONB,
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'sending', 'sent', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    email_id TEXT,
+    error_message TEXT,
+    batch_key TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    sent_at TIMESTAMPTZ
+);
+
+-- claim_email_outbox: due emails, oldest first
+CREATE INDEX IF NOT EXISTS idx_email_outbox_due
+ON email_outbox(next_attempt_at, batch_key, created_at, idempotency_key)
+WHERE status IN ('pending', 'sending');
+
+-- Claim up to batch_size due emails for one dispatcher: pending ones, and ones whose
+-- dispatcher stopped before recording a result (their lease ran out). Claimed rows are
+-- leased for lease_seconds; SKIP LOCKED lets several dispatchers drain concurrently.
+CREATE OR REPLACE FUNCTION claim_email_outbox(batch_size INTEGER DEFAULT 100, lease_seconds INTEGER DEFAULT 300)
+RETURNS SETOF email_outbox
+LANGUAGE sql
+AS $$
+    WITH due AS (
+        SELECT o.id
+        FROM email_outbox o
+        WHERE o.status IN ('pending', 'sending')
+          AND o.next_attempt_at <= now()
+        ORDER BY o.next_attempt_at, o.batch_key, o.created_at, o.idempotency_key
+        LIMIT batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE email_outbox o
+    SET status = 'sending',
+        attempts = o.attempts + 1,
+        next_attempt_at = now() + make_interval(secs => lease_seconds),
+        updated_at = now()
+    FROM due
+    WHERE o.id = due.id
+    RETURNING o.*;
+$$;